@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Usage:
+  bench_micro.py [options]
+  bench_micro.py -h | --help
+
+Times the pieces of the message path on their own: keyword matching, action
+execution (with and without cached responses), rendering, and the league data
+structures.
+
+Options:
+  -t --time SECONDS   Minimum time to spend on each benchmark [default: 0.5].
+  -h --help           Show this help message.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import timeit
+
+from docopt import docopt
+
+import fixtures
+
+from slackbot import LeagueIndex, SlackBotLib, Standings, Table
+from slackbot.actionhandler import SquirtleActionHandler
+
+def measure(function, seconds):
+  """
+  Calls function repeatedly for at least the given number of seconds. Returns the
+  best time per call, in seconds, of three such runs.
+  """
+  timer = timeit.Timer(function)
+  number, _ = timer.autorange()
+  number = max(1, int(number * seconds / 0.2))
+  return min(timer.repeat(repeat=3, number=number)) / number
+
+def benchmarks():
+  """ Returns a list of (name, function) tuples to be timed. """
+  at = fixtures.AT
+  ah = SquirtleActionHandler('SquirtleBot', at)
+  league = fixtures.League()
+  index = LeagueIndex(league, version=1)
+  user = {'first_name': 'Albert'}
+  week = fixtures.WEEK
+
+  chatter = 'my waiver claim went through, what a week'
+  command = at + ' show my matchup'
+  regex = ah.parse_keywords(text=command)['matchup']
+
+  def matchups_all_uncached():
+    ah.responses.clear()
+    ah.exec_action(action='matchups_all', league=index, week=week)
+
+  def standings_uncached():
+    ah.responses.clear()
+    index._standings = None
+    index._standings_version = None
+    ah.exec_action(action='standings', league=index, week=week)
+
+  def table():
+    t = Table(align='llr')
+    for team in league.teams:
+      t.add_row(team.team_name, team.owner, team.scores[week-1])
+    return t.code_block()
+
+  standings = Standings(league, week)
+
+  return [
+    ('parse_keywords (chatter)', lambda: ah.parse_keywords(text=chatter)),
+    ('parse_keywords (command)', lambda: ah.parse_keywords(text=command)),
+    ('exec_action matchup (cached)', lambda: ah.exec_action(
+      action='matchup', text=command, regex=regex, league=index, week=week, user=user)),
+    ('exec_action matchups_all (cached)', lambda: ah.exec_action(
+      action='matchups_all', league=index, week=week)),
+    ('exec_action matchups_all (uncached)', matchups_all_uncached),
+    ('exec_action standings (uncached)', standings_uncached),
+    ('Table (12 rows)', table),
+    ('SlackBotLib.format_matchup', lambda: SlackBotLib.format_matchup(
+      'Able Aces', 'Baker Bums', 101.5, 99.25)),
+    ('LeagueIndex', lambda: LeagueIndex(league)),
+    ('Standings', lambda: Standings(league, week)),
+    ('Standings.update', lambda: standings.update(league, week)),
+  ]
+
+def main(args):
+  seconds = float(args['--time'])
+  table = Table(align='lrr')
+  table.add_row('benchmark', 'us/op', 'ops/s')
+  for name, function in benchmarks():
+    per_call = measure(function, seconds)
+    table.add_row(name, '%.2f' % (per_call * 1e6), '%.0f' % (1 / per_call))
+  print(table.render())
+
+if __name__ == '__main__':
+  main(docopt(__doc__, help=True))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Usage:
+  bench_pipeline.py [options]
+  bench_pipeline.py -h | --help
+
+Pushes a stream of RTM events through a SquirtleBot, from rtm_read() to the
+chat.postMessage call, with a stubbed Slack client and an in-memory league.
+Reports events per second and end-to-end reply latency.
+
+Options:
+  -n --events N       Number of synthetic events [default: 20000].
+  -b --batch N        Events returned by each rtm_read() [default: 10].
+  -c --commands F     Fraction of watched messages that are commands [default: 0.1].
+  -u --unwatched F    Fraction of events in unwatched channels [default: 0.5].
+  -w --workers N      Action workers [default: 4].
+  -r --replay FILE    Use the events of a recording instead, in fixed size
+                      batches; see replay.py to keep their timing.
+  -h --help           Show this help message.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import time
+
+from collections import deque
+
+from docopt import docopt
+
+import fixtures
+
+from slackbot import Table
+
+def percentile(values, p):
+  """ Returns the p-th percentile of a sorted list (0 if it is empty). """
+  if not values:
+    return 0.0
+  return values[min(len(values) - 1, int(p / 100.0 * len(values)))]
+
+def run(stream, batch=10, workers=4):
+  """
+  Feeds the events to a bot in batches of the given size, then waits for every
+  reply. Returns a dict of results.
+  """
+  fixtures.StubClient.posted = []
+  bot = fixtures.bot(workers=workers)
+
+  # Replies within a channel are posted in the order of the commands that
+  # caused them, so each reply is matched to the oldest unanswered command.
+  sent = {}
+  expected = 0
+  start = time.perf_counter()
+  for i in range(0, len(stream), batch):
+    events = stream[i:i+batch]
+    bot._client.queue(events)
+    now = time.perf_counter()
+    for e in events:
+      if fixtures.is_command(e):
+        sent.setdefault(e['channel'], deque()).append(now)
+        expected += 1
+    bot.handle_events(bot._rtm_read())
+  ingested = time.perf_counter()
+
+  # Commands refused by a full WorkerPool will never be answered.
+  metrics = bot.metrics()
+  deadline = time.perf_counter() + 60
+  while len(fixtures.StubClient.posted) < expected - metrics.counter('actions_refused') \
+    and time.perf_counter() < deadline:
+    time.sleep(0.001)
+  posted = list(fixtures.StubClient.posted)
+  done = posted[-1][0] if posted else ingested
+  bot.stop()
+
+  latencies = []
+  for at, channel in posted:
+    if sent.get(channel):
+      latencies.append(at - sent[channel].popleft())
+  latencies.sort()
+
+  return {
+    'events': len(stream),
+    'commands': expected,
+    'replies': len(posted),
+    'refused': metrics.counter('actions_refused'),
+    'ingest_seconds': ingested - start,
+    'total_seconds': max(done, ingested) - start,
+    'p50': percentile(latencies, 50),
+    'p99': percentile(latencies, 99),
+    'max': latencies[-1] if latencies else 0.0,
+    'stats': bot.stats(),
+  }
+
+def stages(stats):
+  """ Returns a Table of the per-stage latencies in a bot's stats(). """
+  table = Table(align='lrrrr')
+  table.add_row('stage', 'count', 'p50 ms', 'p99 ms', 'max ms')
+  for name, h in sorted(stats['histograms'].items()):
+    table.add_row(name, h['count'], '%.3f' % (h['p50'] * 1000),
+                  '%.3f' % (h['p99'] * 1000), '%.3f' % (h['max'] * 1000))
+  return table
+
+def report(results):
+  """ Prints the results of run(). """
+  table = Table(align='lr')
+  table.add_row('events', results['events'])
+  table.add_row('commands', results['commands'])
+  table.add_row('replies', results['replies'])
+  table.add_row('refused (pool full)', results['refused'])
+  table.add_row('events/s (read loop)', '%.0f' % (results['events'] / results['ingest_seconds']))
+  table.add_row('events/s (to last reply)', '%.0f' % (results['events'] / results['total_seconds']))
+  table.add_row('reply p50 ms', '%.3f' % (results['p50'] * 1000))
+  table.add_row('reply p99 ms', '%.3f' % (results['p99'] * 1000))
+  table.add_row('reply max ms', '%.3f' % (results['max'] * 1000))
+  print(table.render())
+
+  print()
+  print(stages(results['stats']).render())
+
+  if results['replies'] + results['refused'] != results['commands']:
+    print('\nWARNING: %d commands but %d replies and %d refused.'
+          % (results['commands'], results['replies'], results['refused']))
+
+def main(args):
+  if args['--replay']:
+    stream = fixtures.load(args['--replay'])
+  else:
+    stream = fixtures.events(int(args['--events']),
+                             commands=float(args['--commands']),
+                             unwatched=float(args['--unwatched']))
+  report(run(stream, batch=int(args['--batch']), workers=int(args['--workers'])))
+
+if __name__ == '__main__':
+  main(docopt(__doc__, help=True))
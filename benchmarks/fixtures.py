@@ -0,0 +1,219 @@
+"""
+Stand-ins used by the benchmarks: a Slack client which answers from memory, an
+ESPN league built in memory, and streams of RTM events, either synthetic or read
+from a recording (see slackbot.Recorder).
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import os
+import sys
+import logging
+import random
+import threading
+import time
+
+from collections import deque
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import slackbot.workspace
+
+from slackbot import LeagueHandler, Outbox, Recorder, SquirtleBot, Workspace
+
+BOT_ID   = 'UBOT'
+BOT_NAME = 'squirtlebot'
+AT       = '<@%s>' % BOT_ID
+YEAR     = 2017
+WEEK     = 5
+
+FIRST_NAMES = ['Albert', 'Barry', 'Carl', 'Dana', 'Ed', 'Fran', 'Gus', 'Hank',
+               'Ida', 'Jack', 'Kim', 'Lou', 'Max', 'Ned', 'Opal', 'Pete']
+
+# Messages which each draw exactly one reply, and chatter which draws none.
+COMMANDS = [
+  AT + ' show all matchups',
+  AT + ' show my matchup',
+  AT + ' standings',
+  'brady is overrated',
+]
+CHATTER = [
+  'anyone watching the game tonight?',
+  'lol',
+  'my waiver claim went through',
+  'what a week',
+]
+
+class StubClient(object):
+  """
+  Answers the Web API calls made by SlackBots from memory, and plays back queued
+  events through rtm_read(). Records the time of every chat.postMessage call.
+  """
+  users    = 16
+  channels = 4
+  posted   = []
+  lock     = threading.Lock()
+
+  def __init__(self, token):
+    self.server = None
+    self._events = deque()
+
+  def api_call(self, method, **kwargs):
+    if method == 'auth.test':
+      return {'ok': True, 'team_id': 'TBENCH', 'user_id': BOT_ID}
+    if method == 'users.list':
+      members = [{'id': BOT_ID, 'name': BOT_NAME, 'profile': {}}]
+      for i in range(StubClient.users):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        members.append({'id': 'U%d' % i, 'name': first.lower(),
+                        'profile': {'first_name': first, 'last_name': 'Bench'}})
+      return {'ok': True, 'members': members}
+    if method == 'channels.list':
+      return {'ok': True, 'channels': [{'id': 'C%d' % i, 'name': 'bench-%d' % i}
+                                       for i in range(StubClient.channels)]}
+    if method == 'groups.list':
+      return {'ok': True, 'groups': []}
+    if method == 'chat.postMessage':
+      with StubClient.lock:
+        StubClient.posted.append((time.perf_counter(), kwargs['channel']))
+      return {'ok': True, 'headers': {}}
+    return {'ok': False, 'error': 'unknown_method'}
+
+  def rtm_connect(self):
+    return True
+
+  def rtm_read(self):
+    if self._events:
+      return self._events.popleft()
+    return []
+
+  def queue(self, events):
+    """ Queues a batch of events to be returned by the next rtm_read(). """
+    self._events.append(events)
+
+class Team(object):
+  def __init__(self, team_id, owner, team_name):
+    self.team_id = team_id
+    self.owner_id = 'P%d' % team_id
+    self.owner = owner
+    self.team_name = team_name
+    self.schedule = []
+    self.scores = []
+    self.overall_standing = team_id
+
+class Player(object):
+  def __init__(self, team):
+    self.player_id = team.owner_id
+    self.first_name = team.owner.split()[0]
+
+class Settings(object):
+  def __init__(self, name, year):
+    self.name = name
+    self.year = year
+
+class League(object):
+  """ In-memory stand-in for an espnff.League, with a round-robin schedule. """
+  def __init__(self, teams=12, weeks=13, year=YEAR, seed=0):
+    rng = random.Random(seed)
+    self.settings = Settings('Benchmark League', year)
+    self.teams = [Team(i + 1, '%s Bench' % FIRST_NAMES[i % len(FIRST_NAMES)],
+                       'Team %d' % (i + 1)) for i in range(teams)]
+    self.players = [Player(t) for t in self.teams]
+
+    order = list(range(teams))
+    for week in range(weeks):
+      for i in range(teams // 2):
+        a, b = self.teams[order[i]], self.teams[order[teams - 1 - i]]
+        a.schedule.append(b)
+        b.schedule.append(a)
+      order = [order[0]] + [order[-1]] + order[1:-1]
+    for t in self.teams:
+      t.scores = [round(rng.uniform(60, 160), 1) for _ in range(weeks)]
+
+def league_handler(teams=12, weeks=13):
+  """ Returns a LeagueHandler holding in-memory Leagues; it never goes online. """
+  handler = LeagueHandler(lid=1, year=YEAR, espn_s2='bench', swid='bench')
+  handler._install(YEAR, League(teams, weeks, YEAR))
+  handler._install(YEAR - 1, League(teams, weeks, YEAR - 1, seed=1))
+  handler._current_week = WEEK
+  handler._week_expires = datetime.max
+  return handler
+
+class BenchBot(SquirtleBot):
+  """ SquirtleBot whose league comes from league_handler() rather than ESPN. """
+  def _init_league(self):
+    self.league = league_handler()
+
+def bot(workers=4, bot_id=None, channels=()):
+  """
+  Returns a connected SquirtleBot using StubClient and league_handler(), whose
+  Outbox does not rate limit. It takes the given ID, if any (to answer mentions
+  in a recording), and also watches the given channel IDs.
+  """
+  slackbot.workspace.SlackClient = StubClient
+  Workspace.clear()
+  logger = logging.getLogger('benchmark')
+  logger.addHandler(logging.NullHandler())
+  logger.propagate = False
+  config = {
+    'Type': 'SquirtleBot',
+    'API Token': 'xoxb-bench',
+    'Action Workers': workers,
+    'Channels': dict(('bench-%d' % i, None) for i in range(StubClient.channels)),
+    'League ID': 1,
+    'League Year': YEAR,
+    'League Auth Cookies': {'espn_s2': 'bench', 'SWID': 'bench'},
+    'Logger': logger,
+    'Root': '.',
+    'Dat_dir': 'dat',
+  }
+  b = BenchBot('SquirtleBot', config)
+  if bot_id:
+    b.id(bot_id)
+  for id_str in channels:
+    b.channels()[id_str] = id_str
+    b._watched[id_str] = id_str
+  b._outbox = Outbox(b._send_msg, rate=1e9, burst=1e9, max_size=1e9)
+  b._starttime = datetime.utcnow()
+  b.connect()
+  return b
+
+def events(n, commands=0.1, unwatched=0.5, seed=0):
+  """
+  Returns n synthetic message events. The given fraction of them is posted in
+  channels the bot does not watch; of the rest, the given fraction are commands
+  (see COMMANDS) and the others chatter.
+  """
+  rng = random.Random(seed)
+  result = []
+  for i in range(n):
+    user = 'U%d' % rng.randrange(StubClient.users)
+    if rng.random() < unwatched:
+      channel, text = 'CUNWATCHED', rng.choice(CHATTER)
+    else:
+      channel = 'C%d' % rng.randrange(StubClient.channels)
+      text = rng.choice(COMMANDS) if rng.random() < commands else rng.choice(CHATTER)
+    result.append({'type': 'message', 'user': user, 'channel': channel,
+                   'text': text, 'ts': '%d.%06d' % (1500000000 + i, i)})
+  return result
+
+def load(path):
+  """
+  Returns the events in a recording (see Recorder), or in a file of JSON lines
+  with one event on each, gzipped if the name ends in .gz.
+  """
+  return [e for t, e in Recorder.read(path)[1]]
+
+def is_command(event):
+  """ Returns True if the event is one of COMMANDS posted in a watched channel. """
+  return event.get('channel', '').startswith('C') and event.get('channel') != 'CUNWATCHED' \
+    and event.get('text') in COMMANDS
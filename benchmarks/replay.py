@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Usage:
+  replay.py [options] FILE...
+  replay.py -h | --help
+
+Plays RTM events recorded by a bot (see 'Record RTM') back through a SquirtleBot
+with a stubbed Slack client and an in-memory league, in the batches in which
+they were read and at the pace at which they arrived, sped up, or as fast as
+possible. Several files (e.g. a file and its rotated backups) are played as one,
+in order of time. The bot takes the ID of the bot which made the recording and
+watches the same channels (or, failing that, every channel seen).
+
+Run under a profiler to see where a traffic spike was spent, e.g.:
+  python -m cProfile -s cumtime replay.py -f logs/SquirtleBot-rtm.jsonl.gz
+
+Options:
+  -s --speed X        Play at X times the recorded speed [default: 1].
+  -f --fast           Play as fast as possible, ignoring the recorded times.
+  -w --workers N      Action workers [default: 4].
+  -h --help           Show this help message.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import time
+
+from docopt import docopt
+
+import fixtures
+
+from bench_pipeline import stages
+from slackbot import Recorder, Table
+
+def load(paths):
+  """
+  Returns the bot named in the recordings (or None) and their events grouped
+  into batches, as lists of (time, [events]) tuples in order of time.
+  """
+  bot = None
+  records = []
+  for path in paths:
+    named, events = Recorder.read(path)
+    bot = bot or named
+    records.extend(events)
+  records.sort(key=lambda r: r[0] or 0)
+
+  batches = []
+  for t, event in records:
+    if batches and t is not None and batches[-1][0] == t:
+      batches[-1][1].append(event)
+    else:
+      batches.append((t, [event]))
+  return bot, batches
+
+def replay(bot, batches, speed=1.0, workers=4):
+  """
+  Feeds the batches of events to a bot, each at its recorded time divided by
+  speed (or right away if speed is None). Returns a dict of results.
+  """
+  channels = (bot or {}).get('channels') or set(
+    e['channel'] for t, events in batches for e in events if isinstance(e.get('channel'), str))
+  fixtures.StubClient.posted = []
+  b = fixtures.bot(workers=workers, bot_id=(bot or {}).get('id'), channels=channels)
+
+  first = next((t for t, events in batches if t is not None), None)
+  lag = 0.0
+  start = time.perf_counter()
+  for t, events in batches:
+    if speed and t is not None:
+      due = start + (t - first) / speed
+      now = time.perf_counter()
+      if due > now:
+        time.sleep(due - now)
+      else:
+        lag = max(lag, now - due)
+    b._client.queue(events)
+    b.handle_events(b._rtm_read())
+  played = time.perf_counter()
+
+  # Wait for the replies to stop coming.
+  posted, settled = -1, played
+  while time.perf_counter() - settled < 0.5 and time.perf_counter() - played < 60:
+    if len(fixtures.StubClient.posted) != posted:
+      posted, settled = len(fixtures.StubClient.posted), time.perf_counter()
+    time.sleep(0.01)
+  b.stop()
+
+  times = [t for t, events in batches if t is not None]
+  return {
+    'events': sum(len(events) for t, events in batches),
+    'batches': len(batches),
+    'recorded_seconds': times[-1] - times[0] if times else 0.0,
+    'played_seconds': played - start,
+    'max_lag': lag,
+    'replies': posted,
+    'stats': b.stats(),
+  }
+
+def report(results):
+  """ Prints the results of replay(). """
+  table = Table(align='lr')
+  table.add_row('events', results['events'])
+  table.add_row('batches', results['batches'])
+  table.add_row('recorded seconds', '%.3f' % results['recorded_seconds'])
+  table.add_row('played seconds', '%.3f' % results['played_seconds'])
+  table.add_row('events/s', '%.0f' % (results['events'] / max(results['played_seconds'], 1e-9)))
+  table.add_row('max lag ms', '%.3f' % (results['max_lag'] * 1000))
+  table.add_row('replies', results['replies'])
+  print(table.render())
+  print()
+  print(stages(results['stats']).render())
+
+def main(args):
+  bot, batches = load(args['FILE'])
+  speed = None if args['--fast'] else float(args['--speed'])
+  report(replay(bot, batches, speed=speed, workers=int(args['--workers'])))
+
+if __name__ == '__main__':
+  main(docopt(__doc__, help=True))
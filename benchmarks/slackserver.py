@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""Usage:
+  slackserver.py [options]
+  slackserver.py -h | --help
+
+Local stand-in for the parts of Slack used by SlackBots: the Web API methods
+auth.test, rtm.connect, rtm.start, users.list, users.info, channels.list,
+groups.list and chat.postMessage, and the RTM websocket. Made-up users talk in
+made-up channels at a steady rate, now and then addressing the bots, and any
+Web API call may be answered with a rate limit error. Point a bot at it by
+setting its 'API URL' to this server's address.
+
+Options:
+  -p --port N         Port to listen on [default: 8765].
+  -U --users N        Number of users [default: 50].
+  -C --channels N     Number of channels besides #general [default: 5].
+  -r --rate R         Messages per second sent to each connected bot [default: 10].
+  -c --commands F     Fraction of messages addressed to the bot [default: 0.1].
+  -l --ratelimit P    Probability of answering an API call with a rate limit
+                      error [default: 0].
+  -h --help           Show this help message.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import base64
+import hashlib
+import json
+import random
+import socket
+import struct
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+FIRST_NAMES = ['Albert', 'Barry', 'Carl', 'Dana', 'Ed', 'Fran', 'Gus', 'Hank',
+               'Ida', 'Jack', 'Kim', 'Lou', 'Max', 'Ned', 'Opal', 'Pete']
+
+COMMANDS = [' show all matchups', ' show my matchup', ' standings', ' uptime', ' help']
+
+CHATTER = ['anyone watching the game tonight?', 'lol', 'what a week',
+           'my waiver claim went through', 'go jets', 'brady is overrated']
+
+class Connection(object):
+  """ Server side of one RTM websocket. """
+  def __init__(self, sock, user):
+    self.sock = sock
+    self.user = user
+    self.open = True
+    self._lock = threading.Lock()
+
+  def send(self, event):
+    """ Sends an event as a text frame. Returns False if the socket is closed. """
+    try:
+      with self._lock:
+        self.sock.sendall(Connection.frame(0x1, json.dumps(event).encode('utf-8')))
+      return True
+    except OSError:
+      self.open = False
+      return False
+
+  def frame(opcode, payload):
+    """
+    Returns a final, unmasked frame (as sent by servers) with the given opcode,
+    using the 16 or 64 bit length form for payloads of 126 bytes or more.
+    """
+    if len(payload) < 126:
+      header = struct.pack('!BB', 0x80 | opcode, len(payload))
+    elif len(payload) < 65536:
+      header = struct.pack('!BBH', 0x80 | opcode, 126, len(payload))
+    else:
+      header = struct.pack('!BBQ', 0x80 | opcode, 127, len(payload))
+    return header + payload
+
+  def serve(self):
+    """ Reads the client's frames until it closes the connection, answering pings. """
+    try:
+      while self.open:
+        head = self._read(2)
+        opcode, length = head[0] & 0x0f, head[1] & 0x7f
+        if length == 126:
+          length = struct.unpack('!H', self._read(2))[0]
+        elif length == 127:
+          length = struct.unpack('!Q', self._read(8))[0]
+        mask = self._read(4) if head[1] & 0x80 else b'\0\0\0\0'
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self._read(length)))
+        if opcode == 0x8:
+          break
+        if opcode == 0x9:
+          with self._lock:
+            self.sock.sendall(Connection.frame(0xa, payload))
+    except OSError:
+      pass
+    self.open = False
+
+  def _read(self, n):
+    data = b''
+    while len(data) < n:
+      chunk = self.sock.recv(n - len(data))
+      if not chunk:
+        raise OSError('Connection closed.')
+      data += chunk
+    return data
+
+class SlackServer(object):
+  def __init__(self, port=8765, host='127.0.0.1', users=50, channels=5, rate=10.0,
+               commands=0.1, ratelimit=0.0, seed=0):
+    """
+    Args:
+      port:       Port to listen on; 0 picks a free one (see url()).
+
+      host:       Address to listen on.
+
+      users:      Number of made-up users.
+
+      channels:   Number of made-up channels besides #general.
+
+      rate:       Messages per second sent to each connected bot. 0 sends none;
+                  use inject() instead.
+
+      commands:   Fraction of those messages which address the bot.
+
+      ratelimit:  Probability with which any Web API call is answered with HTTP
+                  429 and a 'ratelimited' error instead.
+    """
+    self._rng       = random.Random(seed)
+    self._rate      = rate
+    self._commands  = commands
+    self._ratelimit = ratelimit
+    self._lock      = threading.Lock()
+    self._bots      = {}
+    self._connections = []
+    self._ts        = 0
+
+    self.users = []
+    for i in range(users):
+      first = FIRST_NAMES[i % len(FIRST_NAMES)]
+      self.users.append({
+        'id': 'U%05d' % i,
+        'name': '%s%d' % (first.lower(), i),
+        'real_name': '%s Fake' % first,
+        'profile': {'first_name': first, 'last_name': 'Fake', 'real_name': '%s Fake' % first},
+      })
+    self.channels = [{'id': 'C00000', 'name': 'general'}]
+    for i in range(1, channels + 1):
+      self.channels.append({'id': 'C%05d' % i, 'name': 'channel-%d' % i})
+
+    self.stats = {
+      'api_calls': 0,
+      'ratelimited': 0,
+      'posted': 0,
+      'events': 0,
+      'connections': 0,
+    }
+    self.posted = []
+
+    server = self
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+
+      def do_POST(self):
+        server._handle_api(self)
+
+      def do_GET(self):
+        if urlparse(self.path).path == '/rtm':
+          server._handle_websocket(self)
+        else:
+          server._handle_api(self)
+
+      def log_message(self, format, *args):
+        pass
+
+    self._server = ThreadingHTTPServer((host, port), Handler)
+    self._server.daemon_threads = True
+    self._threads = []
+
+  def url(self):
+    """ Returns the base URL to use as a bot's 'API URL'. """
+    host, port = self._server.server_address[:2]
+    return 'http://%s:%s' % (host, port)
+
+  def start(self):
+    """ Starts serving, and sending traffic, on threads of their own. """
+    self._run = True
+    for target in (self._server.serve_forever, self._traffic):
+      thread = threading.Thread(target=target, daemon=True)
+      thread.start()
+      self._threads.append(thread)
+    return self
+
+  def stop(self):
+    self._run = False
+    self._server.shutdown()
+    self._server.server_close()
+    for c in list(self._connections):
+      c.open = False
+      try:
+        c.sock.close()
+      except OSError:
+        pass
+
+  def inject(self, text, channel='C00000', user=None):
+    """
+    Sends a message event to every connected bot. '%(at)s' in the text is
+    replaced with the bot's @ mention. Returns the number of bots reached.
+    """
+    user = user or self.users[0]['id']
+    reached = 0
+    for c in list(self._connections):
+      if c.open and c.send(self._message(text % {'at': '<@%s>' % c.user['id']}, channel, user)):
+        reached += 1
+    return reached
+
+  def disconnect(self, user=None):
+    """
+    Closes the RTM websockets of the bot with the given user ID (or of every
+    bot), as Slack does now and then. Returns the number closed.
+    """
+    closed = 0
+    for c in list(self._connections):
+      if c.open and user in (None, c.user['id']):
+        c.open = False
+        try:
+          c.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+          pass
+        closed += 1
+    return closed
+
+  def bot(self, token):
+    """ Returns the bot user belonging to a token, creating it on first use. """
+    with self._lock:
+      user = self._bots.get(token)
+      if user is None:
+        n = len(self._bots)
+        user = {'id': 'UBOT%d' % n, 'name': 'bot%d' % n, 'is_bot': True,
+                'profile': {'first_name': 'Bot', 'last_name': str(n), 'bot_id': 'BBOT%d' % n}}
+        self._bots[token] = user
+    return user
+
+  def _message(self, text, channel, user):
+    with self._lock:
+      self._ts += 1
+      ts = '%d.%06d' % (int(time.time()), self._ts % 1000000)
+      self.stats['events'] += 1
+    return {'type': 'message', 'channel': channel, 'user': user, 'text': text, 'ts': ts}
+
+  def _traffic(self):
+    """ Sends made-up messages to every connected bot at the configured rate. """
+    if not self._rate:
+      return
+    interval = 1.0 / self._rate
+    next_at = time.monotonic()
+    while self._run:
+      next_at += interval
+      for c in list(self._connections):
+        if not c.open:
+          continue
+        user = self._rng.choice(self.users)['id']
+        channel = self._rng.choice(self.channels)['id']
+        if self._rng.random() < self._commands:
+          text = '<@%s>%s' % (c.user['id'], self._rng.choice(COMMANDS))
+        else:
+          text = self._rng.choice(CHATTER)
+        c.send(self._message(text, channel, user))
+      time.sleep(max(0, next_at - time.monotonic()))
+
+  def _handle_api(self, request):
+    """ Answers a Web API call (POST or GET /api/<method>). """
+    url = urlparse(request.path)
+    method = url.path.rsplit('/', 1)[-1]
+    length = int(request.headers.get('Content-Length') or 0)
+    body = request.rfile.read(length).decode('utf-8') if length else ''
+    if request.headers.get('Content-Type', '').startswith('application/json'):
+      args = json.loads(body or '{}')
+    else:
+      args = dict((k, v[-1]) for k, v in parse_qs(body or url.query).items())
+    token = (request.headers.get('Authorization') or '').replace('Bearer ', '') \
+      or args.get('token', '')
+
+    with self._lock:
+      self.stats['api_calls'] += 1
+      limited = self._rng.random() < self._ratelimit
+      if limited:
+        self.stats['ratelimited'] += 1
+    if limited:
+      self._respond(request, {'ok': False, 'error': 'ratelimited'}, status=429,
+                    headers={'Retry-After': '1'})
+      return
+
+    handler = getattr(self, '_api_' + method.replace('.', '_'), None)
+    if handler is None:
+      self._respond(request, {'ok': False, 'error': 'unknown_method'})
+    else:
+      self._respond(request, handler(token, args))
+
+  def _respond(self, request, result, status=200, headers=None):
+    body = json.dumps(result).encode('utf-8')
+    request.send_response(status)
+    request.send_header('Content-Type', 'application/json; charset=utf-8')
+    request.send_header('Content-Length', str(len(body)))
+    for k, v in (headers or {}).items():
+      request.send_header(k, v)
+    request.end_headers()
+    request.wfile.write(body)
+
+  def _page(self, items, args):
+    """ Returns one page of a list and the cursor of the next, as Slack does. """
+    limit = int(args.get('limit') or 0) or len(items) or 1
+    start = int(args.get('cursor') or 0)
+    page = items[start:start+limit]
+    cursor = str(start + limit) if start + limit < len(items) else ''
+    return page, {'next_cursor': cursor}
+
+  def _api_auth_test(self, token, args):
+    user = self.bot(token)
+    return {'ok': True, 'url': self.url() + '/', 'team': 'Fake Team', 'team_id': 'TFAKE',
+            'user': user['name'], 'user_id': user['id']}
+
+  def _api_rtm_connect(self, token, args):
+    user = self.bot(token)
+    return {'ok': True, 'url': self.url().replace('http', 'ws', 1) + '/rtm?token=' + token,
+            'team': {'id': 'TFAKE', 'name': 'Fake Team', 'domain': 'fake'},
+            'self': {'id': user['id'], 'name': user['name']}}
+
+  def _api_rtm_start(self, token, args):
+    result = self._api_rtm_connect(token, args)
+    result.update({'users': self.users + list(self._bots.values()),
+                   'channels': self.channels, 'groups': [], 'ims': []})
+    return result
+
+  def _api_users_list(self, token, args):
+    members, metadata = self._page(self.users + list(self._bots.values()), args)
+    return {'ok': True, 'members': members, 'response_metadata': metadata}
+
+  def _api_users_info(self, token, args):
+    for u in self.users + list(self._bots.values()):
+      if u['id'] == args.get('user'):
+        return {'ok': True, 'user': u}
+    return {'ok': False, 'error': 'user_not_found'}
+
+  def _api_channels_list(self, token, args):
+    channels, metadata = self._page(self.channels, args)
+    return {'ok': True, 'channels': channels, 'response_metadata': metadata}
+
+  def _api_groups_list(self, token, args):
+    return {'ok': True, 'groups': [], 'response_metadata': {'next_cursor': ''}}
+
+  def _api_chat_postMessage(self, token, args):
+    channel = args.get('channel')
+    if not any(c['id'] == channel for c in self.channels):
+      return {'ok': False, 'error': 'channel_not_found'}
+    user = self.bot(token)
+    message = self._message(args.get('text', ''), channel, user['id'])
+    message['bot_id'] = user['profile']['bot_id']
+    with self._lock:
+      self.stats['posted'] += 1
+      self.posted.append((time.time(), channel, message['text']))
+    # Like Slack, echo the bot's message back over RTM, marked as a bot's so
+    # that bots do not answer each other.
+    for c in list(self._connections):
+      if c.open:
+        c.send(message)
+    return {'ok': True, 'channel': channel, 'ts': message['ts'], 'message': message}
+
+  def _handle_websocket(self, request):
+    """ Upgrades a GET /rtm request to a websocket and serves it. """
+    token = parse_qs(urlparse(request.path).query).get('token', [''])[0]
+    key = request.headers.get('Sec-WebSocket-Key', '')
+    accept = base64.b64encode(
+      hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+    request.send_response(101, 'Switching Protocols')
+    request.send_header('Upgrade', 'websocket')
+    request.send_header('Connection', 'Upgrade')
+    request.send_header('Sec-WebSocket-Accept', accept)
+    request.end_headers()
+    request.wfile.flush()
+
+    connection = Connection(request.connection, self.bot(token))
+    with self._lock:
+      self._connections.append(connection)
+      self.stats['connections'] += 1
+    connection.send({'type': 'hello'})
+    connection.serve()
+    with self._lock:
+      self._connections.remove(connection)
+    request.close_connection = True
+
+def main(args):
+  server = SlackServer(
+    port=int(args['--port']),
+    users=int(args['--users']),
+    channels=int(args['--channels']),
+    rate=float(args['--rate']),
+    commands=float(args['--commands']),
+    ratelimit=float(args['--ratelimit'])).start()
+  print('Serving a fake Slack at %s (set "API URL" to this).' % server.url())
+  try:
+    while True:
+      time.sleep(10)
+      print(' '.join('%s=%s' % (k, v) for k, v in sorted(server.stats.items())))
+  except KeyboardInterrupt:
+    server.stop()
+
+if __name__ == '__main__':
+  from docopt import docopt
+  main(docopt(__doc__, help=True))
@@ -12,5 +12,21 @@ from .slackbot import SlackBot
 from .squirtlebot import SquirtleBot
 from .actionhandler import SquirtleActionHandler
 from .leaguehandler import LeagueHandler
+from .leagueindex import LeagueIndex
+from .leaguesnapshot import LeagueSnapshot
+from .responsecache import ResponseCache
+from .table import Table
+from .standings import Standings
 # from .slackbotlang import SlackBotLang
 from .slackbotlib import SlackBotLib
+from .outbox import Outbox
+from .workerpool import WorkerPool
+from .userdirectory import UserDirectory
+from .message import Message
+from .supervisor import Supervisor
+from .channeldirectory import ChannelDirectory
+from .workspace import Workspace
+from .metrics import Metrics, MetricsServer
+from .recorder import Recorder
+from .logwriter import BotLogger, JsonFormatter, LogWriter, RotatingLogHandler
+from .configfile import ConfigFile
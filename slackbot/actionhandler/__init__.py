@@ -8,7 +8,8 @@ __credits__    = ['Matthew Sheridan']
 __version__    = '0.1'
 __status__     = 'Development'
 
-from .structs import Action, Keyword
+from .structs import Action, Keyword, action
+from .keywordmatcher import KeywordMatcher
 from .actionhandler import ActionHandler
 from .squirtleactionhandler import SquirtleActionHandler
 from ..slackbotlib import SlackBotLib
@@ -19,7 +19,8 @@ import re
 
 import inflect
 
-from .structs import Action, Keyword
+from .keywordmatcher import KeywordMatcher
+from .structs import Action, Keyword, action
 from ..slackbotlib import SlackBotLib
 
 class ActionHandler(object):
@@ -36,11 +37,9 @@ class ActionHandler(object):
     """
     self.at = at
     self.name = name
-    self._actions  = [
-      Action(name='about:author', function=self._action_about_author),
-      Action(name='about:bot', function=self._action_about_bot),
-      Action(name='help', function=self._action_help)
-    ]
+    self._actions  = {}
+    for a in self.registered_actions():
+      self._actions.setdefault(a.name, []).append(a)
     self._keywords = [
       Keyword(
         name='about:author',
@@ -62,14 +61,18 @@ class ActionHandler(object):
         re_match=True
       ),
     ]
+    self._matcher = KeywordMatcher(self._keywords)
 
-  def exec_action(self, **kwargs):
+  def exec_action(self, function=None, **kwargs):
     """
     Executes the function specified by one or more Actions given as an argument,
     but does not execute any further actions, only returning what those functions
     themselves return.
 
     Args:
+      function: Optional function called with each result (as 'result') and
+                the other args, such as SlackBot.post_msg().
+
       action: Action(s) matching one of the Actions listed in self._actions;
               this is the Action to be executed. Other args needed for that
               Action's own arguments are passed through.
@@ -78,43 +81,87 @@ class ActionHandler(object):
               result, if any.
     """
     action_name = kwargs.get('action')
-    execute = [a for a in self._actions if a.name == action_name]
+    execute = self._actions.get(action_name, [])
     result = []
     for e in execute:
       result.append(e.function(**kwargs))
+    if function:
+      for r in result:
+        function(**dict(kwargs, result=r))
     return result
 
   def parse_keywords(self, **kwargs):
     """
     Compares regular expressions in Keywords to the given text and returns the
-    name of that Keyword if a match is found.
+    name of that Keyword if a match is found. See KeywordMatcher for how this is
+    done without trying each Keyword in turn.
     """
     text    = kwargs.get('text')
     execute = {}
 
     if text:
-      for k in self._keywords:
-        if (k.re_match and k.regex.match(text))        \
-          or (not k.re_match and k.regex.search(text)):
-            execute[k.name] = k.regex
+      execute = self._matcher.match(text)
     if execute == {}:
       return None
     return execute
 
   def update(self, actions=None, keywords=None):
     """
-    Merges new lists of Actions and Keywords with the existing lists. New entries
-    are placed at the front of the list (worth noting for help message purposes).
+    Merges new lists of Actions and Keywords with the existing ones. New entries
+    are placed at the front (worth noting for help message purposes, and for
+    the order in which Actions of the same name are executed).
     """
-    for a in self._actions:
-      if not a in actions:
-        actions.append(a)
-    self._actions = actions
-
+    merged = {}
+    seen   = set()
+    for a in (actions or []):
+      merged.setdefault(a.name, []).append(a)
+      seen.add((a.name, a.function))
+    for name in self._actions:
+      for a in self._actions[name]:
+        if not (a.name, a.function) in seen:
+          merged.setdefault(a.name, []).append(a)
+          seen.add((a.name, a.function))
+    self._actions = merged
+
+    keywords = list(keywords or [])
+    seen = set((k.name, k.regex, k.re_match) for k in keywords)
     for k in self._keywords:
-      if not k in keywords:
+      if not (k.name, k.regex, k.re_match) in seen:
         keywords.append(k)
+        seen.add((k.name, k.regex, k.re_match))
     self._keywords = keywords
+    self._matcher = KeywordMatcher(self._keywords)
+
+  def remove(self, names):
+    """ Removes every Action and Keyword with one of the given names. """
+    names = set(names)
+    self._actions = dict((name, a) for name, a in self._actions.items() if not name in names)
+    self._keywords = [k for k in self._keywords if not k.name in names]
+    self._matcher = KeywordMatcher(self._keywords)
+
+  def registered_actions(self, group='default'):
+    """
+    Returns a list of Actions for every method of this handler marked with the
+    @action decorator for the given group, in the order in which those methods
+    are defined (parent classes first).
+    """
+    actions = []
+    seen    = set()
+    for cls in reversed(type(self).__mro__):
+      for attr, value in vars(cls).items():
+        for name, g, needs_user in getattr(value, '_action_names', []):
+          if g == group and not (attr, name) in seen:
+            seen.add((attr, name))
+            actions.append(Action(name=name, function=getattr(self, attr),
+                                  needs_user=needs_user))
+    return actions
+
+  def needs_user(self, names):
+    """
+    Returns True if any Action with one of the given names needs the user who
+    sent the message (see Action).
+    """
+    return any(a.needs_user for name in names for a in self._actions.get(name, []))
 
   def help_string(keyword):
     lines = []
@@ -132,17 +179,20 @@ class ActionHandler(object):
 
   """
   The following are methods which should be executed when an Action is called
-  (see the Action instances above in self._actions). If the SlackBot should post
-  a message to the channel that prompted the Action, that message should be
+  (see the @action decorator on each of them). If the SlackBot should post a
+  message to the channel that prompted the Action, that message should be
   returned by these methods.
   """
 
+  @action('about:author')
   def _action_about_author(self, **kwargs):
     return(__author__ + ' is the author of this bot. Please visit %r!' % __website__)
 
+  @action('about:bot')
   def _action_about_bot(self, **kwargs):
     return('%s is a chatbot created by %s. Please visit %r!' % (self.name, __author__, __website__))
 
+  @action('help')
   def _action_help(self, **kwargs):
     """ Returns a help message with examples of each command (where provided). """
     msg = []
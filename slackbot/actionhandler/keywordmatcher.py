@@ -0,0 +1,232 @@
+"""
+Matches a whole list of Keywords against a piece of text without trying each of
+their regular expressions in turn.
+
+Anchored Keywords (re_match=True) are folded into combined expressions made of
+one lookahead per Keyword, so that a single match() call reports every one of
+them that matches. Those beginning with literal text (most of them begin with
+the bot's @BotName) are grouped by that text, and a group's expression is only
+run on text starting with it. Unanchored Keywords which are plain words are
+looked for with a substring test, which is much cheaper than a search.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import re
+
+# Flags which can be carried over to a combined expression as scoped inline
+# flags, e.g. (?i:...).
+_SCOPED_FLAGS = ((re.I, 'i'), (re.M, 'm'), (re.S, 's'), (re.X, 'x'))
+
+# Group references cannot survive being renumbered inside a combined expression.
+_GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+_SPECIAL     = set('.^$*+?{}[]\\|()')
+_QUANTIFIERS = set('*+?{')
+
+# With re.I these letters also match characters that str.lower() does not turn
+# into them (e.g. the long s), so a lowercase substring test could miss those.
+_UNSAFE_LOWER = set('iks')
+
+class KeywordMatcher(object):
+  def __init__(self, keywords):
+    """
+    Args:
+      keywords: A list of Keywords, in the order used by
+                ActionHandler.parse_keywords().
+    """
+    self._keywords = list(keywords)
+    self._prefixed = {}
+    self._lengths  = []
+    self._anchored = None
+    self._words    = []
+    self._single   = []
+
+    prefixed = {}
+    anchored = []
+
+    for i, k in enumerate(self._keywords):
+      if not k.re_match:
+        word = KeywordMatcher._word(k.regex)
+        if word:
+          self._words.append((i, word, bool(k.regex.flags & re.I)))
+        else:
+          self._single.append(i)
+        continue
+
+      wrapped = KeywordMatcher._wrap(k.regex)
+      if wrapped is None:
+        self._single.append(i)
+        continue
+
+      literal = ''
+      if not k.regex.flags & (re.I | re.X):
+        literal = KeywordMatcher._literal_prefix(k.regex.pattern)
+      if literal:
+        prefixed.setdefault(literal, []).append((i, wrapped))
+      else:
+        anchored.append((i, wrapped))
+
+    for literal in prefixed:
+      self._prefixed[literal] = KeywordMatcher._combine(prefixed[literal])
+    self._lengths = sorted(set(len(literal) for literal in prefixed))
+    if anchored:
+      self._anchored = KeywordMatcher._combine(anchored)
+
+  def __len__(self):
+    return len(self._keywords)
+
+  def match(self, text):
+    """
+    Returns a dict of {name: regex} for every Keyword matching the given text,
+    exactly as though each Keyword's regex had been tried in turn. If several
+    Keywords with the same name match, the last of them wins.
+    """
+    matched = set()
+
+    if self._anchored:
+      KeywordMatcher._collect(self._anchored, text, matched)
+
+    for length in self._lengths:
+      if length > len(text):
+        break
+      combined = self._prefixed.get(text[:length])
+      if combined:
+        KeywordMatcher._collect(combined, text, matched)
+
+    if self._words:
+      lowered = text.lower()
+      for i, word, ignorecase in self._words:
+        if word in (lowered if ignorecase else text):
+          matched.add(i)
+
+    for i in self._single:
+      k = self._keywords[i]
+      if (k.re_match and k.regex.match(text)) \
+        or (not k.re_match and k.regex.search(text)):
+          matched.add(i)
+
+    execute = {}
+    for i in sorted(matched):
+      execute[self._keywords[i].name] = self._keywords[i].regex
+    return execute
+
+  def _collect(combined, text, matched):
+    """ Adds the index of every Keyword whose lookahead matched the text. """
+    m = combined.match(text)
+    for group, value in m.groupdict().items():
+      if value is not None:
+        matched.add(int(group[1:]))
+
+  def _combine(wrapped):
+    """
+    Compiles a list of (index, expression) pairs into one expression in which
+    every lookahead is optional, so that it always matches at position 0 and
+    each named group records whether its Keyword matched.
+    """
+    return re.compile(''.join(
+      '(?:(?=(?P<k%d>%s))|)' % (i, w) for i, w in wrapped))
+
+  def _wrap(regex):
+    """
+    Returns the expression that stands in for the given regex within a combined
+    expression, or None if it cannot be combined safely and has to be run on its
+    own.
+    """
+    if not isinstance(regex.pattern, str) \
+      or regex.groupindex \
+      or _GROUP_REFERENCE.search(regex.pattern):
+      return None
+
+    flags = regex.flags & ~re.U
+    scoped = ''
+    for flag, letter in _SCOPED_FLAGS:
+      if flags & flag:
+        scoped += letter
+        flags &= ~flag
+    if flags:
+      return None
+
+    pattern = regex.pattern
+    if 'x' in scoped:
+      pattern += '\n'
+    pattern = '(?%s:%s)' % (scoped, pattern)
+
+    try:
+      re.compile(pattern)
+    except re.error:
+      return None
+    return pattern
+
+  def _word(regex):
+    """
+    Returns the text matched by a regex which is nothing but literal text, for
+    which a search is the same as a substring test. With re.I the text is
+    returned in lowercase. Returns None for any other regex.
+    """
+    if not isinstance(regex.pattern, str) or regex.flags & ~(re.U | re.I):
+      return None
+    if KeywordMatcher._literal_length(regex.pattern) != len(regex.pattern):
+      return None
+
+    word = KeywordMatcher._literal_prefix(regex.pattern)
+    if regex.flags & re.I:
+      if not word.isascii() or _UNSAFE_LOWER & set(word.lower()):
+        return None
+      word = word.lower()
+    return word or None
+
+  def _literal_length(pattern):
+    """
+    Returns the number of characters at the start of a pattern which only match
+    literal text.
+    """
+    i = 0
+    while i < len(pattern):
+      size = 1
+      if pattern[i] == '\\':
+        if i + 1 >= len(pattern) or pattern[i+1].isalnum():
+          break
+        size = 2
+      elif pattern[i] in _SPECIAL:
+        break
+      if i + size < len(pattern) and pattern[i+size] in _QUANTIFIERS:
+        break
+      i += size
+    return i
+
+  def _literal_prefix(pattern):
+    """
+    Returns the literal text that any match of the given (case sensitive,
+    non-verbose, anchored) pattern must begin with. Returns an empty string if
+    there is none.
+    """
+    depth = 0
+    klass = False
+    i = 0
+    while i < len(pattern):
+      c = pattern[i]
+      if c == '\\':
+        i += 1
+      elif klass:
+        klass = c != ']'
+      elif c == '[':
+        klass = True
+      elif c == '(':
+        depth += 1
+      elif c == ')':
+        depth -= 1
+      elif c == '|' and depth == 0:
+        return ''
+      i += 1
+
+    length = KeywordMatcher._literal_length(pattern)
+    return re.sub(r'\\(.)', r'\1', pattern[:length])
@@ -18,6 +18,9 @@ __status__     = 'Development'
 from random import randrange
 
 from .actionhandler import *
+from ..leagueindex import LeagueIndex
+from ..responsecache import ResponseCache
+from ..table import Table
 
 class SquirtleActionHandler(ActionHandler):
   def __init__(self, name, at, cheeky=True, **kwargs):
@@ -29,6 +32,7 @@ class SquirtleActionHandler(ActionHandler):
     """
     super(SquirtleActionHandler, self).__init__(name=name, at=at)
     self._inflect = inflect.engine()
+    self.responses = ResponseCache()
     self.update(actions=self.actions_fantasy(), keywords=self.keywords_fantasy())
 
     if cheeky:
@@ -36,40 +40,28 @@ class SquirtleActionHandler(ActionHandler):
 
     self.update(actions=self.actions_utility(), keywords=self.keywords_utility())
 
-  def exec_action(self, function=None, **kwargs):
-    results = super(SquirtleActionHandler, self).exec_action(**kwargs)
-    for r in results:
-      kwargs['result'] = r
-      if function:
-        function(**kwargs)
-    return results
+  def cheeky(self, on):
+    """ Enables or disables the 'cheeky' Actions and their Keywords. """
+    if on:
+      self.update(actions=self.actions_cheeky(), keywords=self.keywords_cheeky())
+    else:
+      self.remove(a.name for a in self.actions_cheeky())
 
   """
   The following methods simply return lists which will be merged with
   self._actions and self._keywords. They are separated here as their own methods
-  for ease of use and readability.
+  for ease of use and readability. Actions are declared with the @action
+  decorator on the methods further below.
   """
 
   def actions_cheeky(self):
-    return [
-      Action(name='brady', function=self._action_brady),
-      Action(name='geno', function=self._action_geno),
-      Action(name='jets', function=self._action_jets),
-      Action(name='lacy', function=self._action_lacy),
-    ]
+    return self.registered_actions('cheeky')
 
   def actions_fantasy(self):
-    return [
-      Action(name='matchup', function=self._action_matchup),
-      Action(name='matchups_all', function=self._action_matchups_all),
-      Action(name='tell', function=self._action_tell),
-      # 'at_bot':  self._action_mention
-    ]
+    return self.registered_actions('fantasy')
 
   def actions_utility(self):
-    return [
-      Action(name='uptime', function=self._utility_uptime),
-    ]
+    return self.registered_actions('utility')
 
   def keywords_cheeky(self):
     return [
@@ -97,6 +89,13 @@ class SquirtleActionHandler(ActionHandler):
         examples=['%s show all matchups' % self.at],
         re_match=True
       ),
+      Keyword(
+        name='standings',
+        regex=re.compile('%s (?:show )?(?:the )?standings' % self.at, flags=re.I),
+        name_pretty='Show the overall standings',
+        examples=['%s show the standings' % self.at],
+        re_match=True
+      ),
       Keyword(
         name='tell',
         regex=re.compile('%s (?:tell me|what|how) about ([a-zA-Z]+)(?:\'|\'s){0,1} team' % self.at, flags=re.I),
@@ -112,18 +111,32 @@ class SquirtleActionHandler(ActionHandler):
         regex=re.compile('%s uptime' % self.at),
         re_match=True
       ),
+      Keyword(
+        name='stats',
+        regex=re.compile('%s stats' % self.at),
+        name_pretty='Show how busy I am and how quickly I answer',
+        examples=['%s stats' % self.at],
+        re_match=True
+      ),
+      Keyword(
+        name='profile',
+        regex=re.compile('%s profile(?: (?:on|off))?$' % self.at),
+        re_match=True
+      ),
     ]
 
   """
   The following are methods which should be executed when an Action is called
-  (see the Action instances above in self._actions). If the SlackBot should post
+  (see the @action decorator on each of them). If the SlackBot should post
   a message to the channel that prompted the Action, that message should be
   returned by these methods.
   """
 
+  @action('brady', group='cheeky')
   def _action_brady(self, **kwargs):
     return('Tom Brady has deflated balls.')
 
+  @action('geno', group='cheeky')
   def _action_geno(self, **kwargs):
     """
     Returns a string similar to 'GENO' with a random number of 'E', 'N', and
@@ -136,28 +149,28 @@ class SquirtleActionHandler(ActionHandler):
     [geno.append('o') for _ in range(randrange(2,5))]
     return(''.join(geno).upper())
 
+  @action('jets', group='cheeky')
   def _action_jets(self, **kwargs):
     return('GO JETS')
 
+  @action('lacy', group='cheeky')
   def _action_lacy(self, **kwargs):
     return('Choo choo!')
 
+  @action('matchup', group='fantasy', needs_user=True)
   def _action_matchup(self, **kwargs):
     """
     Returns the matchup and scores for a given player during a given week.
 
     Args in kwargs:
-      players:  A list of Player objects. This will be used to match a Slack user
-                to a member of the fantasy league, and that member to their team.
-                See: espnff.Player
+      league: The LeagueIndex of the current League. This will be used to match
+              a Slack user to a member of the fantasy league, and that member to
+              their team. See: LeagueIndex
 
       regex:  The regular expression which matched the Action containing this
               method. Necessary to retrieve the name of the person whose matchup
               should be returned.
 
-      teams:  A list of Team objects, one for each team in the league.
-              See: espnff.Team
-
       text:   The text content of the message in which the request was made.
 
       user:   The user whose message triggered this method. This is not necessarily
@@ -170,38 +183,32 @@ class SquirtleActionHandler(ActionHandler):
       week:   The week number of the matchup to be fetched. Note: this does NOT
               start at zero. Range: in all likelihood, 1 to 16.
     """
-    msg = []
     queried_player = re.findall(kwargs.get('regex'), kwargs.get('text'))[0]
-    teams = kwargs.get('teams')
-    week  = kwargs.get('week')
+    league = kwargs.get('league')
+    week   = kwargs.get('week')
 
     if queried_player.lower() == 'my':
       queried_player = kwargs['user']['first_name']
-    player = None
 
+    key = ('matchup', LeagueIndex.normalize(queried_player), league.version, week)
+    return self.responses.get(key, lambda: self._render_matchup(league, week, queried_player))
+
+  def _render_matchup(self, league, week, queried_player):
+    """ Renders the response of _action_matchup(). """
+    msg = []
     try:
       assert (queried_player != None and queried_player != '')
 
-      for p in kwargs.get('players'):
-        if p.first_name.lower() == queried_player.lower():
-          player = p
-
-      assert player != None
+      team = league.team_by_player_name(queried_player)
+      assert team != None
 
-      team = None
-      for t in teams:
-        if t.owner_id == player.player_id:
-          team = t
       opponent = team.schedule[week-1]
 
-      line1, line2 = SlackBotLib.format_matchup(
-        name1=team.team_name,
-        name2=opponent.team_name,
-        score1=team.scores[week-1],
-        score2=opponent.scores[week-1])
+      table = Table(align='llr')
+      table.add_row(team.team_name, team.owner, team.scores[week-1])
+      table.add_row(opponent.team_name, opponent.owner, opponent.scores[week-1])
       msg.append('Week %s: vs. %s (%s):\n' % (week, opponent.owner, opponent.team_name))
-      msg.append('%s vs. %s:\n' % (team.owner, opponent.owner))
-      msg.append('```%s\n%s```' % (line1, line2))
+      msg.append(table.code_block())
 
     except AssertionError:
       msg.append('I\'m sorry, but I can\'t figure out who that is! Try this: make sure that your name in Slack matches your name on ESPN.com!\n')
@@ -209,35 +216,33 @@ class SquirtleActionHandler(ActionHandler):
 
     return ''.join(msg)
 
+  @action('matchups_all', group='fantasy')
   def _action_matchups_all(self, **kwargs):
     """
     Returns all matchups in the given week.
 
     Args in kwargs:
-      teams:  A list of Team objects, one for each team in the league.
-              See: espnff.Team
+      league: The LeagueIndex of the current League. See: LeagueIndex
 
       week:   The week number of the matchup to be fetched. Note: this does NOT
               start at zero. Range: in all likelihood, 1 to 16.
     """
-    msg = []
-    teams = kwargs.get('teams')
-    week  = kwargs.get('week')
-
-    msg.append('Week %s matchups:\n' % week)
-    for t in teams:
-      opponent = t.schedule[week-1]
-      line1, line2 = SlackBotLib.format_matchup(
-        name1=t.team_name,
-        name2=opponent.team_name,
-        score1=t.scores[week-1],
-        score2=opponent.scores[week-1]
-        )
-      msg.append('%s vs. %s:\n' % (t.owner, opponent.owner))
-      msg.append('```%s\n%s```\n' % (line1, line2))
-      teams.remove(opponent)
+    league = kwargs.get('league')
+    week   = kwargs.get('week')
 
-    return ''.join(msg)
+    key = ('matchups_all', (), league.version, week)
+    return self.responses.get(key, lambda: self._render_matchups_all(league, week))
+
+  def _render_matchups_all(self, league, week):
+    """ Renders the response of _action_matchups_all(). """
+    table = Table(align='llr')
+    for t, opponent in league.matchups(week):
+      if len(table):
+        table.add_break()
+      table.add_row(t.team_name, t.owner, t.scores[week-1])
+      table.add_row(opponent.team_name, opponent.owner, opponent.scores[week-1])
+
+    return 'Week %s matchups:\n%s' % (week, table.code_block())
 
   """ Needs to be updated.
   def _action_mention(self, **kwargs):
@@ -253,6 +258,7 @@ class SquirtleActionHandler(ActionHandler):
   """
 
   # Add parsing for 'my' or move it up to SlackBot
+  @action('tell', group='fantasy', needs_user=True)
   def _action_tell(self, **kwargs):
     """
     Returns a candid and unflattering opinion of a named player's fantasy team.
@@ -262,13 +268,11 @@ class SquirtleActionHandler(ActionHandler):
               method. Necessary to retrieve the name of the person who should be
               insulted.
 
-      teams:  A list of Team objects, one for each team in the league.
-              These are the teams for the CURRENT year's league.
-              See: espnff.Team
+      league: The LeagueIndex of the CURRENT year's League.
+              See: LeagueIndex
 
-      teams_prev: A list of Team objects, one for each team in the league.
-                  These are the teams for the PREVIOUS year's league.
-                  See: espnff.Team
+      league_prev:  The LeagueIndex of the PREVIOUS year's League.
+                    See: LeagueIndex
 
       text:   The text content of the message in which the request was made.
 
@@ -281,22 +285,22 @@ class SquirtleActionHandler(ActionHandler):
     """
     msg = []
     team_owner = re.findall(kwargs.get('regex'), kwargs.get('text'))[0]
-    teams      = kwargs.get('teams')
-    teams_prev = kwargs.get('teams_prev')
+    league      = kwargs.get('league')
+    league_prev = kwargs.get('league_prev')
     team_name       = None
     team_place_prev = None
     is_user = False
 
     if team_owner.lower() == 'my':
-      team_owner = kwargs['user']['first_name']
+      team_owner = kwargs['user']['first_name'] or ''
       is_user = True
 
-    for t in teams:
-      if t.owner.split()[0].lower() == team_owner.lower():
-        team_name = t.team_name
-    for t in teams_prev:
-      if t.owner.split()[0].lower() == team_owner.lower():
-        team_place_prev = t.overall_standing
+    team = league.team_by_owner_name(team_owner)
+    if team:
+      team_name = team.team_name
+    team_prev = league_prev.team_by_owner_name(team_owner) if league_prev else None
+    if team_prev:
+      team_place_prev = team_prev.overall_standing
 
     if team_name:
       msg.append(team_name + ' are terrible and %s totally clueless.' % ('you are' if is_user else '%s is' % str.capitalize(team_owner)))
@@ -307,11 +311,91 @@ class SquirtleActionHandler(ActionHandler):
 
     return ''.join(msg)
 
+  @action('standings', group='fantasy')
   def _action_standings(self, **kwargs):
     """
-    Returns the curren overall standings of the league.
-    """
-    return 'To be implemented.'
+    Returns the current overall standings of the league.
 
+    Args in kwargs:
+      league: The LeagueIndex of the current League. See: LeagueIndex
+
+      week:   The current week number. Weeks before it count as played; the
+              current week is counted as if the season ended now.
+    """
+    league = kwargs.get('league')
+    week   = kwargs.get('week')
+
+    key = ('standings', (), league.version, week)
+    return self.responses.get(key, lambda: self._render_standings(league, week))
+
+  def _render_standings(self, league, week):
+    """ Renders the response of _action_standings(). """
+    table = Table(align='rlllrr')
+    table.add_row('', 'Team', 'Owner', 'W-L-T', 'PF', 'PA')
+    for rank, r in enumerate(league.standings(week).rows, 1):
+      table.add_row(
+        rank,
+        r.team.team_name,
+        r.team.owner,
+        '%d-%d-%d' % (r.wins, r.losses, r.ties),
+        round(r.points_for, 2),
+        round(r.points_against, 2))
+
+    return 'Standings as of week %s:\n%s' % (week, table.code_block())
+
+  @action('uptime', group='utility')
   def _utility_uptime(self, **kwargs):
     return 'Uptime: %s' % kwargs['uptime']
+
+  @action('stats', group='utility')
+  def _utility_stats(self, **kwargs):
+    """
+    Returns the uptime followed by the bot's counters and timings.
+
+    Args in kwargs:
+      stats:  The dict returned by SlackBot.stats().
+
+      uptime: The bot's uptime.
+    """
+    stats = kwargs['stats']
+    msg = [self._utility_uptime(**kwargs)]
+
+    counters = ', '.join('%s: %s' % (name.replace('_', ' '), n)
+                         for name, n in sorted(stats['counters'].items()))
+    if counters:
+      msg.append(counters.capitalize())
+
+    outbox = stats.get('outbox')
+    if outbox:
+      msg.append('Outbox: %s queued, %s dropped, %.0f ms average delivery'
+                 % (outbox['depth'], outbox['dropped'], outbox['latency_avg'] * 1000))
+
+    responses = stats.get('responses')
+    if responses:
+      msg.append('Cached responses: %s hits, %s misses'
+                 % (responses['hits'], responses['misses']))
+
+    if stats['histograms']:
+      table = Table(align='lrrrr')
+      table.add_row('', 'count', 'p50 ms', 'p99 ms', 'max ms')
+      for name, h in sorted(stats['histograms'].items()):
+        table.add_row(name, h['count'], '%.2f' % (h['p50'] * 1000),
+                      '%.2f' % (h['p99'] * 1000), '%.2f' % (h['max'] * 1000))
+      msg.append(table.code_block())
+
+    return '\n'.join(msg)
+
+  @action('profile', group='utility')
+  def _utility_profile(self, **kwargs):
+    """
+    Returns whether the bot is being profiled, and where to.
+
+    Args in kwargs:
+      profiler: The Profiler returned by SlackBot.profile(), or None.
+    """
+    profiler = kwargs.get('profiler')
+    if profiler is None:
+      return 'Not profiling.'
+    if profiler.running():
+      return 'Profiling to `%s`.' % profiler.path
+    return 'Stopped profiling; %d samples written to `%s`.' % (profiler.samples, profiler.path)
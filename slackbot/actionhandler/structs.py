@@ -1,6 +1,7 @@
 """
 Provides simple classes to abstract regular expressions (Keywords) and the
-functions (Actions) that should be called when found in parsed text.
+functions (Actions) that should be called when found in parsed text, as well as
+a decorator for declaring ActionHandler methods as Actions.
 """
 
 __author__     = 'Matthew Sheridan'
@@ -21,16 +22,20 @@ class Action(object):
   upon some condition as specified by one or more Keywords.
   i.e. This is a container for a function and a keyword used to trigger it.
   """
-  def __init__(self, name, function):
+  def __init__(self, name, function, needs_user=False):
     """
     Args:
       name:   a string that will be used to identify this Action when one or more
               Keywords are matched
 
       func:   a function which should be called when this Action is matched
+
+      needs_user: True if the function uses the name of the user who sent the
+                  message, which the SlackBot then looks up before calling it
     """
     self.name = name.lower()
     self.function = function
+    self.needs_user = needs_user
 
   def __eq__(self, other):
     return self.name == other.name \
@@ -43,6 +48,29 @@ class Action(object):
     return self.name
 
 
+def action(name, group='default', needs_user=False):
+  """
+  Decorator which marks an ActionHandler method as the function of an Action.
+  The handler turns marked methods into Actions with
+  ActionHandler.registered_actions(). A method may be marked more than once.
+
+  Args:
+    name:   the name of the Action, as in Action(name=...)
+
+    group:  a string used to register related Actions together; e.g. the
+            SquirtleActionHandler only registers the 'cheeky' group when asked
+            to be cheeky. The ActionHandler itself registers the 'default' group.
+
+    needs_user: as in Action(needs_user=...)
+  """
+  def decorate(function):
+    if not hasattr(function, '_action_names'):
+      function._action_names = []
+    function._action_names.insert(0, (name.lower(), group, needs_user))
+    return function
+  return decorate
+
+
 class Keyword(object):
   """
   Specifies a regular expression which will be used in parsing text from Slack
@@ -0,0 +1,108 @@
+"""
+Keeps an in-memory copy of a Slack team's public and private channels. The lists
+are downloaded once (in pages) and afterwards kept current by the channel events
+arriving over RTM, so that translating between channel names and IDs does not
+cost an API call.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import threading
+
+class ChannelDirectory(object):
+  # API method listing each kind of channel, and the key holding the list.
+  LISTS = (('channels.list', 'channels'), ('groups.list', 'groups'))
+
+  # RTM events which carry a channel (or private channel) to add or replace.
+  EVENTS = ('channel_created', 'channel_rename', 'channel_joined',
+            'group_rename', 'group_joined')
+
+  def __init__(self, client, page_size=200):
+    """
+    Args:
+      client:     A SlackClient used to download the channel lists.
+
+      page_size:  Number of channels requested per list call.
+    """
+    self._client    = client
+    self._page_size = page_size
+
+    self._by_id   = {}
+    self._by_name = {}
+    self._lock    = threading.Lock()
+
+  def __contains__(self, id_str):
+    return id_str in self._by_id
+
+  def __len__(self):
+    return len(self._by_id)
+
+  def load(self):
+    """
+    Downloads the full lists of public and private channels, following each
+    list's pagination cursor, and replaces the current contents of the directory
+    with them.
+    """
+    by_id   = {}
+    by_name = {}
+
+    for method, key in ChannelDirectory.LISTS:
+      cursor = None
+      while True:
+        args = {'limit': self._page_size, 'exclude_members': True}
+        if cursor:
+          args['cursor'] = cursor
+        api_call = self._client.api_call(method, **args)
+        if not api_call.get('ok'):
+          raise Exception(api_call.get('error'))
+
+        for c in api_call.get(key, []):
+          by_id[c['id']] = c['name']
+          by_name.setdefault(c['name'].lower(), c['id'])
+
+        cursor = api_call.get('response_metadata', {}).get('next_cursor')
+        if not cursor:
+          break
+
+    with self._lock:
+      self._by_id   = by_id
+      self._by_name = by_name
+
+  def handle_events(self, events):
+    """
+    Applies any channel events found in a list of RTM events (as returned by
+    SlackClient.rtm_read()). Returns the number of channels added or renamed.
+    """
+    added = 0
+    for e in events:
+      if e and e.get('type') in ChannelDirectory.EVENTS and 'channel' in e:
+        channel = e['channel']
+        if isinstance(channel, dict) and 'id' in channel and 'name' in channel:
+          self.add(channel['id'], channel['name'])
+          added += 1
+    return added
+
+  def add(self, id_str, name):
+    """ Adds or renames a channel. """
+    with self._lock:
+      old = self._by_id.get(id_str)
+      if old and self._by_name.get(old.lower()) == id_str:
+        del self._by_name[old.lower()]
+      self._by_id[id_str] = name
+      self._by_name[name.lower()] = id_str
+
+  def id(self, name):
+    """ Returns the ID of the named channel, or None. """
+    return self._by_name.get(name.lower().lstrip('#'))
+
+  def name(self, id_str):
+    """ Returns the name of the channel with the given ID, or None. """
+    return self._by_id.get(id_str)
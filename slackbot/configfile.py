@@ -0,0 +1,96 @@
+"""
+The JSON file holding the configuration of every bot. It is written whenever
+what the bots would write to it changes, rather than only when they exit, and
+always as a whole: the new contents go to a temporary file which then replaces
+the old one, so a crash never leaves a half-written configuration behind.
+
+A file edited by hand since it was last read or written is not written over:
+the edit would be lost. Once it has been read again (e.g. on SIGHUP), writes go
+ahead as before.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import os
+import json
+import tempfile
+import threading
+
+class ConfigFile(object):
+  def __init__(self, path, logger=None):
+    """
+    Args:
+      path:   The configuration file.
+
+      logger: Optional logger told about writes which were skipped.
+    """
+    self.path    = path
+    self._logger = logger
+    self._lock   = threading.Lock()
+    self._last   = None
+    self._disk   = None
+    self.writes  = 0
+
+  def read(self):
+    """ Returns the configuration in the file. """
+    with open(self.path, 'r') as f:
+      text = f.read()
+    config = json.loads(text)
+    with self._lock:
+      self._last = ConfigFile.dumps(config)
+      self._disk = text
+    return config
+
+  def write(self, config):
+    """
+    Replaces the file with the given configuration, unless that is what was
+    last read or written, or the file has been changed by someone else since.
+    Returns True if the file was written.
+    """
+    text = ConfigFile.dumps(config)
+    with self._lock:
+      if text == self._last:
+        return False
+      if self._changed():
+        if self._logger:
+          self._logger.warning('%s was changed since it was last read; not writing over it.',
+                               self.path)
+        return False
+      directory = os.path.dirname(os.path.abspath(self.path))
+      fd, temp = tempfile.mkstemp(dir=directory, prefix='.%s.' % os.path.basename(self.path))
+      try:
+        with os.fdopen(fd, 'w') as f:
+          f.write(text)
+          f.flush()
+          os.fsync(f.fileno())
+        if os.path.exists(self.path):
+          os.chmod(temp, os.stat(self.path).st_mode & 0o777)
+        os.replace(temp, self.path)
+      except BaseException:
+        os.unlink(temp)
+        raise
+      self._last = text
+      self._disk = text
+      self.writes += 1
+    return True
+
+  def _changed(self):
+    """ Returns True if the file no longer holds what was last read or written. """
+    if self._disk is None:
+      return False
+    try:
+      with open(self.path, 'r') as f:
+        return f.read() != self._disk
+    except FileNotFoundError:
+      return False
+
+  def dumps(config):
+    return json.dumps(config, sort_keys=True, indent=2)
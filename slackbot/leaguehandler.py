@@ -1,6 +1,24 @@
 """
 Primarily provides a wrapper for espnff's League class, but also provides some
 functionality not supplied by espnff.
+
+Leagues are cached per season. Once a season's League is older than the refresh
+time, the cached League is still returned right away while a new one is fetched
+in the background; there is never more than one fetch of a season at a time.
+
+Given a snapshot directory, every League fetched is also written to disk (as a
+LeagueSnapshot, in gzipped JSON) and read back when the LeagueHandler is
+created, so that it can answer right away after a restart. Leagues of seasons
+before the current one are treated as final and are never fetched again once
+they have been saved.
+
+All HTTP requests, including those made by espnff itself, go through a single
+keep-alive session per LeagueHandler, with timeouts and conditional requests
+(If-None-Match/If-Modified-Since) for anything fetched before. espnff calls
+requests.get() directly, so while a League is being fetched, the requests module
+within espnff's module is replaced by a _SessionRequests; it is put back as soon
+as no fetch is in progress, and requests made on any other thread meanwhile go
+to the requests module as usual.
 """
 
 __author__     = 'Matthew Sheridan'
@@ -13,15 +31,76 @@ __credits__    = ['Matthew Sheridan']
 __version__    = '0.1'
 __status__     = 'Development'
 
+import os
+import sys
+import glob
+import gzip
 import json
+import threading
+import time
 import requests
 
 from datetime import datetime, timedelta
 
 from espnff import League
 
+from .leagueindex import LeagueIndex
+from .leaguesnapshot import SNAPSHOT_FORMAT, LeagueSnapshot
+
+SCOREBOARD_URL = 'http://games.espn.com/ffl/api/v2/scoreboard'
+
+# Seconds to wait for ESPN to respond.
+HTTP_TIMEOUT = 10
+
+# ESPN moves on to the next scoring period once Monday night's game is over. The
+# current week is checked again from this weekday (Tuesday) and hour (UTC) on;
+# if ESPN has not moved on yet, it is checked hourly for up to a day.
+WEEK_BOUNDARY_DAY  = 1
+WEEK_BOUNDARY_HOUR = 12
+
+class _SessionRequests(object):
+  """
+  Stands in for the requests module within espnff while Leagues are being
+  fetched. espnff's requests on a thread fetching for a LeagueHandler go through
+  that LeagueHandler's session; any others go to the requests module.
+  """
+  def __init__(self, module):
+    self._local  = threading.local()
+    self._module = module
+    self._lock   = threading.Lock()
+    self._users  = 0
+
+  def __getattr__(self, name):
+    return getattr(requests, name)
+
+  def get(self, url, **kwargs):
+    handler = getattr(self._local, 'handler', None)
+    if handler is None:
+      return requests.get(url, **kwargs)
+    return handler._http_get(url, **kwargs)
+
+  def using(self, handler):
+    """
+    Sets (or, given None, clears) the LeagueHandler for the current thread. The
+    first thread to set one installs this object in place of the module's
+    requests, and the last to clear one puts requests back.
+    """
+    with self._lock:
+      if handler is not None:
+        self._users += 1
+        if self._users == 1 and hasattr(self._module, 'requests'):
+          self._module.requests = self
+      else:
+        self._users -= 1
+        if self._users == 0 and hasattr(self._module, 'requests'):
+          self._module.requests = requests
+    self._local.handler = handler
+
+_espnff_requests = _SessionRequests(sys.modules[League.__module__])
+
 class LeagueHandler(object):
-  def __init__(self, lid, year, espn_s2, swid, refresh_time=None):
+  def __init__(self, lid, year, espn_s2, swid, refresh_time=None, logger=None,
+               snapshot_dir=None, metrics=None, name='league'):
     """
     Args:
       The same arguments required to insantiate espnff.League. If your version
@@ -36,55 +115,313 @@ class LeagueHandler(object):
       espn_s2:  Cookie required for authentication. Retrieve this from your 
                 browser cookies after logging in to ESPN.
       SWID:     Another cookie required for authentication.
+
+    Additional args:
+      refresh_time: Number of minutes after which a League should be fetched
+                    again. Defaults to 30.
+
+      logger:       Optional logger to report failed background fetches to.
+
+      snapshot_dir: Optional directory in which fetched Leagues are saved, and
+                    from which they are loaded on creation.
+
+      metrics:      Optional Metrics in which to record how long fetching
+                    Leagues ('league_fetch') and the current week ('week_fetch')
+                    takes.
+
+      name:         Name of the threads fetching Leagues in the background.
     """
     self._lid      = lid
     self._year     = year
     self._espn_s2  = espn_s2
     self._swid     = swid
     self._current_week = None
-    self._refresh_time = 30
-    if refresh_time:
-      self._refresh_time = refresh_time
+    self._week_expires = None
+    self.set_refresh_time(refresh_time)
+
+    self._logger   = logger
+    self._metrics  = metrics
+    self._snapshot_dir = snapshot_dir
+    self._name     = name
 
     self._leagues  = {}
+    self._indexes  = {}
     self._fetched  = {}
+    self._version  = 0
+    self._listeners = []
+    self._inflight = {}
+    self._lock     = threading.Lock()
+
+    self._week_lock = threading.Lock()
+    self._session  = requests.Session()
+    self._session.cookies.set('espn_s2', self._espn_s2)
+    self._session.cookies.set('SWID', self._swid)
+    self._http_cache = {}
+
+    if self._snapshot_dir:
+      self.load_snapshots()
 
   def get(self, year=None):
     """
     Returns a League object for the given year. If no year is given, the current
-    year's League will be returned.
+    year's League will be returned. Only the first request for a year waits for
+    ESPN; after that, the cached League is returned (and refreshed in the
+    background once it is older than the refresh time).
     """
-    league = None
-    if year in self._leagues and self._fetched[year] \
-      and datetime.now() < (self._fetched[year] + timedelta(minutes=self._refresh_time)):
-      league = self._leagues[year]
-    else:
-      league = self._fetch_league(year)
-      self._current_week = self.current_week()
+    if not year:
+      year = self._year
+
+    league = self._leagues.get(year)
+    if league is None:
+      return self._refresh(year)
+    if year < self._year:
+      return league
+    if datetime.now() >= self._fetched[year] + timedelta(minutes=self._refresh_time):
+      self._refresh(year, background=True)
     return league
 
+  def index(self, year=None):
+    """
+    Returns the LeagueIndex of the League that get() returns for the given year.
+    """
+    if not year:
+      year = self._year
+    self.get(year)
+    return self._indexes[year]
+
+  def set_refresh_time(self, minutes):
+    """
+    Sets the refresh_time (see __init__()). None or 0 sets it back to the
+    default of 30 minutes. Returns the new refresh_time.
+    """
+    self._refresh_time = minutes or 30
+    return self._refresh_time
+
+  def on_install(self, listener):
+    """
+    Registers a function to be called as listener(year, index) whenever a newly
+    fetched or loaded League is installed in the cache.
+    """
+    if not listener in self._listeners:
+      self._listeners.append(listener)
+
+  def load_snapshots(self):
+    """
+    Loads every saved League of this league ID from the snapshot directory.
+    Snapshots which cannot be read or were written in another format are skipped.
+    """
+    pattern = os.path.join(self._snapshot_dir, 'league-%s-*.json.gz' % self._lid)
+    for path in glob.glob(pattern):
+      try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+          snapshot = json.load(f)
+        assert snapshot['format'] == SNAPSHOT_FORMAT, 'Old snapshot format: %r' % path
+        assert snapshot['lid'] == self._lid, 'Snapshot of another league: %r' % path
+        year = snapshot['year']
+        league = LeagueSnapshot.load(snapshot['league'])
+        fetched = LeagueHandler._datetime(snapshot['fetched'])
+        week_expires = LeagueHandler._datetime(snapshot.get('week_expires'))
+      except Exception as e:
+        if self._logger:
+          self._logger.warning('Ignoring league snapshot %r: %r', path, e)
+        continue
+
+      self._install(year, league, fetched=fetched)
+      if year == self._year and snapshot['week']:
+        self._current_week = snapshot['week']
+        self._week_expires = week_expires
+
   def current_week(self):
-    """ Returns the current week's number. """
-    if not self._current_week:
+    """
+    Returns the current week's number. It is fetched again once the NFL week is
+    over (see WEEK_BOUNDARY_DAY), so it stays correct however long the bot runs.
+    """
+    with self._week_lock:
+      now = datetime.utcnow()
+      if self._current_week and self._week_expires and now < self._week_expires:
+        return self._current_week
+
       params = {
         'leagueId': self._lid,
         'seasonId': self._year
       }
-      r = requests.get('http://games.espn.com/ffl/api/v2/scoreboard', params=params)
-      data = r.json()
-      self._current_week = data['scoreboard']['matchupPeriodId']
+      start = time.perf_counter()
+      try:
+        r = self._http_get(SCOREBOARD_URL, params=params)
+        week = r.json()['scoreboard']['matchupPeriodId']
+      except Exception as e:
+        if not self._current_week:
+          raise
+        if self._logger:
+          self._logger.warning('Keeping week %r: %r', self._current_week, e)
+        self._week_expires = now + timedelta(minutes=self._refresh_time)
+        return self._current_week
+      finally:
+        if self._metrics:
+          self._metrics.observe('week_fetch', time.perf_counter() - start)
+
+      self._week_expires = LeagueHandler.next_week_boundary(now)
+      last_boundary = self._week_expires - timedelta(days=7)
+      if week == self._current_week and now - last_boundary < timedelta(days=1):
+        # ESPN has not rolled over to the new week yet.
+        self._week_expires = now + timedelta(hours=1)
+      self._current_week = week
     return self._current_week
 
+  def next_week_boundary(now):
+    """ Returns the first week boundary (as a UTC datetime) after now. """
+    days = (WEEK_BOUNDARY_DAY - now.weekday()) % 7
+    boundary = (now + timedelta(days=days)).replace(
+      hour=WEEK_BOUNDARY_HOUR, minute=0, second=0, microsecond=0)
+    if boundary <= now:
+      boundary += timedelta(days=7)
+    return boundary
+
   def _fetch_league(self, year=None):
     """
-    Called by self.get() if the League for the given year has not already been
-    retrieved.
+    Called by self._refresh() to retrieve the League for the given year from
+    ESPN.
     """
     if not year:
       year = self._year
+    _espnff_requests.using(self)
+    start = time.perf_counter()
     try:
       league = League(self._lid, year, self._espn_s2, self._swid)
-      self._fetched[year] = datetime.now()
     except:
       raise Exception('Error fetching league (year=' + repr(year) + ')')
+    finally:
+      _espnff_requests.using(None)
+      if self._metrics:
+        self._metrics.observe('league_fetch', time.perf_counter() - start)
+    return league
+
+  def _http_get(self, url, params=None, **kwargs):
+    """
+    Performs a GET request through this LeagueHandler's session. If the same
+    request has been answered before with an ETag or Last-Modified header, asks
+    ESPN only for changes, and returns the earlier response if there are none.
+    """
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    headers = dict(kwargs.pop('headers', None) or {})
+    key = (url, tuple(sorted((params or {}).items())))
+
+    cached = self._http_cache.get(key)
+    if cached is not None:
+      if cached.headers.get('ETag'):
+        headers['If-None-Match'] = cached.headers['ETag']
+      if cached.headers.get('Last-Modified'):
+        headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+    r = self._session.get(url, params=params, headers=headers, **kwargs)
+    if r.status_code == 304 and cached is not None:
+      return cached
+    if r.status_code == 200 \
+      and (r.headers.get('ETag') or r.headers.get('Last-Modified')):
+      self._http_cache[key] = r
+    return r
+
+  def _install(self, year, league, fetched=None):
+    """
+    Stores a newly fetched (or loaded) League and its LeagueIndex in the cache,
+    then tells the install listeners about it.
+    """
+    with self._lock:
+      self._version += 1
+      version = self._version
+    index = LeagueIndex(league, version=version, previous=self._indexes.get(year))
+    self._indexes[year] = index
+    self._leagues[year] = league
+    self._fetched[year] = fetched or datetime.now()
+    for listener in list(self._listeners):
+      listener(year, index)
+
+  def _datetime(value):
+    """ Returns the datetime written by isoformat() (or None, given None). """
+    return datetime.fromisoformat(value) if value else None
+
+  def _save_snapshot(self, year):
+    """
+    Writes the cached League for the given year to the snapshot directory. The
+    file is written under a temporary name first, so that a crash never leaves
+    a partial snapshot behind.
+    """
+    snapshot = {
+      'format': SNAPSHOT_FORMAT,
+      'lid': self._lid,
+      'year': year,
+      'fetched': self._fetched[year].isoformat(),
+      'week': self._current_week if year == self._year else None,
+      'week_expires': self._week_expires.isoformat() \
+        if year == self._year and self._week_expires else None,
+      'league': LeagueSnapshot.dump(self._leagues[year]),
+    }
+    os.makedirs(self._snapshot_dir, exist_ok=True)
+    path = os.path.join(self._snapshot_dir, 'league-%s-%s.json.gz' % (self._lid, year))
+    temp = '%s.%s.tmp' % (path, threading.get_ident())
+    try:
+      with gzip.open(temp, 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+      os.replace(temp, path)
+    except Exception as e:
+      if self._logger:
+        self._logger.warning('Could not save league snapshot %r: %r', path, e)
+      if os.path.exists(temp):
+        os.remove(temp)
+
+  def _refresh(self, year, background=False):
+    """
+    Fetches and caches the League for the given year and returns it. If a fetch
+    of that year is already under way, waits for it instead of starting another.
+
+    With background=True, the fetch is done on another thread (and nothing is
+    done if a fetch is already under way); returns None.
+    """
+    with self._lock:
+      done = self._inflight.get(year)
+      fetching = done is None
+      if fetching:
+        done = threading.Event()
+        self._inflight[year] = done
+
+    if not fetching:
+      if background:
+        return None
+      done.wait()
+      if not year in self._leagues:
+        raise Exception('Error fetching league (year=' + repr(year) + ')')
+      return self._leagues[year]
+
+    if background:
+      threading.Thread(target=self._fetch_and_install,
+                       args=(year, done, True),
+                       name=self._name,
+                       daemon=True).start()
+      return None
+    return self._fetch_and_install(year, done)
+
+  def _fetch_and_install(self, year, done, background=False):
+    """
+    Does the actual work of self._refresh(), signalling done when finished. When
+    run in the background, failures are logged and the stale League is kept;
+    it is not fetched again until another refresh_time has passed.
+    """
+    league = None
+    try:
+      league = self._fetch_league(year)
+      self._install(year, league)
+      if year == self._year:
+        self.current_week()
+      if self._snapshot_dir:
+        self._save_snapshot(year)
+    except Exception as e:
+      if not background:
+        raise
+      if self._logger:
+        self._logger.warning('Keeping stale league (year=%r): %r', year, e)
+      self._fetched[year] = datetime.now()
+    finally:
+      with self._lock:
+        del self._inflight[year]
+      done.set()
     return league
@@ -0,0 +1,127 @@
+"""
+Lookup tables for a single League, so that finding a team by its owner's name or
+ID, or listing a week's matchups, does not mean searching through every team and
+player. An index is built once whenever LeagueHandler installs a League, and it
+never modifies the League it was built from.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+from .standings import Standings
+
+class LeagueIndex(object):
+  def __init__(self, league, version=0, previous=None):
+    """
+    Args:
+      league: An espnff.League. Its teams are expected to have an owner_id (and
+              its players a player_id) as in the segfaultmagnet fork of espnff;
+              lookups by ID simply find nothing otherwise.
+
+      version:  A number identifying this snapshot of the League; LeagueHandler
+                gives every League it installs a higher one. Anything derived
+                from the index (e.g. cached responses) can be keyed by it.
+
+      previous: Optional LeagueIndex of an earlier snapshot of the same League.
+                Its Standings are updated rather than counted from scratch.
+    """
+    self.league  = league
+    self.version = version
+    self.teams   = list(league.teams)
+    self._standings = previous._standings if previous else None
+    self._standings_version = None
+
+    self._by_owner_id   = {}
+    self._by_owner_name = {}
+    for t in self.teams:
+      owner_id = getattr(t, 'owner_id', None)
+      if owner_id is not None:
+        self._by_owner_id[owner_id] = t
+      first_name = LeagueIndex.normalize(t.owner.split()[0] if t.owner else None)
+      if first_name:
+        self._by_owner_name[first_name] = t
+
+    # Players are the league members as ESPN knows them; a player's ID is the
+    # owner ID of their team.
+    self._by_player_id   = {}
+    self._by_player_name = {}
+    for p in getattr(league, 'players', None) or []:
+      team = self._by_owner_id.get(p.player_id)
+      if team is None:
+        continue
+      self._by_player_id[p.player_id] = team
+      first_name = LeagueIndex.normalize(p.first_name)
+      if first_name:
+        self._by_player_name[first_name] = team
+
+    self._matchups = {}
+    weeks = max([len(t.schedule) for t in self.teams] or [0])
+    for week in range(1, weeks + 1):
+      self._matchups[week] = LeagueIndex._pair(self.teams, week)
+
+  def __repr__(self):
+    return str('LeagueIndex(league=%r,version=%r)' % (self.league, self.version))
+
+  def matchups(self, week):
+    """
+    Returns the given week's matchups as a list of (team, opponent) tuples, each
+    matchup listed once, in the order of the League's teams.
+    """
+    return self._matchups.get(week, [])
+
+  def standings(self, week):
+    """
+    Returns the League's Standings as of the given week. They are counted only
+    once per week for each index.
+    """
+    standings = self._standings
+    if self._standings_version != (self.version, week):
+      if standings is None:
+        standings = Standings(self.league, week)
+      else:
+        standings = standings.update(self.league, week)
+      self._standings = standings
+      self._standings_version = (self.version, week)
+    return standings
+
+  def team_by_owner_id(self, owner_id):
+    """ Returns the team owned by the given owner ID, or None. """
+    return self._by_owner_id.get(owner_id)
+
+  def team_by_owner_name(self, first_name):
+    """ Returns the team whose owner has the given first name, or None. """
+    return self._by_owner_name.get(LeagueIndex.normalize(first_name))
+
+  def team_by_player_id(self, player_id):
+    """ Returns the team of the league member with the given player ID, or None. """
+    return self._by_player_id.get(player_id)
+
+  def team_by_player_name(self, first_name):
+    """ Returns the team of the league member with the given first name, or None. """
+    return self._by_player_name.get(LeagueIndex.normalize(first_name))
+
+  def normalize(name):
+    """ Returns the form in which names are compared: stripped and lowercase. """
+    if not name:
+      return None
+    return name.strip().lower()
+
+  def _pair(teams, week):
+    """ Returns the deduplicated list of (team, opponent) matchups for a week. """
+    pairs = []
+    seen  = set()
+    for t in teams:
+      if len(t.schedule) < week or id(t) in seen:
+        continue
+      opponent = t.schedule[week-1]
+      seen.add(id(t))
+      seen.add(id(opponent))
+      pairs.append((t, opponent))
+    return pairs
@@ -0,0 +1,96 @@
+"""
+Compact, versioned snapshots of fantasy leagues, as saved by LeagueHandler.
+Only what SquirtleBots use is kept: the league's name and year, its members,
+and each team's owner, name, weekly scores, schedule and standing. Schedules
+refer to opponents by team ID. A snapshot is a plain JSON document:
+
+  {"format": 2, "settings": {"name": ..., "year": ...},
+   "teams": [{"team_id": 1, "team_name": ..., "scores": [...], "schedule": [2, ...], ...}],
+   "players": [{"player_id": ..., "first_name": ...}]}
+
+Loading a snapshot builds a League of the classes below, which have the same
+attributes as their espnff counterparts, rather than espnff objects; nothing in
+the file is executed, and it does not depend on espnff's classes staying the
+same.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+# Bump whenever the contents of a snapshot change, so that old ones are ignored.
+SNAPSHOT_FORMAT = 2
+
+TEAM_FIELDS   = ('team_id', 'owner_id', 'owner', 'team_name', 'overall_standing')
+PLAYER_FIELDS = ('player_id', 'first_name')
+
+class Settings(object):
+  def __init__(self, name, year):
+    self.name = name
+    self.year = year
+
+  def __repr__(self):
+    return str('Settings(%r)' % self.name)
+
+class Team(object):
+  def __init__(self, **fields):
+    for f in TEAM_FIELDS:
+      setattr(self, f, fields.get(f))
+    self.scores   = list(fields.get('scores') or [])
+    self.schedule = []
+
+  def __repr__(self):
+    return str('Team(%r)' % self.team_name)
+
+class Player(object):
+  def __init__(self, player_id, first_name):
+    self.player_id  = player_id
+    self.first_name = first_name
+
+class League(object):
+  def __init__(self, settings, teams, players):
+    self.settings = settings
+    self.teams    = teams
+    self.players  = players
+
+  def __repr__(self):
+    return str('League(%r)' % (self.settings.name if self.settings else None))
+
+class LeagueSnapshot(object):
+  def dump(league):
+    """ Returns a snapshot (a dict which can be written as JSON) of a League. """
+    settings = getattr(league, 'settings', None)
+    return {
+      'format': SNAPSHOT_FORMAT,
+      'settings': {
+        'name': getattr(settings, 'name', None),
+        'year': getattr(settings, 'year', None),
+      },
+      'teams': [dict(
+        [(f, getattr(t, f, None)) for f in TEAM_FIELDS] +
+        [('scores', list(t.scores)), ('schedule', [o.team_id for o in t.schedule])])
+        for t in league.teams],
+      'players': [dict((f, getattr(p, f, None)) for f in PLAYER_FIELDS)
+                  for p in getattr(league, 'players', None) or []],
+    }
+
+  def load(snapshot):
+    """
+    Returns the League described by a snapshot made by dump(). Raises ValueError
+    if the snapshot is in another format.
+    """
+    if snapshot.get('format') != SNAPSHOT_FORMAT:
+      raise ValueError('Unknown snapshot format: %r' % snapshot.get('format'))
+    teams = [Team(**t) for t in snapshot['teams']]
+    by_id = dict((t.team_id, t) for t in teams)
+    for t, data in zip(teams, snapshot['teams']):
+      t.schedule = [by_id[team_id] for team_id in data['schedule']]
+    players = [Player(p['player_id'], p['first_name']) for p in snapshot['players']]
+    settings = snapshot.get('settings') or {}
+    return League(Settings(settings.get('name'), settings.get('year')), teams, players)
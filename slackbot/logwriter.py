@@ -0,0 +1,151 @@
+"""
+Logging which stays off the message path. Log calls only put the record on a
+queue; a background thread formats it and writes it to a file, which is rotated
+once it grows past a given size or has been written to for a given time.
+
+Records are put on the queue unformatted, so log calls should pass their
+arguments rather than build the message themselves:
+
+  self.dbg('Posted in %r: %r', channel, msg)
+
+Bots log through a BotLogger, which adds the bot's name to every record, and
+records may carry a 'channel' and an 'action' as well (via extra=). These are
+written out as fields of their own by JsonFormatter.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import os
+import copy
+import json
+import logging
+import multiprocessing
+import queue
+import time
+
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+class RotatingLogHandler(RotatingFileHandler):
+  def __init__(self, path, max_bytes=10*1024*1024, backups=5, interval=24*60*60):
+    """
+    RotatingFileHandler which also rotates the file every interval seconds
+    (counted from when the handler was created), whatever its size. Either
+    limit may be 0 to turn it off. Rotated files are numbered as usual: the
+    most recent is path.1, the one before path.2 and so on.
+
+    Args:
+      path:       File to log to. Its directory is created if need be.
+
+      max_bytes:  Size after which the file is rotated.
+
+      backups:    Number of rotated files to keep.
+
+      interval:   Seconds after which the file is rotated.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    super(RotatingLogHandler, self).__init__(path, maxBytes=max_bytes, backupCount=backups,
+                                             encoding='utf-8', delay=True)
+    self._interval = interval
+    self._rollover_at = time.time() + interval if interval else None
+
+  def shouldRollover(self, record):
+    if self._rollover_at and time.time() >= self._rollover_at:
+      return True
+    return super(RotatingLogHandler, self).shouldRollover(record)
+
+  def doRollover(self):
+    super(RotatingLogHandler, self).doRollover()
+    if self._interval:
+      self._rollover_at = time.time() + self._interval
+
+class JsonFormatter(logging.Formatter):
+  """ Formats each record as a single line of JSON. """
+  FIELDS = ('bot', 'channel', 'action')
+
+  def format(self, record):
+    data = {
+      'time': self.formatTime(record, self.datefmt),
+      'level': record.levelname,
+      'logger': record.name,
+      'module': record.module,
+      'function': record.funcName,
+      'line': record.lineno,
+      'message': record.getMessage(),
+    }
+    for field in JsonFormatter.FIELDS:
+      value = getattr(record, field, None)
+      if value is not None:
+        data[field] = value
+    if record.exc_info:
+      data['exception'] = self.formatException(record.exc_info)
+    return json.dumps(data, default=str)
+
+class BotLogger(logging.LoggerAdapter):
+  def __init__(self, logger, bot):
+    """ Logs to the given logger, adding bot (a bot's name) to every record. """
+    super(BotLogger, self).__init__(logger, {'bot': bot})
+
+  def process(self, msg, kwargs):
+    extra = kwargs.get('extra')
+    kwargs['extra'] = dict(self.extra, **extra) if extra else self.extra
+    return msg, kwargs
+
+class DeferredQueueHandler(QueueHandler):
+  """
+  QueueHandler which leaves formatting to the thread writing the records out.
+  Only for queues read within the same process, as the arguments of a record
+  are passed along as they are, not pickled; they should not be changed after
+  being logged.
+  """
+  def prepare(self, record):
+    return copy.copy(record)
+
+class LogWriter(object):
+  def __init__(self, handler, shared=False):
+    """
+    Writes the records put on its queue to the given handler, from a thread of
+    its own.
+
+    Args:
+      handler:  Handler which writes records out, such as a RotatingLogHandler.
+
+      shared:   If True, the queue is a multiprocessing.Queue, so that processes
+                forked from this one may log to it as well (see handler()).
+    """
+    self.queue = multiprocessing.Queue() if shared else queue.SimpleQueue()
+    self.pid = os.getpid()
+    self._shared = shared
+    self._listener = QueueListener(self.queue, handler, respect_handler_level=True)
+    self._running  = False
+
+  def start(self):
+    self._listener.start()
+    self._running = True
+    return self
+
+  def stop(self):
+    """ Writes out any records still queued, then stops the thread. """
+    if self._running and os.getpid() == self.pid:
+      self._listener.stop()
+      self._running = False
+
+  def handler(self):
+    """
+    Returns a handler which puts records on this writer's queue. If the queue is
+    shared, the records are formatted before being sent, rather than afterwards,
+    as they are pickled on the way (even in the process which created the
+    writer).
+    """
+    if self._shared:
+      return QueueHandler(self.queue)
+    return DeferredQueueHandler(self.queue)
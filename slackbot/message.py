@@ -0,0 +1,67 @@
+"""
+Text of a message posted to Slack, with natural language processing (tokens,
+tags, noun phrases, sentiment) available on demand. Keyword matching only needs
+the raw text, so nothing is analyzed, and textblob is not even imported, until
+an Action asks for one of these. The analysis is then kept for later use.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+class Message(object):
+  __slots__ = ('text', '_blob')
+
+  def __init__(self, text):
+    """
+    Args:
+      text: The message's text, as received from Slack.
+    """
+    self.text  = text
+    self._blob = None
+
+  def __repr__(self):
+    return str('Message(text=%r)' % self.text)
+
+  def __str__(self):
+    return self.text
+
+  def __len__(self):
+    return len(self.text)
+
+  def __bool__(self):
+    return bool(self.text)
+
+  @property
+  def blob(self):
+    """ The TextBlob of the message's text, created on first use. """
+    if self._blob is None:
+      from textblob import TextBlob
+      self._blob = TextBlob(self.text)
+    return self._blob
+
+  @property
+  def words(self):
+    return self.blob.words
+
+  @property
+  def sentences(self):
+    return self.blob.sentences
+
+  @property
+  def tags(self):
+    return self.blob.tags
+
+  @property
+  def noun_phrases(self):
+    return self.blob.noun_phrases
+
+  @property
+  def sentiment(self):
+    return self.blob.sentiment
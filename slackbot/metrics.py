@@ -0,0 +1,159 @@
+"""
+Counters and latency histograms for finding out where a bot spends its time.
+Histograms have one bucket per power of two microseconds, so recording a timing
+is a couple of integer operations, and percentiles are exact to within a factor
+of two, which is plenty for spotting regressions and tail latency.
+
+A bot's metrics can also be served as JSON over HTTP on a local port, for
+whatever monitoring is watching the bot.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bucket i counts timings of less than 2**i microseconds (the last one, anything
+# longer); 27 buckets reach a little over a minute.
+BUCKETS = 27
+
+class Histogram(object):
+  def __init__(self):
+    self._lock    = threading.Lock()
+    self._buckets = [0] * BUCKETS
+    self._count   = 0
+    self._total   = 0.0
+    self._max     = 0.0
+
+  def __len__(self):
+    return self._count
+
+  def observe(self, seconds):
+    """ Records a single timing, in seconds. """
+    i = min(int(seconds * 1000000).bit_length(), BUCKETS - 1)
+    with self._lock:
+      self._buckets[i] += 1
+      self._count += 1
+      self._total += seconds
+      if seconds > self._max:
+        self._max = seconds
+
+  def percentile(self, p):
+    """
+    Returns an upper bound, in seconds, of the timing below which the given
+    percentage of timings fall (0 if nothing has been recorded).
+    """
+    with self._lock:
+      if not self._count:
+        return 0.0
+      rank = p / 100.0 * self._count
+      seen = 0
+      for i, n in enumerate(self._buckets):
+        seen += n
+        if seen >= rank and n:
+          return min(2 ** i / 1000000.0, self._max)
+      return self._max
+
+  def stats(self):
+    """
+    Returns a dict with the 'count' of timings, and their 'avg', 'p50', 'p99' and
+    'max' in seconds.
+    """
+    with self._lock:
+      count, total, maximum = self._count, self._total, self._max
+    return {
+      'count': count,
+      'avg': total / count if count else 0.0,
+      'p50': self.percentile(50),
+      'p99': self.percentile(99),
+      'max': maximum,
+    }
+
+class Metrics(object):
+  def __init__(self):
+    self._lock       = threading.Lock()
+    self._counters   = {}
+    self._histograms = {}
+
+  def incr(self, name, n=1):
+    """ Adds n to the named counter. """
+    with self._lock:
+      self._counters[name] = self._counters.get(name, 0) + n
+
+  def observe(self, name, seconds):
+    """ Records a timing, in seconds, in the named histogram. """
+    histogram = self._histograms.get(name)
+    if histogram is None:
+      with self._lock:
+        histogram = self._histograms.setdefault(name, Histogram())
+    histogram.observe(seconds)
+
+  def counter(self, name):
+    """ Returns the value of the named counter. """
+    return self._counters.get(name, 0)
+
+  def histogram(self, name):
+    """ Returns the named Histogram, or None. """
+    return self._histograms.get(name)
+
+  def stats(self):
+    """
+    Returns a dict with the 'counters' (by name) and the stats of each of the
+    'histograms' (by name; see Histogram.stats()).
+    """
+    with self._lock:
+      counters   = dict(self._counters)
+      histograms = dict(self._histograms)
+    return {
+      'counters': counters,
+      'histograms': dict((name, h.stats()) for name, h in histograms.items()),
+    }
+
+class MetricsServer(object):
+  def __init__(self, stats, port, host='127.0.0.1'):
+    """
+    Serves the dict returned by stats() as JSON to any GET request, from a
+    thread of its own.
+
+    Args:
+      stats:  Function taking no arguments which returns the metrics to serve.
+
+      port:   Port to listen on.
+
+      host:   Address to listen on. Defaults to local connections only.
+    """
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        body = json.dumps(stats(), sort_keys=True, default=str).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, format, *args):
+        pass
+
+    self._server = ThreadingHTTPServer((host, port), Handler)
+    self._server.daemon_threads = True
+    self._thread = threading.Thread(target=self._server.serve_forever,
+                                    name='metrics-%s' % port, daemon=True)
+    self._thread.start()
+
+  def address(self):
+    """ Returns the (host, port) the server is listening on. """
+    return self._server.server_address
+
+  def stop(self):
+    self._server.shutdown()
+    self._server.server_close()
@@ -0,0 +1,192 @@
+"""
+Queue for messages on their way out to Slack. Messages are handed to a single
+sender thread so that a slow or rate-limited Web API call never holds up the bot
+that produced them. Each channel gets its own token bucket, matching Slack's
+limit of about one message per second per channel (with short bursts allowed),
+and a 'ratelimited' response pauses sending for as long as its Retry-After
+header asks.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import threading
+import time
+
+from collections import deque
+
+class Outbox(object):
+  def __init__(self, send, rate=1.0, burst=3, max_size=100, name='outbox'):
+    """
+    Args:
+      send:     A function taking a channel ID and a message, which posts the
+                message and returns the Web API's response (a dict).
+
+      rate:     Number of messages per second allowed in any one channel.
+
+      burst:    Number of messages that may be sent to a channel at once after
+                it has been quiet for a while.
+
+      max_size: Maximum number of messages waiting to be sent. Further messages
+                are dropped until there is room again.
+
+      name:     Name of the sender thread.
+    """
+    self._send     = send
+    self._rate     = float(rate)
+    self._burst    = float(burst)
+    self._max_size = max_size
+    self._name     = name
+
+    self._pending = {}
+    self._buckets = {}
+    self._size    = 0
+    self._paused_until = 0
+    self._cond    = threading.Condition()
+    self._thread  = None
+    self._run     = False
+
+    self._stats = {
+      'queued': 0,
+      'sent': 0,
+      'dropped': 0,
+      'retried': 0,
+      'failed': 0,
+      'latency_total': 0.0,
+      'latency_max': 0.0,
+    }
+
+  def __len__(self):
+    return self._size
+
+  def start(self):
+    """ Starts the sender thread. """
+    with self._cond:
+      if self._run:
+        return
+      self._run = True
+    self._thread = threading.Thread(target=self._loop, name=self._name, daemon=True)
+    self._thread.start()
+
+  def stop(self, timeout=None):
+    """
+    Stops the sender thread once it has finished its current message. Messages
+    still waiting are discarded.
+    """
+    with self._cond:
+      self._run = False
+      self._cond.notify()
+    if self._thread and timeout is not None:
+      self._thread.join(timeout)
+
+  def put(self, channel, msg):
+    """
+    Queues a message to be sent to the given channel ID. Returns False if the
+    queue is full and the message was dropped.
+    """
+    with self._cond:
+      if self._size >= self._max_size:
+        self._stats['dropped'] += 1
+        return False
+      self._pending.setdefault(channel, deque()).append((time.monotonic(), msg))
+      self._size += 1
+      self._stats['queued'] += 1
+      self._cond.notify()
+    return True
+
+  def stats(self):
+    """
+    Returns a dict of counters ('queued', 'sent', 'dropped', 'retried', 'failed'),
+    the current queue 'depth', and the average and maximum delivery latency in
+    seconds, measured from put() to a successful post.
+    """
+    with self._cond:
+      stats = dict(self._stats)
+      stats['depth'] = self._size
+    latency_total = stats.pop('latency_total')
+    stats['latency_avg'] = latency_total / stats['sent'] if stats['sent'] else 0.0
+    return stats
+
+  def _loop(self):
+    """ Main loop of the sender thread. """
+    while True:
+      with self._cond:
+        channel = None
+        while self._run:
+          channel, wait = self._next()
+          if channel and wait <= 0:
+            break
+          self._cond.wait(wait)
+        if not self._run:
+          return
+        queued, msg = self._pending[channel].popleft()
+        if not self._pending[channel]:
+          del self._pending[channel]
+        self._size -= 1
+        self._take(channel)
+
+      self._deliver(channel, queued, msg)
+
+  def _deliver(self, channel, queued, msg):
+    """ Sends one message, requeueing it if Slack asks to retry later. """
+    try:
+      result = self._send(channel, msg)
+    except Exception:
+      with self._cond:
+        self._stats['failed'] += 1
+      return
+
+    with self._cond:
+      if result.get('ok'):
+        latency = time.monotonic() - queued
+        self._stats['sent'] += 1
+        self._stats['latency_total'] += latency
+        self._stats['latency_max'] = max(self._stats['latency_max'], latency)
+      elif result.get('error') == 'ratelimited':
+        self._paused_until = time.monotonic() + Outbox.retry_after(result)
+        self._pending.setdefault(channel, deque()).appendleft((queued, msg))
+        self._size += 1
+        self._stats['retried'] += 1
+      else:
+        self._stats['failed'] += 1
+
+  def _next(self):
+    """
+    Returns the channel whose next message may be sent soonest, and the number of
+    seconds until then (None and None if nothing is waiting). Must be called with
+    self._cond held.
+    """
+    if not self._pending:
+      return None, None
+
+    now = time.monotonic()
+    best, best_wait = None, None
+    for channel in self._pending:
+      tokens, last = self._buckets.get(channel, (self._burst, now))
+      tokens = min(self._burst, tokens + (now - last) * self._rate)
+      wait = 0.0 if tokens >= 1 else (1 - tokens) / self._rate
+      if best_wait is None or wait < best_wait:
+        best, best_wait = channel, wait
+    return best, max(best_wait, self._paused_until - now)
+
+  def _take(self, channel):
+    """ Removes a token from a channel's bucket. Must be called with self._cond held. """
+    now = time.monotonic()
+    tokens, last = self._buckets.get(channel, (self._burst, now))
+    tokens = min(self._burst, tokens + (now - last) * self._rate)
+    self._buckets[channel] = (tokens - 1, now)
+
+  def retry_after(result):
+    """ Returns the number of seconds given by a response's Retry-After header. """
+    headers = dict((k.lower(), v) for k, v in result.get('headers', {}).items())
+    try:
+      return max(1, int(headers.get('retry-after', 1)))
+    except ValueError:
+      return 1
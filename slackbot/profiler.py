@@ -0,0 +1,123 @@
+"""
+Sampling profiler for a bot's threads. Every few milliseconds the stacks of the
+threads being profiled are looked at and counted; nothing is traced, so the bot
+runs at close to full speed while it is being profiled.
+
+Profiles are written in the "collapsed stack" format read by flamegraph.pl and
+speedscope, one line per distinct stack, from the thread down to the function
+that was running, followed by the number of times it was seen:
+
+  SquirtleBot-worker;_run_actions (slackbot.py:205);... 42
+
+Profiles measure wall-clock time: a thread waiting for the network or sleeping
+is counted the same as one which is busy.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import os
+import sys
+import threading
+import time
+
+class Profiler(object):
+  def __init__(self, threads, path, interval=0.01, dump_time=60):
+    """
+    Args:
+      threads:    Function taking no arguments which returns a dict of the IDs
+                  of the threads to sample and the names under which to count
+                  them. Called again every second, to pick up new threads.
+
+      path:       File to which the profile is written. Its directory is
+                  created if need be.
+
+      interval:   Seconds between samples.
+
+      dump_time:  Seconds between writes of the profile so far. The profile is
+                  also written when the Profiler is stopped.
+    """
+    self.path       = path
+    self._threads   = threads
+    self._interval  = interval
+    self._dump_time = dump_time
+    self._lock      = threading.Lock()
+    self._stopped   = threading.Event()
+    self._thread    = None
+    self._counts    = {}
+    self._labels    = {}
+    self.samples    = 0
+
+  def start(self):
+    self._thread = threading.Thread(target=self._loop, name='profiler', daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    """ Stops sampling and writes the profile. """
+    self._stopped.set()
+    if self._thread and self._thread is not threading.current_thread():
+      self._thread.join(1)
+    self.dump()
+
+  def running(self):
+    return self._thread is not None and not self._stopped.is_set()
+
+  def dump(self):
+    """ Writes the profile so far, replacing the file as a whole. """
+    with self._lock:
+      counts = sorted(self._counts.items(), key=lambda c: -c[1])
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    temp = self.path + '.tmp'
+    with open(temp, 'w') as f:
+      for stack, n in counts:
+        f.write('%s %d\n' % (';'.join(stack), n))
+    os.replace(temp, self.path)
+
+  def sample(self, threads):
+    """ Counts the current stack of each of the given threads ({ID: name}). """
+    frames = sys._current_frames()
+    with self._lock:
+      for ident, name in threads.items():
+        frame = frames.get(ident)
+        if frame is None:
+          continue
+        stack = []
+        while frame is not None:
+          stack.append(self._label(frame.f_code))
+          frame = frame.f_back
+        stack.append(name)
+        stack = tuple(reversed(stack))
+        self._counts[stack] = self._counts.get(stack, 0) + 1
+        self.samples += 1
+
+  def _label(self, code):
+    label = self._labels.get(code)
+    if label is None:
+      label = '%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename),
+                              code.co_firstlineno)
+      self._labels[code] = label.replace(';', ',')
+      label = self._labels[code]
+    return label
+
+  def _loop(self):
+    threads = {}
+    refreshed = dumped = time.monotonic()
+    while not self._stopped.wait(self._interval):
+      now = time.monotonic()
+      if not threads or now - refreshed >= 1:
+        threads = self._threads()
+        refreshed = now
+      self.sample(threads)
+      if now - dumped >= self._dump_time:
+        self.dump()
+        dumped = now
@@ -0,0 +1,175 @@
+"""
+Records the raw events read from a bot's RTM websocket, so that real traffic can
+be played back later, offline (see benchmarks/replay.py). Events are written as
+gzipped JSON lines, each holding the time at which the event was received:
+
+  {"t": 1508000000.123456, "event": {"type": "message", ...}}
+
+Events received in the same read share the same time. Every file starts with a
+line describing the bot which recorded it: {"t": ..., "bot": {"id": ..., ...}}
+
+When a file grows past its size limit it is rotated out the way logging's
+RotatingFileHandler does it: rtm.jsonl.gz becomes rtm.1.jsonl.gz, which becomes
+rtm.2.jsonl.gz and so on, up to the given number of backups. A file left by an
+earlier run is rotated out the same way when recording starts, so that every
+file is written by one Recorder and holds at most max_bytes.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import os
+import gzip
+import json
+import re
+import threading
+import time
+
+# Anything within <...> (mentions, channel links, URLs) is kept by redact().
+REDACT_RE = re.compile(r'<[^>]*>|[^\s<]+')
+
+class Recorder(object):
+  def __init__(self, path, bot=None, max_bytes=64*1024*1024, backups=5,
+               redact=False, flush_time=1.0):
+    """
+    Args:
+      path:       File to record to. Its directory is created if need be.
+
+      bot:        Optional dict describing the recording bot (e.g. its 'id',
+                  'name' and watched 'channels'), written at the start of
+                  every file.
+
+      max_bytes:  Size, before compression, after which the file is rotated.
+                  0 never rotates.
+
+      backups:    Number of rotated files to keep.
+
+      redact:     If True, the text of messages is blanked out (see redact()).
+
+      flush_time: Seconds between flushes of the compressed stream. Flushing
+                  more often loses less on a crash but compresses worse.
+    """
+    self.path        = path
+    self._bot        = bot
+    self._max_bytes  = max_bytes
+    self._backups    = backups
+    self._redact     = redact
+    self._flush_time = flush_time
+    self._lock       = threading.Lock()
+    self._file       = None
+    self._size       = 0
+    self._flushed    = 0.0
+    self._closed     = False
+    self.events      = 0
+
+  def record(self, events, t=None):
+    """ Appends a list of events, as returned by rtm_read(), received at time t. """
+    if not events:
+      return
+    t = time.time() if t is None else t
+    lines = []
+    for e in events:
+      if self._redact:
+        e = Recorder.redact(e)
+      lines.append(json.dumps({'t': t, 'event': e}, separators=(',', ':')))
+    data = '\n'.join(lines) + '\n'
+
+    with self._lock:
+      if self._closed:
+        return
+      if self._file is None:
+        self._open()
+      elif self._max_bytes and self._size + len(data) > self._max_bytes:
+        self._rotate()
+      self._file.write(data)
+      self._size += len(data)
+      self.events += len(events)
+      if t - self._flushed >= self._flush_time:
+        self._file.flush()
+        self._flushed = t
+
+  def close(self):
+    """ Closes the file; anything recorded afterwards is dropped. """
+    with self._lock:
+      self._closed = True
+      if self._file is not None:
+        self._file.close()
+        self._file = None
+
+  def rotated(self, i):
+    """ Returns the name of the i-th rotated file. """
+    base, ext = os.path.splitext(self.path)
+    if ext == '.gz':
+      base, inner = os.path.splitext(base)
+      ext = inner + ext
+    return '%s.%d%s' % (base, i, ext)
+
+  def _open(self):
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    if os.path.exists(self.path):
+      self._shift()
+    self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+    self._size = 0
+    if self._bot:
+      header = json.dumps({'t': time.time(), 'bot': self._bot}, separators=(',', ':'))
+      self._file.write(header + '\n')
+      self._size += len(header) + 1
+
+  def _rotate(self):
+    self._file.close()
+    self._open()
+
+  def _shift(self):
+    """ Moves the file (and its backups) out of the way; see rotated(). """
+    if self._backups > 0:
+      for i in range(self._backups - 1, 0, -1):
+        if os.path.exists(self.rotated(i)):
+          os.replace(self.rotated(i), self.rotated(i + 1))
+      os.replace(self.path, self.rotated(1))
+    else:
+      os.remove(self.path)
+
+  def redact(event):
+    """
+    Returns a copy of an event whose 'text' has every character outside of
+    <...> replaced with 'x'. Mentions, the shape of messages and their length
+    are kept; what was said is not.
+    """
+    if not isinstance(event.get('text'), str):
+      return event
+    event = dict(event)
+    event['text'] = REDACT_RE.sub(
+      lambda m: m.group(0) if m.group(0).startswith('<') else 'x' * len(m.group(0)),
+      event['text'])
+    return event
+
+  def read(path):
+    """
+    Returns the bot named in a recording (a dict, or None) and a list of its
+    (time, event) tuples. Plain JSON lines of events, gzipped or not, are read
+    as well; their times are None.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    bot = None
+    events = []
+    with opener(path, 'rt', encoding='utf-8') as f:
+      for line in f:
+        if not line.strip():
+          continue
+        record = json.loads(line)
+        if 'event' in record:
+          events.append((record.get('t'), record['event']))
+        elif 'bot' in record:
+          bot = bot or record['bot']
+        else:
+          events.append((None, record))
+    return bot, events
@@ -0,0 +1,70 @@
+"""
+Small least-recently-used cache for rendered responses. Actions whose output only
+depends on league data (e.g. this week's matchups) store their messages here,
+keyed by the action, its normalized arguments, and the version of the League
+snapshot and week they were rendered from, so that asking again before anything
+has changed costs a dictionary lookup.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import threading
+
+from collections import OrderedDict
+
+class ResponseCache(object):
+  def __init__(self, max_size=128):
+    """
+    Args:
+      max_size: Maximum number of responses kept. The least recently used ones
+                are dropped first.
+    """
+    self._max_size = max_size
+    self._entries  = OrderedDict()
+    self._lock     = threading.Lock()
+    self._hits     = 0
+    self._misses   = 0
+
+  def __len__(self):
+    return len(self._entries)
+
+  def get(self, key, render):
+    """
+    Returns the response cached under the given key. If there is none, calls
+    render() to produce it and caches the result.
+    """
+    with self._lock:
+      if key in self._entries:
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return self._entries[key]
+      self._misses += 1
+
+    response = render()
+    with self._lock:
+      self._entries[key] = response
+      self._entries.move_to_end(key)
+      while len(self._entries) > self._max_size:
+        self._entries.popitem(last=False)
+    return response
+
+  def clear(self, *args, **kwargs):
+    """
+    Drops every cached response. Accepts and ignores any arguments, so that it
+    can be used directly as a LeagueHandler install listener.
+    """
+    with self._lock:
+      self._entries.clear()
+
+  def stats(self):
+    """ Returns a dict with the number of 'hits', 'misses' and cached 'size'. """
+    with self._lock:
+      return {'hits': self._hits, 'misses': self._misses, 'size': len(self._entries)}
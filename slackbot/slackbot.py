@@ -24,21 +24,30 @@ __status__     = 'Development'
 
 import os
 import sys
+import asyncio
 import json
 import re
 import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from types import *
 
-from slackclient import SlackClient
-from textblob import TextBlob
-
 from .actionhandler import ActionHandler
-from .slackbotlib import SlackBotLib
+from .logwriter import BotLogger
+from .message import Message
+from .metrics import Metrics, MetricsServer
+from .outbox import Outbox
+from .profiler import Profiler
+from .recorder import Recorder
+from .workerpool import WorkerPool
+from .workspace import Workspace
 
 class SlackBot(threading.Thread):
+  # Values set when the bot is created rather than read from the config file.
+  RUNTIME = ('Logger', 'Root', 'Dat_dir', 'Profile')
+
   def __init__(self, name, config, debug=False):
     super(SlackBot, self).__init__()
     self._config = config
@@ -47,22 +56,48 @@ class SlackBot(threading.Thread):
     self._id   = None
     self._name = None
 
-    self.dbg  = self._config['Logger'].debug
-    self.info = self._config['Logger'].info
-    self.warn = self._config['Logger'].warn
-    self.err  = self._config['Logger'].error
-    self.crit = self._config['Logger'].critical
-
-    self._client = SlackClient(config['API Token'])
+    log = BotLogger(self._config['Logger'], name)
+    self.dbg  = log.debug
+    self.info = log.info
+    self.warn = log.warning
+    self.err  = log.error
+    self.crit = log.critical
+
+    self._client = Workspace.client(config['API Token'], base_url=config.get('API URL'))
+    self._workspace = Workspace.get(config['API Token'],
+                                    refresh_time=config.get('User Refresh Time'),
+                                    base_url=config.get('API URL'),
+                                    logger=config['Logger'])
+    self._users    = self._workspace.users
+    self._channels = self._workspace.channels
+    self._outbox = Outbox(self._send_msg, name='%s-outbox' % name)
+    self._workers = WorkerPool(workers=config.get('Action Workers', 4),
+                               name='%s-worker' % name,
+                               logger=config['Logger'])
 
     self._run       = True
     self._sleeptime = 1
     self._starttime = None
     self._stopped   = False
+    self._loop      = None
+    self._wakeup    = None
+    self._watched   = {}
+    self._metrics   = Metrics()
+    self.actions    = None
+    self._metrics_server = None
+    self._recorder  = None
+    self._profiler  = None
+    self._profile_lock = threading.Lock()
+    self._config_listeners = []
+    self._thread_id = None
+    self._last_read = None
 
     self.name(name)
-    self.id(self._user_id(self.name_lower()))
+    self.id(Workspace.auth(config['API Token'], base_url=config.get('API URL')).get('user_id'))
+    # Channel IDs written to the config file by an earlier run are watched
+    # right away; the rest are looked up once the channel lists arrive.
     self._init_channels()
+    self._startup()
 
     if self.DEBUG:
       self.info('Starting in DEBUG mode.')
@@ -77,107 +112,280 @@ class SlackBot(threading.Thread):
     The main loop for this Thread, executed upon Thread.start().
 
     Attempts a connection to the Slack team, and if successful, waits for activity
-    within that team's channels. All activity will be sent to parse_rtm() to be
-    boiled down to only regular text messages. Those messages will be passed to
+    within that team's channels. All activity will be sent to handle_events() to
+    be boiled down to only regular text messages. Those messages will be passed to
     handle_action() to have the appropriate methods called as and if defined by
     this bot's ActionHandler.
     """
 
     self._starttime = datetime.utcnow()
+    self._thread_id = threading.get_ident()
 
-    # Connect.
-    if self._client.rtm_connect():
-      connect_msg = '%s (%s): is connected.' % (self.name(), type(self).__name__)
-      self.info(connect_msg)
-      print(connect_msg)
-
-      self.set_actions()
-
+    if self.connect():
       # Respond to stuff where appropriate.
       while self._run == True:
         time.sleep(self._sleeptime)
-
-        output = self.parse_rtm(self._client.rtm_read())
-        for o in output:
-          if o['blob'] and o['channel']['name'] in self.channels().keys():
-            self.dbg('Activity in a channel that I\'m watching!')
-            activities = self.actions.parse_keywords(text=str(o['blob']))
-            if activities:
-              self.dbg('I\'m going to take some actions now.')
-              args = {
-                'text': str(o['blob']),
-                'channel': o['channel'],
-                'user': o['user'],
-              }
-              self.handle_actions(activities, **args)
+        self.handle_events(self._rtm_read())
 
     self.info('Exiting.')
     self._stopped = True
     sys.exit()
 
+  async def run_async(self):
+    """
+    Does the same as run(), but as a coroutine: rather than polling the RTM
+    websocket once every self._sleeptime seconds, waits on the event loop until
+    the websocket is readable and handles new activity right away. Any number of
+    bots may be run on the same event loop (see SlackBot.run_all()).
+    """
+    loop = asyncio.get_running_loop()
+    self._starttime = datetime.utcnow()
+    self._thread_id = threading.get_ident()
+
+    if await loop.run_in_executor(None, self.connect):
+      sock = self._client.server.websocket.sock
+      self._loop   = loop
+      self._wakeup = asyncio.Event()
+      loop.add_reader(sock, self._wakeup.set)
+      try:
+        while self._run == True:
+          await self._wakeup.wait()
+          self._wakeup.clear()
+
+          # A single readable notification may cover several frames, some of
+          # which may already be buffered by SSL, so read until nothing is left.
+          events = self._rtm_read()
+          while events and self._run == True:
+            self.handle_events(events)
+            events = self._rtm_read()
+      finally:
+        loop.remove_reader(sock)
+        self._wakeup = None
+
+    self.info('Exiting.')
+    self._stopped = True
+
+  async def run_all(bots):
+    """
+    Runs each of the given bots on the current event loop until all stop. A bot
+    which fails (e.g. its websocket is closed) is logged and stopped, as its
+    thread would end in run(); the others keep running.
+    """
+    async def run(bot):
+      try:
+        await bot.run_async()
+      except Exception as e:
+        bot.err('Stopping after an error: %r', e, exc_info=True)
+        bot.stop()
+        bot._stopped = True
+    await asyncio.gather(*[run(b) for b in bots])
+
+  def connect(self):
+    """
+    Connects to the Slack team's RTM websocket and sets up this bot's actions.
+    Returns True if the connection succeeded.
+    """
+    if not self._client.rtm_connect():
+      return False
+    if self._config.get('Profile'):
+      self.profile(True)
+
+    connect_msg = '%s (%s): is connected.' % (self.name(), type(self).__name__)
+    self.info(connect_msg)
+    print(connect_msg)
+
+    self.set_actions()
+    self._outbox.start()
+    if self._config.get('Metrics Port') and not self._metrics_server:
+      self._metrics_server = MetricsServer(self.stats, self._config['Metrics Port'])
+    if self._config.get('Record RTM') and not self._recorder:
+      self._recorder = self._make_recorder(self._config['Record RTM'])
+    return True
+
+  def handle_events(self, events):
+    """
+    Handles a list of events as returned by rtm_read(), passing the regular text
+    messages posted in watched channels on to handle_actions().
+    """
+    if self._workspace.handle_events(events):
+      self._init_channels()
+    start = time.perf_counter()
+    output = self.parse_rtm(events)
+    self._metrics.observe('parse_rtm', time.perf_counter() - start)
+    for o in output:
+      self.dbg('Activity in a channel that I\'m watching!')
+      self._metrics.incr('messages_seen')
+      start = time.perf_counter()
+      activities = self.actions.parse_keywords(text=o['message'].text)
+      self._metrics.observe('parse_keywords', time.perf_counter() - start)
+      if activities:
+        self.dbg('I\'m going to take some actions now.')
+        self._metrics.incr('messages_matched')
+        args = {
+          'text': o['message'].text,
+          'message': o['message'],
+          'channel': o['channel'],
+          'user': o['user'],
+        }
+        if not self._workers.submit(o['channel']['id'], self._run_actions, activities, args):
+          self._metrics.incr('actions_refused')
+          self.warn('Too many actions pending; ignored %r.', list(activities),
+                    extra={'channel': o['channel']['name'], 'action': ','.join(activities)})
+
+  def _run_actions(self, activities, args):
+    """
+    Runs handle_actions() on one of this bot's worker threads, logging rather than
+    raising any exception so that one failed action does not affect the others.
+    The user's name is only looked up if one of the Actions needs it.
+    """
+    try:
+      if self.actions.needs_user(activities):
+        self._resolve_user(args['user'])
+      self.handle_actions(activities, **args)
+    except Exception as e:
+      self.err('Action(s) %r failed: %r', list(activities), e,
+               extra={'channel': args['channel']['name'], 'action': ','.join(activities)})
+
   def handle_actions(self, activities, **kwargs):
     """
     Send the messages in activities to the ActionHandler instance for parsing
     and possible further actions.
     """
     for a in activities:
-      if a == 'uptime':
+      kwargs['action'] = a
+      kwargs['regex'] = activities[a]
+      if a in ('uptime', 'stats'):
         kwargs['uptime'] = self.uptime()
+      if a == 'stats':
+        kwargs['stats'] = self.stats()
+      if a == 'profile':
+        switch = re.search(r'profile (on|off)', kwargs.get('text', ''))
+        kwargs['profiler'] = self.profile(switch and switch.group(1) == 'on')
 
+      start = time.perf_counter()
       self.actions.exec_action(self.post_msg, **kwargs)
+      self._metrics.observe('exec_action', time.perf_counter() - start)
 
   def parse_rtm(self, output):
     """
     Shuffles through new activity within the Slack team's channels, returning
-    those activities which are regular text messages. The messages returned are
-    not necessarily ones which will be responded to by the bot. This method's
-    purpose is to simply screen out all activity that isn't just a normal
-    text message posted to a channel.
-
-    Returns:  A list of dicts, each containing a TextBlob of the message, the
-              channel in which it was sent, and the user who sent it.
-    """
-
-    results =[]
-
-    if output and len(output) > 0:
-      for o in output:
-        if o and 'text' in o and 'user' in o and not o['user'] == self.id() and not o['user'] == 'USLACKBOT':
-          new_result = {'blob': None,
-                        'channel': {'name': None, 'id': None},
-                        'user': {'name': None, 'id': None}}
-
-          new_result['blob']            = TextBlob(o['text'])
-          new_result['channel']['id']   = o.get('channel')
-          new_result['channel']['name'] = self._channel_name(new_result['channel']['id'])
-          new_result['user']['id']      = o.get('user')
-          user = self._user_name(new_result['user']['id'])
-          new_result['user']['name']       = user['name']
-          new_result['user']['first_name'] = user['first_name']
-          new_result['user']['last_name']  = user.get('last_name')
-          results.append(new_result)
+    those activities which are regular text messages posted to a channel that
+    this bot is watching. The messages returned are not necessarily ones which
+    will be responded to by the bot.
+
+    Everything else is screened out first, with checks that need neither the
+    Web API nor any processing of the text: the event's type, its sender (this
+    bot or Slackbot, or any other bot), and its channel ID. Only the messages
+    left over are wrapped in a Message. Their senders are resolved later, and
+    only if the message calls for an action that needs them (see _run_actions()).
+
+    Returns:  A list of dicts, each containing the Message, the channel in which
+              it was sent, and the user who sent it (by ID only).
+    """
+    results = []
+    if not output:
+      return results
+
+    watched = self._watched
+    for o in output:
+      if not o or o.get('type') != 'message' or 'bot_id' in o:
+        continue
+      user = o.get('user')
+      if not user or user == self._id or user == 'USLACKBOT':
+        continue
+      channel = o.get('channel')
+      if not channel in watched or not 'text' in o:
+        continue
+
+      results.append({
+        'message': Message(o['text']),
+        'channel': {'name': watched[channel], 'id': channel},
+        'user': {'name': None, 'id': user},
+      })
 
     return results
 
   def post_msg(self, **kwargs):
-    """ Sends a message to the given channel or user. """
+    """
+    Queues a message to be sent to the given channel or user. The message is
+    actually posted by this bot's Outbox (see _send_msg()).
+    """
     channel = kwargs.get('channel')['id']
     msg = kwargs.get('result')
 
     if channel and msg:
-      result = self._client.api_call(
-        'chat.postMessage',
-        channel=channel,
-        text=msg,
-        as_user=True)
-      if result['ok']:
-        self.dbg('Posted in %r:\n %r' % (self._channel_name(channel), msg))
-      else:
-        self.dbg('chat.postMessage returned %r' % result['ok'])
-        self.deb(result)
+      if not self._outbox.put(channel, msg):
+        self.warn('Outbox is full; dropped message for %r.', self._channel_name(channel),
+                  extra={'channel': self._channel_name(channel), 'action': kwargs.get('action')})
     else:
       self.info('Executed action, but no message posted.')
 
+  def outbox_stats(self):
+    """ Returns delivery statistics from this bot's Outbox. See Outbox.stats(). """
+    return self._outbox.stats()
+
+  def metrics(self):
+    """ Returns this bot's Metrics. """
+    return self._metrics
+
+  def stats(self):
+    """
+    Returns this bot's counters and timings (see Metrics.stats()), its 'uptime'
+    and its 'outbox' statistics. Subclasses may add statistics of their own.
+    """
+    stats = self._metrics.stats()
+    stats['uptime'] = self.uptime()
+    stats['outbox'] = self.outbox_stats()
+    return stats
+
+  def profile(self, on=None):
+    """
+    Starts (on=True) or stops (on=False) sampling this bot's threads, or toggles
+    sampling given None. Profiles are written to logs/<name>-profile.folded
+    every 'Profile Dump Time' seconds (default 60) and when sampling stops.
+    Returns the Profiler, whether it is running or not, or None.
+
+    Of bots run on one event loop (see run_all()), each profiles them all.
+    """
+    with self._profile_lock:
+      profiler = self._profiler
+      if on is None:
+        on = not (profiler and profiler.running())
+      if on and not (profiler and profiler.running()):
+        path = os.path.join(self._config.get('Root', ''), 'logs',
+                            '%s-profile.folded' % self.name())
+        profiler = Profiler(self._profile_threads, path,
+                            dump_time=self._config.get('Profile Dump Time', 60))
+        self._profiler = profiler.start()
+        self.info('Profiling to %s.', path)
+      elif not on and profiler and profiler.running():
+        profiler.stop()
+        self.info('Profiled %d samples to %s.', profiler.samples, profiler.path)
+      return profiler
+
+  def _profile_threads(self):
+    """
+    Returns the IDs and names of this bot's threads: the one reading events
+    (this one, or an event loop), its workers, its Outbox, and any fetching
+    Leagues in the background; that is, every thread named '<name>-...'.
+    """
+    prefix = '%s-' % self.name()
+    threads = {}
+    for t in threading.enumerate():
+      if t.name.startswith(prefix):
+        threads[t.ident] = t.name.rstrip('0123456789').rstrip('_')
+    if self._thread_id:
+      threads[self._thread_id] = self.name()
+    return threads
+
+  def startup_phases(self):
+    """
+    Returns a list of (name, function) tuples: the work to be done before this
+    bot can connect, which _startup() runs at the same time. No phase may wait
+    for another.
+    """
+    return [('directory', self._init_users), ('channels', self._resolve_channels)]
+
   def set_actions(self):
     """ Specifies which type of ActionHandler should be used by this bot. """
     self.actions = ActionHandler(self.name(), self.at())
@@ -201,6 +409,42 @@ class SlackBot(threading.Thread):
     """ Returns the dict of channels in which this bot is allowed to post. """
     return self._config['Channels']
 
+  def on_config_change(self, listener):
+    """
+    Registers a function to be called with this bot whenever what it would
+    return from config_file() changes, such as when it learns a channel's ID.
+    Listeners are called on whichever thread made the change.
+    """
+    self._config_listeners.append(listener)
+
+  def reload(self, config):
+    """
+    Applies a new configuration for this bot (as found in the configuration
+    file) without reconnecting. Its 'Channels' and 'User Refresh Time' take
+    effect right away; other values are kept, to be written back out by
+    config_file(), but only take effect when the bot is restarted. Values
+    missing from config are dropped, going back to their defaults.
+    """
+    old = dict(self._config)
+    for key in list(self._config):
+      if key not in config and key not in SlackBot.RUNTIME and key != 'Channels':
+        del self._config[key]
+    for key, value in config.items():
+      if key != 'Channels':
+        self._config[key] = value
+
+    channels = config.get('Channels')
+    if channels is not None and set(channels) != set(self.channels()):
+      self.info('Now watching %s.', ', '.join(sorted(channels)))
+      self._config['Channels'] = dict(
+        (name, self.channels().get(name) or id_str) for name, id_str in channels.items())
+      self._init_channels()
+
+    if self._config.get('User Refresh Time') != old.get('User Refresh Time'):
+      self._users.set_refresh_time(self._config.get('User Refresh Time'))
+
+    self._config_changed()
+
   def config_file(self, **kwargs):
     """
     Returns those configuration values that should be written out to file.
@@ -215,6 +459,10 @@ class SlackBot(threading.Thread):
     }
     for c in self.channels():
       config[self.name()]['Channels'][c] = self.channels()[c]
+    for key in ('Action Workers', 'API URL', 'Metrics Port', 'Profile Dump Time',
+                'Record RTM', 'User Refresh Time'):
+      if self._config.get(key):
+        config[self.name()][key] = self._config[key]
     config[self.name()].update(kwargs)
     return config
 
@@ -231,53 +479,192 @@ class SlackBot(threading.Thread):
   def stopped(self):
     return self._stopped
 
+  def last_read(self):
+    """
+    Returns the time.monotonic() time at which this bot last read from its RTM
+    websocket, or None if it has not yet.
+    """
+    return self._last_read
+
   def stop(self):
     self._run = False
+    self._workers.shutdown()
+    self._outbox.stop()
+    if self._metrics_server:
+      self._metrics_server.stop()
+      self._metrics_server = None
+    if self._recorder:
+      self._recorder.close()
+      self._recorder = None
+    self.profile(False)
+    wakeup = self._wakeup
+    if wakeup:
+      self._loop.call_soon_threadsafe(wakeup.set)
 
   def uptime(self):
     t = datetime.utcnow()
     delta = t - self._starttime
     return str(delta - timedelta(microseconds=delta.microseconds))
 
+  def _startup(self):
+    """
+    Runs the phases returned by startup_phases(), each on a thread of its own.
+    Records how long each one took ('startup_<phase>') and the whole startup
+    ('startup') in this bot's Metrics, and logs the breakdown. Raises the error
+    of the first phase that failed, if any.
+    """
+    timings = {}
+    def timed(phase, function):
+      start = time.perf_counter()
+      try:
+        function()
+      finally:
+        timings[phase] = time.perf_counter() - start
+        self._metrics.observe('startup_%s' % phase, timings[phase])
+
+    phases = self.startup_phases()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(phases),
+                            thread_name_prefix='%s-startup' % self.name()) as pool:
+      futures = [pool.submit(timed, phase, function) for phase, function in phases]
+    total = time.perf_counter() - start
+    self._metrics.observe('startup', total)
+    self.info('Startup took %.3fs (%s).', total,
+              ', '.join('%s %.3fs' % (phase, timings[phase]) for phase, f in phases))
+    for f in futures:
+      f.result()
+
+  def _init_users(self):
+    """
+    Downloads the team's users, then looks up this bot's ID by name if auth.test
+    did not give it.
+    """
+    self._workspace.load_users()
+    if self._id is None:
+      self.id(self._user_id(self.name_lower()))
+
+  def _resolve_channels(self):
+    """ Downloads the team's channels, then looks up this bot's channels in them. """
+    self._workspace.load_channels()
+    self._init_channels()
+
   def _init_channels(self):
     """
-    Retrieves channel IDs for any named channels which do not already have stored
-    channel IDs.
+    Looks up the IDs of this bot's channels in the team's ChannelDirectory,
+    letting any config listeners know if one has changed.
     """
-    self._config['Channels'] = SlackBotLib.init_channels(
-      client=self._client,
-      channels=self.channels())
+    channels = self.channels()
+    changed = False
+    for name in channels:
+      id_str = self._channels.id(name)
+      if id_str and channels[name] != id_str:
+        channels[name] = id_str
+        changed = True
+    self._watched = dict(
+      (id_str, name) for name, id_str in channels.items() if id_str)
+    if changed:
+      self._config_changed()
+
+  def _config_changed(self):
+    """ Calls each listener registered with on_config_change(). """
+    for listener in self._config_listeners:
+      try:
+        listener(self)
+      except Exception as e:
+        self.err('Config listener %r failed: %r', listener, e)
 
   def _channel_id(self, name):
     """
-    Wrapper for SlackBotLib.channel_id():
-    Returns the ID of the named channel.
+    Returns the ID of the named channel, or None.
+    This includes both public and private channels.
     """
-    return SlackBotLib.channel_id(
-      client=self._client,
-      channels=self.channels(),
-      name=name)
+    return self.channels().get(name) or self._channels.id(name)
 
   def _channel_name(self, id_str):
     """
-    Wrapper for SlackBotLib.channel_name():
-    Returns the name of the channel associated with the given ID.
+    Returns the name of the channel associated with the given ID, or None.
+    This includes both public and private channels.
+    """
+    return self._watched.get(id_str) or self._channels.name(id_str)
+
+  def _rtm_read(self):
+    """ Reads new events from the RTM websocket, timing the read. """
+    start = time.perf_counter()
+    try:
+      events = self._client.rtm_read()
+    except BlockingIOError:
+      # Only the SSL socket to Slack itself reports "no data yet" quietly; a
+      # plain ws:// socket (see 'API URL') raises instead.
+      events = []
+    self._metrics.observe('rtm_read', time.perf_counter() - start)
+    self._last_read = time.monotonic()
+    if events:
+      self._metrics.incr('events', len(events))
+      recorder = self._recorder
+      if recorder:
+        recorder.record(events)
+    return events
+
+  def _make_recorder(self, options):
+    """
+    Returns a Recorder for this bot's RTM events, as configured by 'Record RTM':
+    either True, or a dict with any of 'File' (relative to 'Root'; defaults to
+    logs/<name>-rtm.jsonl.gz), 'Max MB', 'Backups' and 'Redact'.
+    """
+    if not isinstance(options, dict):
+      options = {}
+    path = options.get('File') or os.path.join('logs', '%s-rtm.jsonl.gz' % self.name())
+    path = os.path.join(self._config.get('Root', ''), path)
+    self.info('Recording RTM events to %s.', path)
+    return Recorder(path,
+                    bot={'id': self._id, 'name': self.name(),
+                         'channels': sorted(self._watched)},
+                    max_bytes=int(options.get('Max MB', 64) * 1024 * 1024),
+                    backups=options.get('Backups', 5),
+                    redact=options.get('Redact', False))
+
+  def _send_msg(self, channel, msg):
+    """
+    Posts a message to the given channel ID. Called by this bot's Outbox; returns
+    the response from chat.postMessage.
+    """
+    start = time.perf_counter()
+    result = self._client.api_call(
+      'chat.postMessage',
+      channel=channel,
+      text=msg,
+      as_user=True)
+    self._metrics.observe('post_msg', time.perf_counter() - start)
+    if result['ok']:
+      self._metrics.incr('messages_posted')
+      self.dbg('Posted in %r:\n %r', self._channel_name(channel), msg,
+               extra={'channel': self._channel_name(channel)})
+    else:
+      self.dbg('chat.postMessage returned %r', result,
+               extra={'channel': self._channel_name(channel)})
+    return result
+
+  def _resolve_user(self, user):
+    """
+    Fills in the name, first_name and last_name of a user dict as returned by
+    parse_rtm(), which only holds the user's ID.
     """
-    return SlackBotLib.channel_name(
-      client=self._client,
-      channels=self.channels(),
-      id_str=id_str)
+    record = self._user_name(user['id'])
+    user['name']       = record.get('name')
+    user['first_name'] = record.get('first_name')
+    user['last_name']  = record.get('last_name')
+    return user
 
   def _user_id(self, name):
     """
-    Wrapper for SlackBotLib.user_id():
-    Returns the ID of the named channel.
+    Looks up the named user in this bot's UserDirectory:
+    Returns the ID of the named user.
     """
-    return SlackBotLib.user_id(self._client, name)
+    return self._users.id(name)
 
   def _user_name(self, id_str):
     """
-    Wrapper for SlackBotLib.user_name():
-    Returns the name of the channel associated with the given ID.
+    Looks up the given user ID in this bot's UserDirectory:
+    Returns the user's record (name, first_name, last_name, ...).
     """
-    return SlackBotLib.user_name(self._client, id_str)
+    return self._users.user(id_str)
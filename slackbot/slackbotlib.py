@@ -12,6 +12,8 @@ __credits__    = ['Matthew Sheridan']
 __version__    = '0.1'
 __status__     = 'Development'
 
+from .table import Table
+
 class SlackBotLib:
   def at_user(id_str):
     """ Returns the @Name representation of a bot or user. """
@@ -38,26 +40,10 @@ class SlackBotLib:
 
   def format_matchup(name1, name2, score1, score2):
     """ Returns two nicely-formatted lines string of a matchup's scores. """
-    line1_left = '%s ' % name1
-    line2_left = '%s ' % name2
-    line1_right = '%s' % score1
-    line2_right = '%s' % score2
-
-    while(len(line1_left) != len(line2_left)):
-      if len(line1_left) < len(line2_left):
-        line1_left = '%s ' % line1_left
-      else:
-        line2_left = '%s ' % line2_left
-
-    while(len(line1_right) != len(line2_right)):
-      if len(line1_right) < len(line2_right):
-        line1_right = ' %s' % line1_right
-      else:
-        line2_right = ' %s' % line2_right
-
-    line1 = '%s%s' % (line1_left, line1_right)
-    line2 = '%s%s' % (line2_left, line2_right)
-
+    table = Table(align='lr', sep=' ')
+    table.add_row(name1, score1)
+    table.add_row(name2, score2)
+    line1, line2 = table.lines()
     return line1, line2
 
   def channel_id(client, channels, name):
@@ -22,34 +22,16 @@ from .leaguehandler import LeagueHandler
 
 class SquirtleBot(SlackBot):
   def __init__(self, name, config, debug=False):
+    # Set by the 'league' startup phase, which runs in SlackBot.__init__().
+    self.league = None
     super(SquirtleBot, self).__init__(name=name, config=config, debug=debug)
     self._refreshtime = 30
-    self._init_channels()
 
     if self.DEBUG:
       self.info('Starting in DEBUG mode.')
     else:
       self.info('Starting.')
 
-  def run(self):
-    """
-    Overrides SlackBot.run()
-
-    Retrieves the fantasy league's current year, then executes the parent class's
-    run() method.
-    """
-    self.league = LeagueHandler(lid=self._config['League ID'],
-                                year=self._config['League Year'],
-                                espn_s2=self._config['League Auth Cookies']['espn_s2'],
-                                swid=self._config['League Auth Cookies']['SWID'])
-    settings = self.league.get().settings
-    if settings:
-      league_msg = '%s: League: %r (%s)' % (self.name(), settings.name, settings.year)
-      self.info(league_msg)
-      print(league_msg)
-
-    super(SquirtleBot, self).run()
-
   def handle_actions(self, activities, **kwargs):
     """
     Overrides SlackBot.handle_actions()
@@ -61,28 +43,61 @@ class SquirtleBot(SlackBot):
       kwargs['action'] = a
       kwargs['regex'] = activities[a]
 
-      if a == 'matchup':
-        kwargs['teams'] = self.league.get().teams
-        kwargs['players'] = self.league.get().players
-        kwargs['week'] = self.league.current_week()
-
-      if a == 'matchups_all':
-        kwargs['teams'] = self.league.get().teams
+      if a in ('matchup', 'matchups_all', 'standings'):
+        kwargs['league'] = self.league.index()
         kwargs['week'] = self.league.current_week()
 
       if a == 'tell':
-        kwargs['teams'] = self.league.get().teams
-        kwargs['teams_prev'] = self.league.get(self._config['League Year']-1).teams
+        kwargs['league'] = self.league.index()
+        kwargs['league_prev'] = self.league.index(self._config['League Year']-1)
 
     super(SquirtleBot, self).handle_actions(activities, **kwargs)
 
+  def stats(self):
+    """
+    Overrides SlackBot.stats()
+
+    Adds the hit and miss counts of the rendered-response cache ('responses').
+    """
+    stats = super(SquirtleBot, self).stats()
+    if self.actions:
+      stats['responses'] = self.actions.responses.stats()
+    return stats
+
+  def startup_phases(self):
+    """
+    Overrides SlackBot.startup_phases()
+
+    Also retrieves the fantasy league's current year ('league'), starting from
+    its snapshot if there is one, while the team's users and channels download.
+    """
+    return super(SquirtleBot, self).startup_phases() + [('league', self._init_league)]
+
   def set_actions(self):
     """
     Overrides SlackBot.set_actions()
 
     Specifies which type of ActionHandler should be used by this bot.
     """
-    self.actions = SquirtleActionHandler(self.name(), self.at(), cheeky=True)
+    self.actions = SquirtleActionHandler(self.name(), self.at(),
+                                         cheeky=self._config.get('Cheeky', True))
+    # Cached responses are only good until the next League is installed.
+    self.league.on_install(self.actions.responses.clear)
+
+  def reload(self, config):
+    """
+    Overrides SlackBot.reload()
+
+    Also applies 'Cheeky' and 'League Refresh Time' right away.
+    """
+    cheeky = self._config.get('Cheeky', True)
+    refresh_time = self._config.get('League Refresh Time')
+    super(SquirtleBot, self).reload(config)
+
+    if self.actions and self._config.get('Cheeky', True) != cheeky:
+      self.actions.cheeky(self._config.get('Cheeky', True))
+    if self.league and self._config.get('League Refresh Time') != refresh_time:
+      self.league.set_refresh_time(self._config.get('League Refresh Time'))
 
   def config_file(self, **kwargs):
     """
@@ -99,5 +114,27 @@ class SquirtleBot(SlackBot):
       'League ID': self._config['League ID'],
       'League Year': self._config['League Year']
     }
+    for key in ('Cheeky', 'League Refresh Time'):
+      if key in self._config:
+        config[key] = self._config[key]
     config.update(kwargs)
     return super(SquirtleBot, self).config_file(**config)
+
+  def _init_league(self):
+    """ Creates this bot's LeagueHandler and fetches the current League. """
+    self.league = LeagueHandler(lid=self._config['League ID'],
+                                year=self._config['League Year'],
+                                espn_s2=self._config['League Auth Cookies']['espn_s2'],
+                                swid=self._config['League Auth Cookies']['SWID'],
+                                refresh_time=self._config.get('League Refresh Time'),
+                                logger=self._config['Logger'],
+                                snapshot_dir=os.path.join(self._config['Root'],
+                                                          self._config['Dat_dir'],
+                                                          'leagues'),
+                                metrics=self._metrics,
+                                name='%s-league' % self.name())
+    settings = self.league.get().settings
+    if settings:
+      league_msg = '%s: League: %r (%s)' % (self.name(), settings.name, settings.year)
+      self.info(league_msg)
+      print(league_msg)
@@ -0,0 +1,108 @@
+"""
+Overall standings of a League. The records of the weeks already played are added
+up once and kept as a base; the current week is then counted on top of it as if
+the season ended now. When a newer snapshot of the League only differs in the
+current week's scores, as it does for most of the week, the base is reused and
+only the current week is counted again.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+from collections import namedtuple
+
+Record = namedtuple('Record', ['team', 'wins', 'losses', 'ties', 'points_for', 'points_against'])
+
+class Standings(object):
+  def __init__(self, league, week, base=None):
+    """
+    Args:
+      league: An espnff.League.
+
+      week:   The current week's number. Weeks before it are counted as played.
+
+      base:   Optional (completed, records) tuple of an earlier Standings with
+              the same week, as passed on by update(); leave this alone.
+    """
+    self.week = week
+    if base is None:
+      base = Standings._count_completed(league, week)
+    self._completed, self._base = base
+
+    records = dict((team_id, list(r)) for team_id, r in self._base.items())
+    for t in league.teams:
+      records.setdefault(t.team_id, [0, 0, 0, 0.0, 0.0])
+      if len(t.schedule) < week:
+        continue
+      score, against = t.scores[week-1], t.schedule[week-1].scores[week-1]
+      if score or against:
+        Standings._count(records[t.team_id], score, against)
+
+    self.rows = sorted(
+      [Record(t, *records[t.team_id]) for t in league.teams],
+      key=Standings._rank_key)
+
+  def __len__(self):
+    return len(self.rows)
+
+  def update(self, league, week):
+    """
+    Returns the Standings of a newer snapshot of the League. Unless the week has
+    changed, or a score of a week already played has been corrected since, the
+    played weeks are not counted again.
+    """
+    if week != self.week:
+      return Standings(league, week)
+    for t in league.teams:
+      if tuple(t.scores[:week-1]) != self._completed.get(t.team_id):
+        return Standings(league, week)
+    return Standings(league, week, base=(self._completed, self._base))
+
+  def record(self, team):
+    """ Returns the Record of the given team, or None. """
+    for r in self.rows:
+      if r.team.team_id == team.team_id:
+        return r
+    return None
+
+  def _count(record, score, against):
+    """ Adds a single game to a [wins, losses, ties, for, against] list. """
+    if score > against:
+      record[0] += 1
+    elif score < against:
+      record[1] += 1
+    else:
+      record[2] += 1
+    record[3] += score
+    record[4] += against
+
+  def _count_completed(league, week):
+    """
+    Returns the scores of the weeks before the given one, as a dict of tuples by
+    team ID, and the records they add up to, as a dict of tuples by team ID.
+    """
+    completed = {}
+    records   = {}
+    for t in league.teams:
+      completed[t.team_id] = tuple(t.scores[:week-1])
+      record = [0, 0, 0, 0.0, 0.0]
+      for w, opponent in enumerate(t.schedule[:week-1]):
+        Standings._count(record, t.scores[w], opponent.scores[w])
+      records[t.team_id] = tuple(record)
+    return completed, records
+
+  def _rank_key(r):
+    """
+    Orders records by winning percentage, then points for, then fewest points
+    against, then team name.
+    """
+    games = r.wins + r.losses + r.ties
+    pct = (r.wins + 0.5 * r.ties) / games if games else 0.0
+    return (-pct, -r.points_for, r.points_against, r.team.team_name)
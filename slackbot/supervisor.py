@@ -0,0 +1,295 @@
+"""
+Runs each bot in a process of its own, so that bots do not compete with each
+other for the GIL. The supervising process watches over them: a bot process that
+dies, or whose bot stops reading from its websocket, is restarted, waiting a
+little longer after each failure in a row. On shutdown, every bot is asked to stop and to send back
+its config_file() values, so that the configuration can be written to file as
+usual.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import signal
+import sys
+import threading
+import time
+import multiprocessing
+
+def _bot_process(name, config, make_bot, get_logger, conn, heartbeat):
+  """
+  Main function of a bot process. Creates and starts the bot, then reports to
+  the supervisor every heartbeat seconds until the bot stops or the supervisor
+  asks it to. Sends the bot's config_file() values back whenever they change,
+  and before exiting. Applies new configurations sent by Supervisor.reload().
+
+  Each heartbeat carries the number of seconds since the bot last read from its
+  RTM websocket (see SlackBot.last_read()), or None if it has yet to connect,
+  so that a bot whose read loop is stuck is seen to be unhealthy.
+  """
+  # Interrupts are meant for the supervisor, which stops its bots in turn.
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  if hasattr(signal, 'SIGHUP'):
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+  # The bot reports changes from its own threads.
+  lock = threading.Lock()
+  def send(message):
+    with lock:
+      conn.send(message)
+
+  config = dict(config)
+  config['Logger'] = get_logger().getChild(name)
+  bot = make_bot(name, config)
+  bot.on_config_change(lambda b: send(('config', b.config_file())))
+  bot.start()
+  send(('config', bot.config_file()))
+
+  stop_requested = False
+  beat = time.monotonic()
+  while bot.is_alive():
+    if conn.poll(heartbeat):
+      message = conn.recv()
+      if message == 'stop':
+        stop_requested = True
+        break
+      if message[0] == 'reload':
+        bot.reload(message[1])
+    if time.monotonic() - beat >= heartbeat:
+      last_read = bot.last_read()
+      send(('heartbeat', None if last_read is None else time.monotonic() - last_read))
+      beat = time.monotonic()
+
+  bot.stop()
+  bot.join(5)
+  send(('config', bot.config_file()))
+  conn.close()
+  # Bots only end when told to; one which ended by itself (e.g. because it
+  # could not connect) has failed, and is restarted.
+  sys.exit(0 if stop_requested else 1)
+
+class Supervisor(object):
+  def __init__(self, config, make_bot, get_logger, logger=None, heartbeat=5,
+               startup=60, max_backoff=300, on_config=None, load_config=None):
+    """
+    Args:
+      config:     Dict of bot configurations by bot name, as loaded from the
+                  configuration file (without a 'Logger').
+
+      make_bot:   Function taking a bot's name and configuration which creates
+                  the bot. Called in the bot's own process; it (and get_logger)
+                  must be defined at module level so that it can be pickled.
+
+      get_logger: Function taking no arguments which returns the logger whose
+                  children the bots should log to.
+
+      logger:     Optional logger for the supervisor itself.
+
+      heartbeat:  Seconds between a bot process's heartbeats. A bot process
+                  whose bot has not read from its websocket (or which has not
+                  sent a heartbeat saying so) for three times this long is
+                  restarted.
+
+      startup:    Seconds a new bot process is given to create its bot (which
+                  involves the Web API) and connect before it must start
+                  reading from its websocket.
+
+      max_backoff:  Maximum number of seconds to wait before restarting a bot
+                    process which keeps failing.
+
+      on_config:  Optional function called with the bots' configuration values
+                  (see config_file()) whenever a bot process reports a change.
+
+      load_config:  Optional function taking no arguments which returns a new
+                    configuration (like config), or None, for reload().
+    """
+    self._config      = config
+    self._make_bot    = make_bot
+    self._get_logger  = get_logger
+    self._logger      = logger
+    self._heartbeat   = heartbeat
+    self._startup     = startup
+    self._max_backoff = max_backoff
+    self._on_config   = on_config
+    self._load_config = load_config
+    self._bots = {}
+    self._run  = True
+    self._reload = False
+
+  def run(self):
+    """
+    Starts every bot and watches over them until they have all stopped on their
+    own, or the program is interrupted. Returns the bots' configuration values
+    so that they can be written to file.
+    """
+    for name in self._config:
+      self._bots[name] = {
+        'process': None,
+        'conn': None,
+        'config': {name: self._config[name]},
+        'failures': 0,
+        'started': None,
+        'restart_at': 0,
+        'seen': None,
+        'done': False,
+      }
+      self._start(name)
+
+    try:
+      while self._run and not all(b['done'] for b in self._bots.values()):
+        time.sleep(1)
+        if self._reload:
+          self._reload = False
+          config = self._load_config() if self._load_config else None
+          if config:
+            self._apply(config)
+        for name in self._bots:
+          self._check(name)
+    except KeyboardInterrupt:
+      print('Stopping all bots.')
+    finally:
+      self.stop()
+
+    return self.config_file()
+
+  def config_file(self):
+    """ Returns the configuration values last reported by each bot. """
+    config_all = {}
+    for b in self._bots.values():
+      config_all.update(b['config'])
+    return config_all
+
+  def reload(self):
+    """
+    Sends each running bot its part of the configuration returned by
+    load_config (see SlackBot.reload()), which is also used when restarting it.
+    Safe to call from a signal handler: the configuration is loaded and sent
+    from run()'s loop.
+    """
+    self._reload = True
+
+  def stop(self, timeout=10):
+    """
+    Asks every bot process to stop, waiting up to timeout seconds for them to
+    send back their configuration values. Processes that do not exit in time are
+    terminated.
+    """
+    self._run = False
+    for name, b in self._bots.items():
+      if b['process'] and b['process'].is_alive():
+        try:
+          b['conn'].send('stop')
+        except (BrokenPipeError, OSError):
+          pass
+
+    deadline = time.monotonic() + timeout
+    for name, b in self._bots.items():
+      if not b['process']:
+        continue
+      while b['process'].is_alive() and time.monotonic() < deadline:
+        self._receive(name, timeout=0.1)
+      self._receive(name)
+      if b['process'].is_alive():
+        self._log('warning', '%s: did not stop in time; terminating.', name)
+        b['process'].terminate()
+      b['process'].join(1)
+      b['done'] = True
+
+  def _check(self, name):
+    """ Handles a bot's messages, and restarts its process if it has failed. """
+    b = self._bots[name]
+    if b['done']:
+      return
+    if b['process'] is None:
+      if time.monotonic() >= b['restart_at']:
+        self._start(name)
+      return
+
+    self._receive(name)
+    process = b['process']
+    if process.is_alive():
+      if b['seen'] is None:
+        healthy = time.monotonic() - b['started'] < self._startup
+      else:
+        healthy = time.monotonic() - b['seen'] < 3 * self._heartbeat
+      if healthy:
+        return
+      self._log('warning', '%s: not reading from its websocket; restarting.', name)
+      process.terminate()
+      process.join(1)
+    elif process.exitcode == 0:
+      self._receive(name)
+      self._log('info', '%s: stopped.', name)
+      b['done'] = True
+      return
+    else:
+      self._log('warning', '%s: exited with %r; restarting.', name, process.exitcode)
+
+    # A bot which ran fine for a while before failing starts over with a short
+    # wait; one which keeps failing waits longer each time.
+    if time.monotonic() - b['started'] > self._max_backoff:
+      b['failures'] = 0
+    b['failures'] += 1
+    backoff = min(self._max_backoff, 2 ** (b['failures'] - 1))
+    b['process'] = None
+    b['restart_at'] = time.monotonic() + backoff
+
+  def _receive(self, name, timeout=0):
+    """ Handles whatever a bot process has sent since last time. """
+    b = self._bots[name]
+    try:
+      while b['conn'].poll(timeout):
+        kind, value = b['conn'].recv()
+        if kind == 'heartbeat' and value is not None:
+          b['seen'] = time.monotonic() - value
+        if kind == 'config' and value != b['config']:
+          b['config'] = value
+          if self._on_config:
+            self._on_config(self.config_file())
+        timeout = 0
+    except (EOFError, OSError):
+      pass
+
+  def _apply(self, config):
+    """ Does the work of reload(). """
+    for name in config:
+      if not name in self._bots:
+        self._log('warning', '%s: not running; restart to add it.', name)
+        continue
+      self._config[name] = config[name]
+      b = self._bots[name]
+      if b['process'] and b['process'].is_alive():
+        try:
+          b['conn'].send(('reload', config[name]))
+        except (BrokenPipeError, OSError):
+          pass
+      else:
+        b['config'] = {name: config[name]}
+
+  def _start(self, name):
+    """ Starts a new process for the named bot. """
+    b = self._bots[name]
+    parent_conn, child_conn = multiprocessing.Pipe()
+    b['conn'] = parent_conn
+    b['process'] = multiprocessing.Process(
+      target=_bot_process,
+      name=name,
+      args=(name, self._config[name], self._make_bot, self._get_logger,
+            child_conn, self._heartbeat),
+      daemon=True)
+    b['process'].start()
+    child_conn.close()
+    b['started'] = time.monotonic()
+    b['seen'] = None
+    self._log('info', '%s: started process %r.', name, b['process'].pid)
+
+  def _log(self, level, msg, *args):
+    if self._logger:
+      getattr(self._logger, level)(msg, *args)
@@ -0,0 +1,95 @@
+"""
+Renders rows of cells as aligned, monospaced text for posting inside a Slack code
+block. Column widths are kept up to date as rows are added, so rendering is a
+single pass over the cells. Widths are measured as displayed, so that wide (e.g.
+CJK) characters and combining marks do not throw off the alignment.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import unicodedata
+
+class Table(object):
+  def __init__(self, align=None, sep='  '):
+    """
+    Args:
+      align:  Optional string with one character per column: 'l' to align the
+              column's cells to the left, 'r' to align them to the right. Columns
+              without one are aligned to the left.
+
+      sep:    String placed between columns.
+    """
+    self._align  = align or ''
+    self._sep    = sep
+    self._rows   = []
+    self._widths = []
+
+  def __len__(self):
+    return len(self._rows)
+
+  def add_row(self, *cells):
+    """ Adds a row. Cells may be anything; they are rendered with str(). """
+    row = []
+    for i, cell in enumerate(cells):
+      text = '%s' % cell
+      width = Table.display_width(text)
+      row.append((text, width))
+      if i == len(self._widths):
+        self._widths.append(width)
+      elif width > self._widths[i]:
+        self._widths[i] = width
+    self._rows.append(row)
+
+  def add_break(self):
+    """ Adds an empty line, e.g. to separate groups of rows. """
+    self._rows.append(None)
+
+  def lines(self):
+    """ Returns the rendered rows as a list of strings. """
+    lines = []
+    for row in self._rows:
+      if row is None:
+        lines.append('')
+        continue
+      cells = []
+      for i, (text, width) in enumerate(row):
+        padding = ' ' * (self._widths[i] - width)
+        if i < len(self._align) and self._align[i] == 'r':
+          cells.append(padding + text)
+        elif i == len(row) - 1:
+          cells.append(text)
+        else:
+          cells.append(text + padding)
+      lines.append(self._sep.join(cells))
+    return lines
+
+  def render(self):
+    """ Returns the rendered rows as a single string. """
+    return '\n'.join(self.lines())
+
+  def code_block(self):
+    """ Returns the rendered rows wrapped in a Slack code block. """
+    return '```%s```' % self.render()
+
+  def display_width(text):
+    """
+    Returns the number of columns the given text takes up in a monospaced font:
+    wide and full-width characters count twice, combining marks and other
+    zero-width characters not at all.
+    """
+    if text.isascii():
+      return len(text)
+    width = 0
+    for c in text:
+      if unicodedata.category(c) in ('Mn', 'Me', 'Cf'):
+        continue
+      width += 2 if unicodedata.east_asian_width(c) in ('W', 'F') else 1
+    return width
@@ -0,0 +1,176 @@
+"""
+Keeps an in-memory copy of a Slack team's user list. The list is downloaded once
+(in pages) and afterwards kept current by the team_join and user_change events
+arriving over RTM, so that looking up a user by ID or by name does not cost an
+API call.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import threading
+
+from datetime import datetime, timedelta
+
+class UserDirectory(object):
+  def __init__(self, client, refresh_time=None, page_size=200, logger=None):
+    """
+    Args:
+      client:       A SlackClient used to download the user list.
+
+      refresh_time: Optional number of minutes after which the whole user list
+                    should be downloaded again. Events keep the directory up to
+                    date in the meantime, so this is only a safety net. If not
+                    given, the list is only downloaded once.
+
+      page_size:    Number of users requested per users.list call.
+
+      logger:       Optional logger to report failed background downloads to.
+    """
+    self._client       = client
+    self._refresh_time = refresh_time
+    self._page_size    = page_size
+    self._logger       = logger
+
+    self._by_id    = {}
+    self._by_name  = {}
+    self._fetched  = None
+    self._loading  = False
+    self._lock     = threading.Lock()
+
+  def __contains__(self, id_str):
+    return id_str in self._by_id
+
+  def set_refresh_time(self, minutes):
+    """
+    Sets the refresh_time (see __init__()). None or 0 turns refreshing off.
+    Returns the new refresh_time.
+    """
+    self._refresh_time = minutes or None
+    return self._refresh_time
+
+  def __len__(self):
+    return len(self._by_id)
+
+  def load(self):
+    """
+    Downloads the full user list, following users.list's pagination cursor, and
+    replaces the current contents of the directory with it.
+    """
+    by_id   = {}
+    by_name = {}
+    cursor  = None
+
+    while True:
+      args = {'limit': self._page_size}
+      if cursor:
+        args['cursor'] = cursor
+      api_call = self._client.api_call('users.list', **args)
+      if not api_call.get('ok'):
+        raise Exception(api_call.get('error'))
+
+      for u in api_call.get('members', []):
+        record = UserDirectory.record(u)
+        by_id[record['id']] = record
+        by_name[record['name'].lower()] = record
+
+      cursor = api_call.get('response_metadata', {}).get('next_cursor')
+      if not cursor:
+        break
+
+    with self._lock:
+      self._by_id   = by_id
+      self._by_name = by_name
+      self._fetched = datetime.now()
+
+  def handle_events(self, events):
+    """
+    Applies any team_join or user_change events found in a list of RTM events
+    (as returned by SlackClient.rtm_read()).
+    """
+    for e in events:
+      if e and e.get('type') in ('team_join', 'user_change') and 'user' in e:
+        self.add(e['user'])
+
+  def add(self, user):
+    """ Adds or replaces a user given in the format used by the Slack API. """
+    record = UserDirectory.record(user)
+    with self._lock:
+      old = self._by_id.get(record['id'])
+      if old and self._by_name.get(old['name'].lower()) is old:
+        del self._by_name[old['name'].lower()]
+      self._by_id[record['id']] = record
+      self._by_name[record['name'].lower()] = record
+    return record
+
+  def id(self, name):
+    """ Returns the ID associated with the given user name, or None. """
+    self._check_refresh()
+    record = self._by_name.get(name.lower())
+    if record:
+      return record['id']
+    return None
+
+  def user(self, id_str):
+    """
+    Returns the record of the user with the given ID: a dict with the keys 'id',
+    'name', 'first_name', 'last_name' and 'real_name'. A user who is not yet in
+    the directory is fetched on its own with users.info. Returns an empty dict if
+    no such user exists.
+    """
+    self._check_refresh()
+    record = self._by_id.get(id_str)
+    if record is None:
+      api_call = self._client.api_call('users.info', user=id_str)
+      if not api_call.get('ok'):
+        return {}
+      record = self.add(api_call['user'])
+    return record
+
+  def _check_refresh(self):
+    """
+    Starts a full download of the user list in the background if refresh_time
+    has passed since the last one. Lookups keep using the current contents until
+    the new list is ready. A failed download is logged, and not tried again
+    until another refresh_time has passed.
+    """
+    if not self._refresh_time or not self._fetched or self._loading:
+      return
+    if datetime.now() < self._fetched + timedelta(minutes=self._refresh_time):
+      return
+
+    with self._lock:
+      if self._loading:
+        return
+      self._loading = True
+
+    def refresh():
+      try:
+        self.load()
+      except Exception as e:
+        if self._logger:
+          self._logger.warning('Keeping stale user list: %r', e)
+        with self._lock:
+          self._fetched = datetime.now()
+      finally:
+        self._loading = False
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+  def record(user):
+    """ Reduces a user from the Slack API to the fields used by SlackBots. """
+    profile = user.get('profile', {})
+    return {
+      'id': user['id'],
+      'name': user.get('name', ''),
+      'first_name': profile.get('first_name'),
+      'last_name': profile.get('last_name'),
+      'real_name': profile.get('real_name', user.get('real_name')),
+    }
@@ -0,0 +1,117 @@
+"""
+Bounded pool of threads for running a bot's actions away from its read loop.
+Tasks are submitted under a key (a channel ID): tasks with different keys run
+concurrently, while tasks with the same key run one at a time in the order in
+which they were submitted, so that replies within a channel stay in order.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import threading
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class WorkerPool(object):
+  def __init__(self, workers=4, max_pending=100, name='workers', logger=None):
+    """
+    Args:
+      workers:      Maximum number of tasks run at the same time.
+
+      max_pending:  Maximum number of tasks submitted but not yet finished.
+                    Further tasks are refused until there is room again.
+
+      name:         Prefix for the names of the pool's threads.
+
+      logger:       Optional logger to report tasks discarded at shutdown to.
+    """
+    self._executor    = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+    self._max_pending = max_pending
+    self._lock    = threading.Lock()
+    self._queues  = {}
+    self._pending = 0
+    self._logger  = logger
+
+  def __len__(self):
+    return self._pending
+
+  def submit(self, key, function, *args, **kwargs):
+    """
+    Schedules function(*args, **kwargs) to be run after every task previously
+    submitted with the same key. Returns False if the pool is full and the task
+    was refused.
+    """
+    task = (function, args, kwargs)
+    with self._lock:
+      if self._pending >= self._max_pending:
+        return False
+      self._pending += 1
+      if key in self._queues:
+        self._queues[key].append(task)
+        return True
+      self._queues[key] = deque()
+
+    try:
+      self._executor.submit(self._run, key, task)
+    except RuntimeError:
+      # The pool has been shut down.
+      with self._lock:
+        self._pending -= 1
+        self._discard(key)
+      return False
+    return True
+
+  def shutdown(self, wait=False):
+    """ Stops the pool. Tasks which have not started yet are discarded. """
+    with self._lock:
+      for key in self._queues:
+        self._pending -= len(self._queues[key])
+        self._queues[key].clear()
+    self._executor.shutdown(wait=wait)
+
+  def _run(self, key, task):
+    """
+    Runs one task, then hands the next task with the same key (if any) back to
+    the executor, so that a busy key does not keep a thread to itself.
+    """
+    function, args, kwargs = task
+    try:
+      function(*args, **kwargs)
+    finally:
+      with self._lock:
+        self._pending -= 1
+        queue = self._queues[key]
+        if queue:
+          task = queue.popleft()
+        else:
+          del self._queues[key]
+          task = None
+      if task:
+        try:
+          self._executor.submit(self._run, key, task)
+        except RuntimeError:
+          # The pool has been shut down.
+          with self._lock:
+            self._pending -= 1
+            self._discard(key)
+
+  def _discard(self, key):
+    """
+    Drops the queue of the given key once no task of it can be handed to the
+    executor any more, including tasks queued by other threads meanwhile. Must
+    be called with self._lock held.
+    """
+    queue = self._queues.pop(key, None)
+    if queue:
+      self._pending -= len(queue)
+      if self._logger:
+        self._logger.warning('Discarded %d task(s) queued for %r after shutdown.',
+                             len(queue), key)
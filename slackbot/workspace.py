@@ -0,0 +1,181 @@
+"""
+Process-wide registry of the Slack teams that bots are connected to. Bots in the
+same team share a single user directory and channel directory, which are
+downloaded once for the team rather than once per bot. Bots with the same token
+share a single keep-alive HTTP session for their Web API calls.
+
+Web API calls normally go to slack.com, but can be sent to another base URL
+instead, such as that of the stand-in server in benchmarks/slackserver.py.
+"""
+
+__author__     = 'Matthew Sheridan'
+__copyright__  = 'Copyright 2017, Matthew Sheridan'
+__license__    = 'Beer-Ware License Rev. 42'
+__maintainer__ = 'Matthew Sheridan'
+__email__      = 'segfaultmagnet@gmail.com'
+__website__    = 'https://github.com/segfaultmagnet/squirtlebot'
+__credits__    = ['Matthew Sheridan']
+__version__    = '0.1'
+__status__     = 'Development'
+
+import threading
+import requests
+
+from slackclient import SlackClient
+from slackclient.slackrequest import SlackRequest
+
+from .channeldirectory import ChannelDirectory
+from .userdirectory import UserDirectory
+
+class PooledSlackRequest(SlackRequest):
+  """
+  SlackRequest which sends every Web API call through one requests.Session, so
+  that connections to Slack are kept alive and reused rather than opened anew
+  for every call.
+
+  Args:
+    proxies:  Proxies passed on to requests.
+
+    base_url: Optional URL to which '/api/<method>' is appended in place of
+              'https://slack.com'.
+  """
+  def __init__(self, proxies=None, base_url=None):
+    super(PooledSlackRequest, self).__init__(proxies=proxies)
+    self.session = requests.Session()
+    self.base_url = base_url.rstrip('/') if base_url else None
+
+  def post_http_request(self, token, api_method, post_data,
+                        files=None, timeout=None, domain='slack.com'):
+    if post_data is not None and 'token' in post_data:
+      token = post_data['token']
+
+    headers = {
+      'user-agent': self.get_user_agent(),
+      'Authorization': 'Bearer {}'.format(token)
+    }
+    if self.base_url:
+      url = '{0}/api/{1}'.format(self.base_url, api_method)
+    else:
+      url = 'https://{0}/api/{1}'.format(domain, api_method)
+    return self.session.post(
+      url,
+      headers=headers,
+      data=post_data,
+      files=files,
+      timeout=timeout,
+      proxies=self.proxies)
+
+class Workspace(object):
+  _lock       = threading.Lock()
+  _requesters = {}
+  _auth       = {}
+  _teams      = {}
+
+  def __init__(self, client, team_id, refresh_time=None, logger=None):
+    """
+    Use Workspace.get() rather than creating Workspaces directly.
+
+    Args:
+      client:       A SlackClient used to download the directories.
+
+      team_id:      ID of the Slack team.
+
+      refresh_time: Optional number of minutes after which the user list should
+                    be downloaded again. See: UserDirectory
+
+      logger:       Optional logger for the directories' background work.
+    """
+    self.team_id  = team_id
+    self.users    = UserDirectory(client, refresh_time=refresh_time, logger=logger)
+    self.channels = ChannelDirectory(client)
+    self._loaded  = {'users': False, 'channels': False}
+    self._locks   = {'users': threading.Lock(), 'channels': threading.Lock()}
+
+  def __repr__(self):
+    return str('Workspace(team_id=%r)' % self.team_id)
+
+  def load(self):
+    """ Downloads the team's users and channels (see load_users()). """
+    self.load_users()
+    self.load_channels()
+
+  def load_users(self):
+    """
+    Downloads the team's users, unless that has been done already. Bots starting
+    up at the same time wait for a single download.
+    """
+    self._load('users', self.users)
+
+  def load_channels(self):
+    """ Same as load_users(), but for the team's channels. """
+    self._load('channels', self.channels)
+
+  def _load(self, part, directory):
+    with self._locks[part]:
+      if not self._loaded[part]:
+        directory.load()
+        self._loaded[part] = True
+
+  def handle_events(self, events):
+    """
+    Applies user and channel events to the directories. Returns the number of
+    channels added or renamed.
+    """
+    self.users.handle_events(events)
+    return self.channels.handle_events(events)
+
+  def client(token, base_url=None):
+    """
+    Returns a new SlackClient for the given token. Its Web API calls go through
+    the HTTP session shared by all clients with this token and base URL (see
+    PooledSlackRequest). Each bot still gets a client of its own, as the client
+    also holds the bot's RTM connection.
+    """
+    client = SlackClient(token)
+    server = getattr(client, 'server', None)
+    if server is not None:
+      with Workspace._lock:
+        requester = Workspace._requesters.get((token, base_url))
+        if requester is None:
+          requester = PooledSlackRequest(proxies=getattr(server, 'proxies', None),
+                                         base_url=base_url)
+          Workspace._requesters[(token, base_url)] = requester
+      server.api_requester = requester
+    return client
+
+  def get(token, refresh_time=None, base_url=None, logger=None):
+    """
+    Returns the Workspace of the team to which the given token belongs, creating
+    it if this is the first token of that team. The directories are not loaded
+    until load() is called.
+    """
+    auth = Workspace.auth(token, base_url=base_url)
+    team_id = (base_url, auth.get('team_id') or token)
+    client = Workspace.client(token, base_url=base_url)
+    with Workspace._lock:
+      workspace = Workspace._teams.get(team_id)
+      if workspace is None:
+        workspace = Workspace(client, team_id[1], refresh_time=refresh_time, logger=logger)
+        Workspace._teams[team_id] = workspace
+    return workspace
+
+  def auth(token, base_url=None):
+    """
+    Returns the response of auth.test for the given token, which names the team
+    and user it belongs to. Only asked once per token.
+    """
+    with Workspace._lock:
+      auth = Workspace._auth.get((token, base_url))
+    if auth is None:
+      auth = Workspace.client(token, base_url=base_url).api_call('auth.test')
+      if auth.get('ok'):
+        with Workspace._lock:
+          Workspace._auth[(token, base_url)] = auth
+    return auth
+
+  def clear():
+    """ Forgets every Workspace, session and token. """
+    with Workspace._lock:
+      Workspace._requesters.clear()
+      Workspace._auth.clear()
+      Workspace._teams.clear()
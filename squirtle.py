@@ -1,16 +1,23 @@
 #!/usr/bin/env python3
 """Usage:
-  squirtle.py [-d] <config>
+  squirtle.py [-d] [-j] [-a | -p] [--profile] <config>
   squirtle.py -h | --help
   squirtle.py -v | --version
 
 Arguments:
-  config        A JSON file containing configuration options.
+  config          A JSON file containing configuration options. It is written
+                  whenever the bots' settings change; send SIGHUP to apply
+                  changes made to it to the running bots.
 
 Options:
-  -d --debug    Change logging level to DEBUG.
-  -h --help     Show this help message.
-  -v --version  Display program version number.
+  -a --async      Run all bots on one asyncio event loop instead of one thread each.
+  -d --debug      Change logging level to DEBUG.
+  -j --json       Write the log as JSON lines.
+  -p --processes  Run each bot in its own process, restarting it if it fails.
+  --profile       Sample each bot's threads, writing profiles to logs/ every
+                  minute and on exit. Bots may also be told "profile on/off".
+  -h --help       Show this help message.
+  -v --version    Display program version number.
 """
 
 __author__     = 'Matthew Sheridan'
@@ -25,14 +32,27 @@ __status__     = 'Development'
 
 import os
 import sys
-import json
+import asyncio
+import functools
 import logging
 import re
+import signal
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
 from docopt import docopt
 
-from slackbot import SlackBot, SquirtleBot
+from slackbot import ConfigFile, JsonFormatter, LogWriter, RotatingLogHandler, SlackBot, SquirtleBot
+from slackbot.supervisor import Supervisor
+
+# The log is rotated once it reaches LOG_MAX_BYTES or is LOG_INTERVAL seconds
+# old, whichever comes first, keeping LOG_BACKUPS old logs.
+LOG_MAX_BYTES = 10*1024*1024
+LOG_INTERVAL  = 24*60*60
+LOG_BACKUPS   = 7
+
+_log_writer = None
 
 def _assert_config(config):
   """
@@ -44,37 +64,129 @@ def _assert_config(config):
     assert config[b]['League ID'] != 12345, "Change \'League ID\' from default: %r" % config[b]['League ID']
     assert config[b]['League Year'] != 12345, "Change \'League Year\' from default: %r" % config[b]['League Year']
 
-def _get_logger(level):
+def _get_logger(level, json_logs=False, shared=False):
   """
-  Returns a new instance of a logger with the given logging level
-  (e.g. DEBUG, INFO, WARN, ...).
+  Returns the logger with the given logging level (e.g. DEBUG, INFO, WARN, ...).
+  Its records are written to logs/ by a LogWriter, started on the first call;
+  if shared, bot processes forked from this one may log to it as well, and get
+  their logger by calling this function again.
   """
+  global _log_writer
   logger = logging.getLogger(str(__name__))
   logger.setLevel(level)
-  handler = logging.FileHandler(
-    os.path.relpath(
-      'logs/' + os.path.basename(__file__).split('.')[0] + '.log'))
-  handler.setFormatter(
-    logging.Formatter(
-      fmt='%(asctime)s %(module)s: %(funcName)s(%(lineno)s) %(levelname)s: %(message)s',
-      datefmt='%Y/%m/%d %H:%M:%S'))
-  logger.addHandler(handler)
+  if _log_writer is None:
+    handler = RotatingLogHandler(
+      os.path.relpath('logs/' + os.path.basename(__file__).split('.')[0] + '.log'),
+      max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, interval=LOG_INTERVAL)
+    if json_logs:
+      handler.setFormatter(JsonFormatter(datefmt='%Y/%m/%d %H:%M:%S'))
+    else:
+      handler.setFormatter(
+        logging.Formatter(
+          fmt='%(asctime)s %(module)s: %(funcName)s(%(lineno)s) %(levelname)s: %(message)s',
+          datefmt='%Y/%m/%d %H:%M:%S'))
+    _log_writer = LogWriter(handler, shared=shared).start()
+  logger.handlers = [_log_writer.handler()]
 
   return logger
 
-def _main(bots, logger):
+def _make_bot(name, botconfig, debug=False, profile=False):
+  """
+  Creates the bot described by the given configuration. botconfig['Logger']
+  must already be set.
+  """
+  botconfig['Dat_dir'] = 'dat'
+  botconfig['Root']    = os.path.abspath(os.path.dirname(__file__))
+  botconfig['Profile'] = profile
+  return globals()[botconfig['Type']](name, botconfig, debug=debug)
+
+def _make_bots(config, logger, level, debug=False, profile=False):
+  """
+  Creates the bots described by the given configuration, all at the same time:
+  each one spends its startup waiting on Slack and ESPN (see
+  SlackBot.startup_phases()). A bot which fails to start up is logged and left
+  out, so that the others still run. Returns the list of bots created.
+  """
+  def make(name):
+    try:
+      return _make_bot(name, config[name], debug=debug, profile=profile)
+    except Exception as e:
+      logger.error('%s: could not start: %r', name, e, exc_info=True)
+      print('%s: could not start: %r' % (name, e))
+      return None
+
+  for name in config:
+    config[name]['Logger'] = logger.getChild(name)
+    config[name]['Logger'].setLevel(level)
+  with ThreadPoolExecutor(max_workers=max(1, len(config))) as pool:
+    bots = list(pool.map(make, config))
+  return [b for b in bots if b is not None]
+
+def _read_config(config_file, logger):
+  """
+  Returns the configuration in the given ConfigFile, or None (logging why) if
+  it cannot be read or still holds placeholder values.
+  """
+  try:
+    config = config_file.read()
+    _assert_config(config)
+    return config
+  except (OSError, ValueError, KeyError, AssertionError) as e:
+    logger.error('Not loading %s: %r', config_file.path, e)
+    return None
+
+def _persist(bots, config_file, logger, kept=None):
+  """
+  Returns a listener for SlackBot.on_config_change() which writes every bot's
+  configuration values to the given ConfigFile (if they have changed), along
+  with the kept configurations of bots which are not running.
+  """
+  def persist(bot=None):
+    config_all = dict(kept or {})
+    for b in bots:
+      config_all.update(b.config_file())
+    try:
+      config_file.write(config_all)
+    except OSError as e:
+      logger.error('Could not write %s: %r', config_file.path, e)
+  return persist
+
+def _reload(bots, config_file, logger):
+  """
+  Reloads the configuration file and applies it to the running bots (see
+  SlackBot.reload()). Bots that are not running are not started.
+  """
+  config = _read_config(config_file, logger)
+  if config is None:
+    return
+  running = dict((b.name(), b) for b in bots)
+  for name in config:
+    if name in running:
+      running[name].reload(config[name])
+    else:
+      logger.warning('%s: not running; restart to add it.', name)
+  logger.info('Reloaded %s.', config_file.path)
+
+def _main(bots, logger, config_file):
   """
   Main loop. Starts all bots and waits for them to either exit on their own or
-  stops them when the program is interrupted. Returns those bots' configuration
-  values so that they can be written to file.
+  stops them when the program is interrupted. Reloads the configuration file on
+  SIGHUP. Returns those bots' configuration values so that they can be written
+  to file.
   """
   config_all = {}
+  hangup = threading.Event()
+  if hasattr(signal, 'SIGHUP'):
+    signal.signal(signal.SIGHUP, lambda signum, frame: hangup.set())
   for b in bots:
     b.start()
 
   try:
     while True:
       time.sleep(1)
+      if hangup.is_set():
+        hangup.clear()
+        _reload(bots, config_file, logger)
       cont = False
       for b in bots:
         if b.stopped() == False:
@@ -92,6 +204,56 @@ def _main(bots, logger):
 
   return config_all
 
+async def _run_async(bots, logger, config_file):
+  """ Runs all bots on the current event loop, reloading on SIGHUP. """
+  if hasattr(signal, 'SIGHUP'):
+    asyncio.get_running_loop().add_signal_handler(
+      signal.SIGHUP, _reload, bots, config_file, logger)
+  await SlackBot.run_all(bots)
+
+def _main_async(bots, logger, config_file):
+  """
+  Does the same as _main(), but runs all bots as coroutines on a single event
+  loop rather than as threads.
+  """
+  config_all = {}
+
+  try:
+    asyncio.run(_run_async(bots, logger, config_file))
+  except KeyboardInterrupt as k:
+    print('Stopping all bots.')
+  finally:
+    for b in bots:
+      config_all.update(b.config_file())
+      b.stop()
+    print('Done.')
+
+  return config_all
+
+def _main_processes(config, level, logger, config_file, debug=False, profile=False):
+  """
+  Does the same as _main(), but runs each bot in its own process under a
+  Supervisor, which restarts bot processes that fail.
+  """
+  def persist(config_all):
+    try:
+      config_file.write(config_all)
+    except OSError as e:
+      logger.error('Could not write %s: %r', config_file.path, e)
+
+  supervisor = Supervisor(
+    config,
+    make_bot=functools.partial(_make_bot, debug=debug, profile=profile),
+    get_logger=functools.partial(_get_logger, level),
+    logger=logger,
+    on_config=persist,
+    load_config=functools.partial(_read_config, config_file, logger))
+  if hasattr(signal, 'SIGHUP'):
+    signal.signal(signal.SIGHUP, lambda signum, frame: supervisor.reload())
+  config_all = supervisor.run()
+  print('Done.')
+  return config_all
+
 def __init__(args):
   """
   Loads a user-specified configuration file containing information on the bot(s)
@@ -104,33 +266,48 @@ def __init__(args):
   assert os.path.isfile(args['<config>']), "Configuration file %r not found." % repr(args['<config>'])
   DEBUG = args['--debug']
 
-  # Load configuration file.
-  config = None
-  with open(os.path.relpath(args['<config>'], start=root), 'r') as file:
-    config = json.load(file)
-  _assert_config(config)
-
   # Create new logger.
   level = logging.INFO
   if DEBUG:
     level = logging.DEBUG
-  logger = _get_logger(level)
+  logger = _get_logger(level, json_logs=args['--json'], shared=args['--processes'])
 
-  # Create new bots.
-  bots = []
-  for b in config:
-    name = b
-    botconfig = config[b]
-    botconfig['Dat_dir'] = 'dat'
-    botconfig['Logger']  = logger.getChild(name)
-    botconfig['Logger'].setLevel(level)
-    botconfig['Root']    = root
-    bots.append(globals()[botconfig['Type']](name, botconfig, debug=DEBUG))
-
-  # Send bots to _main() to be started. Write their configurations to file upon exit.
-  config_all = _main(bots, logger)
-  with open(os.path.relpath(args['<config>'], start=root), 'w') as file:
-    json.dump(config_all, file, sort_keys=True, indent=2)
+  # Load configuration file.
+  config_file = ConfigFile(os.path.relpath(args['<config>'], start=root), logger=logger)
+  config = config_file.read()
+  _assert_config(config)
+
+  # Bot processes create their own bots.
+  if args['--processes']:
+    config_all = _main_processes(config, level, logger, config_file,
+                                 debug=DEBUG, profile=args['--profile'])
+
+  else:
+    # Create new bots.
+    bots = _make_bots(config, logger, level, debug=DEBUG, profile=args['--profile'])
+
+    # Bots which could not start keep their configurations as they were.
+    started = set(b.name() for b in bots)
+    kept = dict(
+      (name, dict((k, v) for k, v in config[name].items() if not k in SlackBot.RUNTIME))
+      for name in config if not name in started)
+
+    # Write the bots' configurations to file whenever they change, starting with
+    # the channel IDs they have just looked up.
+    persist = _persist(bots, config_file, logger, kept)
+    for b in bots:
+      b.on_config_change(persist)
+    persist()
+
+    # Send bots to _main() to be started. Write their configurations to file upon exit.
+    config_all = dict(kept)
+    if args['--async']:
+      config_all.update(_main_async(bots, logger, config_file))
+    else:
+      config_all.update(_main(bots, logger, config_file))
+
+  config_file.write(config_all)
+  _log_writer.stop()
 
 if __name__ == '__main__':
   __init__(docopt(__doc__, help=True, version=__version__))
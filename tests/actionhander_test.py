@@ -4,7 +4,7 @@ import re
 sys.path.append('..')
 
 from nose.tools import with_setup
-from slackbot.actionhandler import ActionHandler
+from slackbot.actionhandler import Action, ActionHandler, SquirtleActionHandler, action
 
 """
 def setup():
@@ -28,3 +28,51 @@ def parse_and_exec_test():
   for k in parsed:
     assert k == 'about:author'
 """
+
+def test_registered_actions_dispatch():
+  ah = ActionHandler(name='test_case', at='<@ABC123>')
+  result = ah.exec_action(action='about:author')
+  assert len(result) == 1 and 'author of this bot' in result[0]
+  assert ah.exec_action(action='nonexistent') == []
+
+def test_update_places_new_actions_first():
+  ah = ActionHandler(name='test_case', at='<@ABC123>')
+  first  = Action(name='help', function=lambda **kwargs: 'first')
+  second = Action(name='help', function=lambda **kwargs: 'second')
+  ah.update(actions=[first], keywords=[])
+  ah.update(actions=[second, first], keywords=[])
+  result = ah.exec_action(action='help')
+  assert result[:2] == ['second', 'first']
+  assert len(result) == 3
+
+def test_decorated_actions_in_groups():
+  class Handler(ActionHandler):
+    @action('shout', group='loud')
+    def _action_shout(self, **kwargs):
+      return 'HEY'
+
+  ah = Handler(name='test_case', at='<@ABC123>')
+  assert ah.exec_action(action='shout') == []
+  ah.update(actions=ah.registered_actions('loud'), keywords=[])
+  assert ah.exec_action(action='shout') == ['HEY']
+
+def test_needs_user():
+  ah = SquirtleActionHandler(name='test_case', at='<@ABC123>')
+  assert ah.needs_user(['matchup'])
+  assert ah.needs_user(['standings', 'tell'])
+  assert not ah.needs_user(['standings', 'matchups_all', 'help'])
+  assert not ah.needs_user(['nonexistent'])
+
+def test_cheeky_toggle():
+  ah = SquirtleActionHandler(name='test_case', at='<@ABC123>', cheeky=False)
+  assert ah.exec_action(action='brady') == []
+  assert 'brady' not in (ah.parse_keywords(text='tom brady') or {})
+
+  ah.cheeky(True)
+  assert ah.exec_action(action='brady') == ['Tom Brady has deflated balls.']
+  assert 'brady' in ah.parse_keywords(text='tom brady')
+
+  ah.cheeky(False)
+  assert ah.exec_action(action='brady') == []
+  assert 'brady' not in (ah.parse_keywords(text='tom brady') or {})
+  assert ah.exec_action(action='about:author')
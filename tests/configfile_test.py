@@ -0,0 +1,73 @@
+import os
+import sys
+
+sys.path.append('..')
+
+from slackbot.configfile import ConfigFile
+
+class Logger(object):
+  def __init__(self):
+    self.warnings = []
+
+  def warning(self, msg, *args):
+    self.warnings.append(msg % args)
+
+def test_write_replaces_file(tmpdir):
+  path = str(tmpdir.join('config.json'))
+  with open(path, 'w') as f:
+    f.write('{"Bot": {"Type": "SlackBot"}}')
+  c = ConfigFile(path)
+  assert c.read() == {'Bot': {'Type': 'SlackBot'}}
+
+  inode = os.stat(path).st_ino
+  assert c.write({'Bot': {'Type': 'SlackBot', 'Channels': {'general': 'C1'}}})
+  assert os.stat(path).st_ino != inode
+  assert ConfigFile(path).read() == {'Bot': {'Type': 'SlackBot', 'Channels': {'general': 'C1'}}}
+  # No temporary files are left behind.
+  assert tmpdir.listdir() == [tmpdir.join('config.json')]
+
+def test_write_skips_unchanged_config(tmpdir):
+  path = str(tmpdir.join('config.json'))
+  with open(path, 'w') as f:
+    f.write('{"Bot": {"Type": "SlackBot"}}')
+  c = ConfigFile(path)
+  config = c.read()
+  assert not c.write(config)
+  assert c.writes == 0
+  with open(path) as f:
+    assert f.read() == '{"Bot": {"Type": "SlackBot"}}'
+
+  config['Bot']['Cheeky'] = False
+  assert c.write(config)
+  assert not c.write(config)
+  assert c.writes == 1
+
+def test_write_keeps_mode(tmpdir):
+  path = str(tmpdir.join('config.json'))
+  with open(path, 'w') as f:
+    f.write('{}')
+  os.chmod(path, 0o600)
+  c = ConfigFile(path)
+  c.read()
+  assert c.write({'Bot': {}})
+  assert os.stat(path).st_mode & 0o777 == 0o600
+
+def test_write_skips_file_changed_on_disk(tmpdir):
+  path = str(tmpdir.join('config.json'))
+  with open(path, 'w') as f:
+    f.write('{"Bot": {"Type": "SlackBot"}}')
+  logger = Logger()
+  c = ConfigFile(path, logger=logger)
+  c.read()
+
+  with open(path, 'w') as f:
+    f.write('{"Bot": {"Type": "SquirtleBot"}}')
+  assert not c.write({'Bot': {'Type': 'SlackBot', 'Cheeky': False}})
+  assert len(logger.warnings) == 1
+  with open(path) as f:
+    assert f.read() == '{"Bot": {"Type": "SquirtleBot"}}'
+
+  # Once read again, the file is written as usual.
+  c.read()
+  assert c.write({'Bot': {'Type': 'SquirtleBot', 'Cheeky': False}})
+  assert ConfigFile(path).read() == {'Bot': {'Type': 'SquirtleBot', 'Cheeky': False}}
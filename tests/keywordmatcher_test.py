@@ -0,0 +1,63 @@
+import sys
+import re
+
+sys.path.append('..')
+
+from slackbot.actionhandler import Keyword, KeywordMatcher, SquirtleActionHandler
+
+AT = '<@U0BOT>'
+
+def naive(keywords, text):
+  execute = {}
+  for k in keywords:
+    if (k.re_match and k.regex.match(text))        \
+      or (not k.re_match and k.regex.search(text)):
+        execute[k.name] = k.regex
+  return execute
+
+TEXTS = [
+  '',
+  'hello there',
+  'GO JETS, brady is a bum',
+  'j-e-t-s fumble',
+  AT + ' show my matchup',
+  AT + ' show Albert\'s matchup',
+  AT + ' show all matchups',
+  AT + ' uptime',
+  AT + ' help',
+  'SquirtleBot help',
+  AT + ' TELL ME about albert\'s team',
+  'who is ' + AT + '?',
+  'who is segfaultmagnet? genooo',
+  'say ' + AT + ' show my matchup',
+  '<@U0BOTX> show my matchup',
+]
+
+def test_squirtle_keywords_match_naive():
+  ah = SquirtleActionHandler('SquirtleBot', AT, cheeky=True)
+  for text in TEXTS:
+    assert ah._matcher.match(text) == naive(ah._keywords, text), text
+
+def test_uncombinable_keywords_match_naive():
+  keywords = [
+    Keyword(name='double', regex=re.compile(r'(\w+) \1')),
+    Keyword(name='named', regex=re.compile(r'(?P<word>yes)')),
+    Keyword(name='ascii', regex=re.compile(r'\w+', flags=re.A)),
+    Keyword(name='inline', regex=re.compile(r'(?i)JETS')),
+    Keyword(name='verbose', regex=re.compile(AT + r' a \s b # comment', flags=re.X), re_match=True),
+    Keyword(name='either', regex=re.compile(AT + ' x|y'), re_match=True),
+  ]
+  matcher = KeywordMatcher(keywords)
+  for text in ['go go jets', 'yes', AT + 'a b', 'y', AT + ' x', '']:
+    assert matcher.match(text) == naive(keywords, text), text
+
+def test_literal_keywords_match_naive():
+  keywords = [
+    Keyword(name='brady', regex=re.compile('brady', flags=re.I)),
+    Keyword(name='case', regex=re.compile('Brady')),
+    Keyword(name='unsafe', regex=re.compile('sacks', flags=re.I)),
+    Keyword(name='escaped', regex=re.compile(r'3\.5 ppg')),
+  ]
+  matcher = KeywordMatcher(keywords)
+  for text in ['BRADY', 'Brady', 'SACKſ', 'ſacks', '3.5 ppg', '335 ppg', '']:
+    assert matcher.match(text) == naive(keywords, text), text
@@ -0,0 +1,194 @@
+import os
+import sys
+import gzip
+import json
+import threading
+
+from datetime import datetime, timedelta
+
+sys.path.append('..')
+
+import slackbot.leaguehandler as leaguehandler
+
+from slackbot.leaguehandler import LeagueHandler
+from leagueindex_test import league as sample_league
+
+class League(object):
+  def __init__(self):
+    self.teams = []
+    self.players = []
+
+def test_failed_background_refresh_is_throttled():
+  handler = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test')
+  stale = League()
+  handler._install(2017, stale, fetched=datetime.now() - timedelta(hours=1))
+
+  fetches = []
+  def fail(year=None):
+    fetches.append(year)
+    raise Exception('ESPN is down')
+  handler._fetch_league = fail
+
+  assert handler.get() is stale
+  for t in threading.enumerate():
+    if t.name == 'league':
+      t.join(5)
+  assert fetches == [2017]
+  assert datetime.now() - handler._fetched[2017] < timedelta(minutes=1)
+
+  # The stale League is served without trying again until refresh_time passes.
+  assert handler.get() is stale
+  assert fetches == [2017]
+  assert not handler._inflight
+
+class Logger(object):
+  def __init__(self):
+    self.warnings = []
+
+  def warning(self, msg, *args):
+    self.warnings.append(msg % args)
+
+def no_fetch(year=None):
+  raise AssertionError('Fetched year %r' % year)
+
+def test_snapshot_round_trip(tmpdir):
+  handler = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test',
+                          snapshot_dir=str(tmpdir))
+  fetched = datetime(2017, 10, 3, 12, 30)
+  handler._current_week = 5
+  handler._week_expires = datetime(2017, 10, 10, 12)
+  handler._install(2017, sample_league(), fetched=fetched)
+  handler._save_snapshot(2017)
+  assert [f.basename for f in tmpdir.listdir()] == ['league-1-2017.json.gz']
+
+  loaded = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test',
+                         snapshot_dir=str(tmpdir))
+  loaded._fetch_league = no_fetch
+  assert loaded._fetched[2017] == fetched
+  assert loaded._current_week == 5
+  assert loaded._week_expires == datetime(2017, 10, 10, 12)
+
+  league = loaded._leagues[2017]
+  assert [t.team_name for t in league.teams] == \
+    ['Able Aces', 'Baker Bums', 'Cole Crushers', 'Dunn Deal']
+  able = league.teams[0]
+  assert able.owner == 'Albert Able' and able.owner_id == 'P1'
+  assert able.scores == [101.0, 102.0] and able.overall_standing == 1
+  # Schedules point at the loaded teams themselves.
+  assert able.schedule == [league.teams[1], league.teams[2]]
+
+  index = loaded._indexes[2017]
+  assert index.team_by_player_name('carl').team_name == 'Cole Crushers'
+  assert [(t.team_name, o.team_name) for t, o in index.matchups(2)] == \
+    [('Able Aces', 'Cole Crushers'), ('Baker Bums', 'Dunn Deal')]
+
+def test_unreadable_snapshots_are_skipped(tmpdir):
+  with gzip.open(str(tmpdir.join('league-1-2015.json.gz')), 'wt') as f:
+    json.dump({'format': 1, 'lid': 1, 'year': 2015}, f)
+  with open(str(tmpdir.join('league-1-2016.json.gz')), 'wb') as f:
+    f.write(b'not gzip at all')
+
+  logger = Logger()
+  handler = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test',
+                          logger=logger, snapshot_dir=str(tmpdir))
+  assert handler._leagues == {}
+  assert len(logger.warnings) == 2
+  assert any('format' in w for w in logger.warnings)
+
+def test_prior_season_is_served_from_snapshot(tmpdir):
+  handler = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test',
+                          snapshot_dir=str(tmpdir))
+  handler._install(2016, sample_league(), fetched=datetime(2017, 1, 5))
+  handler._save_snapshot(2016)
+
+  loaded = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test',
+                         snapshot_dir=str(tmpdir))
+  loaded._fetch_league = no_fetch
+  league = loaded.get(2016)
+  assert league.teams[3].team_name == 'Dunn Deal'
+  assert loaded.index(2016).team_by_owner_id('P2').owner == 'Barry Baker'
+  assert not loaded._inflight
+
+class Response(object):
+  def __init__(self, status_code, headers=None, body=None):
+    self.status_code = status_code
+    self.headers = headers or {}
+    self.body = body
+
+  def json(self):
+    return self.body
+
+class Session(object):
+  """ Answers each get() with the next of the given Responses. """
+  def __init__(self, *responses):
+    self.responses = list(responses)
+    self.requests = []
+
+  def get(self, url, params=None, headers=None, **kwargs):
+    self.requests.append((url, params, headers, kwargs))
+    return self.responses.pop(0)
+
+def scoreboard(week):
+  return Response(200, body={'scoreboard': {'matchupPeriodId': week}})
+
+def test_next_week_boundary():
+  boundary = LeagueHandler.next_week_boundary
+  # Monday, Tuesday before noon, at noon and after noon (UTC).
+  assert boundary(datetime(2017, 10, 2, 23, 0)) == datetime(2017, 10, 3, 12)
+  assert boundary(datetime(2017, 10, 3, 11, 59)) == datetime(2017, 10, 3, 12)
+  assert boundary(datetime(2017, 10, 3, 12, 0)) == datetime(2017, 10, 10, 12)
+  assert boundary(datetime(2017, 10, 3, 12, 1)) == datetime(2017, 10, 10, 12)
+  # Across the end of the year.
+  assert boundary(datetime(2017, 12, 27, 8, 0)) == datetime(2018, 1, 2, 12)
+
+def test_current_week_rechecked_hourly_until_espn_rolls_over(monkeypatch):
+  class Clock(datetime):
+    now = datetime(2017, 10, 2, 20, 0)
+    def utcnow():
+      return Clock.now
+  monkeypatch.setattr(leaguehandler, 'datetime', Clock)
+
+  handler = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test')
+  handler._session = Session(scoreboard(4), scoreboard(4), scoreboard(5))
+  assert handler.current_week() == 4
+  assert handler._week_expires == datetime(2017, 10, 3, 12)
+
+  # Past the boundary, ESPN still reports week 4: check again in an hour.
+  Clock.now = datetime(2017, 10, 3, 12, 5)
+  assert handler.current_week() == 4
+  assert handler._week_expires == datetime(2017, 10, 3, 13, 5)
+  Clock.now = datetime(2017, 10, 3, 12, 50)
+  assert handler.current_week() == 4
+  assert len(handler._session.requests) == 2
+
+  Clock.now = datetime(2017, 10, 3, 13, 10)
+  assert handler.current_week() == 5
+  assert handler._week_expires == datetime(2017, 10, 10, 12)
+  assert len(handler._session.requests) == 3
+
+def test_not_modified_reuses_cached_response():
+  handler = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test')
+  first = Response(200, headers={'ETag': '"v1"'}, body={'week': 1})
+  handler._session = Session(first, Response(304))
+  assert handler._http_get('http://espn', params={'leagueId': 1}) is first
+  assert handler._http_get('http://espn', params={'leagueId': 1}) is first
+
+  (_, _, headers1, kwargs1), (_, _, headers2, _) = handler._session.requests
+  assert headers1 == {}
+  assert headers2 == {'If-None-Match': '"v1"'}
+  assert kwargs1['timeout'] == leaguehandler.HTTP_TIMEOUT
+
+def test_espnff_requests_replaced_only_while_fetching(monkeypatch):
+  module = leaguehandler._espnff_requests._module
+  assert module.requests is leaguehandler.requests
+
+  handler = LeagueHandler(lid=1, year=2017, espn_s2='test', swid='test')
+  handler._session = Session(Response(200, body={'teams': []}))
+  def fetch(lid, year, espn_s2, swid):
+    assert module.requests is leaguehandler._espnff_requests
+    return module.requests.get('http://espn/leagueSettings').json()
+  monkeypatch.setattr(leaguehandler, 'League', fetch)
+
+  assert handler._fetch_league(2017) == {'teams': []}
+  assert handler._session.requests[0][0] == 'http://espn/leagueSettings'
+  assert module.requests is leaguehandler.requests
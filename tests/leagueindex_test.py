@@ -0,0 +1,80 @@
+import sys
+import re
+
+sys.path.append('..')
+
+from slackbot.leagueindex import LeagueIndex
+from slackbot.actionhandler import SquirtleActionHandler
+
+class Team(object):
+  def __init__(self, team_id, owner, team_name):
+    self.team_id = team_id
+    self.owner_id = 'P%d' % team_id
+    self.owner = owner
+    self.team_name = team_name
+    self.schedule = []
+    self.scores = []
+    self.overall_standing = team_id
+
+class Player(object):
+  def __init__(self, team):
+    self.player_id = team.owner_id
+    self.first_name = team.owner.split()[0]
+
+class League(object):
+  def __init__(self, teams, schedule):
+    self.teams = teams
+    self.players = [Player(t) for t in teams]
+    for week in schedule:
+      for a, b in week:
+        teams[a].schedule.append(teams[b])
+        teams[b].schedule.append(teams[a])
+    for t in teams:
+      t.scores = [100.0 + t.team_id + w for w in range(len(schedule))]
+
+def league():
+  teams = [
+    Team(1, 'Albert Able', 'Able Aces'),
+    Team(2, 'Barry Baker', 'Baker Bums'),
+    Team(3, 'Carl Cole', 'Cole Crushers'),
+    Team(4, 'Dana Dunn', 'Dunn Deal'),
+  ]
+  return League(teams, [[(0, 1), (2, 3)], [(0, 2), (1, 3)]])
+
+def test_lookups():
+  index = LeagueIndex(league())
+  assert index.team_by_owner_name(' ALBERT').team_name == 'Able Aces'
+  assert index.team_by_player_name('carl').team_name == 'Cole Crushers'
+  assert index.team_by_owner_id('P4').owner == 'Dana Dunn'
+  assert index.team_by_player_id('P2').owner == 'Barry Baker'
+  assert index.team_by_owner_name('zed') is None
+  assert index.team_by_owner_name(None) is None
+
+def test_matchups_are_deduplicated_and_league_is_untouched():
+  l = league()
+  index = LeagueIndex(l)
+  week2 = [(t.team_name, o.team_name) for t, o in index.matchups(2)]
+  assert week2 == [('Able Aces', 'Cole Crushers'), ('Baker Bums', 'Dunn Deal')]
+  assert index.matchups(3) == []
+  assert len(l.teams) == 4
+
+def test_actions_use_index():
+  at = '<@U0BOT>'
+  ah = SquirtleActionHandler('SquirtleBot', at)
+  index = LeagueIndex(league())
+  user = {'first_name': 'Barry'}
+  for _ in range(2):
+    text = at + ' show all matchups'
+    result = ah.exec_action(action='matchups_all', text=text, league=index, week=1)
+    assert result[0].count('```') == 2
+    assert 'Dunn Deal      Dana Dunn    104.0' in result[0]
+
+  text = at + ' show my matchup'
+  regex = ah.parse_keywords(text=text)['matchup']
+  result = ah.exec_action(action='matchup', text=text, regex=regex, league=index, week=1, user=user)
+  assert 'vs. Albert Able (Able Aces)' in result[0]
+
+  text = at + ' tell me about carl\'s team'
+  regex = ah.parse_keywords(text=text)['tell']
+  result = ah.exec_action(action='tell', text=text, regex=regex, league=index, league_prev=index, user=user)
+  assert result[0].startswith('Cole Crushers are terrible') and '3rd' in result[0]
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import logging
+import multiprocessing
+import threading
+import time
+
+sys.path.append('..')
+
+from slackbot.logwriter import BotLogger, JsonFormatter, LogWriter, RotatingLogHandler
+
+class Lazy(object):
+  """ Records the threads in which it is turned into a string. """
+  threads = []
+
+  def __repr__(self):
+    Lazy.threads.append(threading.get_ident())
+    return 'Lazy()'
+
+def logger(name, writer, level=logging.INFO):
+  log = logging.getLogger(name)
+  log.setLevel(level)
+  log.propagate = False
+  log.handlers = [writer.handler()]
+  return log
+
+def test_deferred_formatting(tmpdir):
+  path = str(tmpdir.join('logs', 'test.log'))
+  handler = RotatingLogHandler(path)
+  handler.setFormatter(JsonFormatter())
+  writer = LogWriter(handler).start()
+  log = BotLogger(logger('logwriter_test.deferred', writer), 'TestBot')
+
+  Lazy.threads = []
+  log.debug('Not logged: %r', Lazy())
+  log.info('Posted %r', Lazy(), extra={'channel': 'general', 'action': 'stats'})
+  writer.stop()
+
+  assert Lazy.threads
+  assert threading.get_ident() not in Lazy.threads
+  records = [json.loads(l) for l in open(path)]
+  assert len(records) == 1
+  assert records[0]['message'] == 'Posted Lazy()'
+  assert records[0]['bot'] == 'TestBot'
+  assert records[0]['channel'] == 'general'
+  assert records[0]['action'] == 'stats'
+
+def test_rotation(tmpdir):
+  path = str(tmpdir.join('test.log'))
+  handler = RotatingLogHandler(path, max_bytes=100, backups=2, interval=0)
+  writer = LogWriter(handler).start()
+  log = logger('logwriter_test.size', writer)
+  for i in range(20):
+    log.info('message number %d', i)
+  writer.stop()
+  assert sorted(os.listdir(str(tmpdir))) == ['test.log', 'test.log.1', 'test.log.2']
+  assert open(path).read().endswith('message number 19\n')
+
+  path = str(tmpdir.join('timed.log'))
+  handler = RotatingLogHandler(path, max_bytes=0, backups=2, interval=0.05)
+  writer = LogWriter(handler).start()
+  log = logger('logwriter_test.time', writer)
+  log.info('before')
+  time.sleep(0.1)
+  log.info('after')
+  writer.stop()
+  assert open(path).read() == 'after\n'
+  assert open(path + '.1').read() == 'before\n'
+
+def child(name, writer):
+  logger(name, writer).info('from process %d', os.getpid())
+
+def test_shared(tmpdir):
+  path = str(tmpdir.join('test.log'))
+  writer = LogWriter(RotatingLogHandler(path), shared=True).start()
+  process = multiprocessing.get_context('fork').Process(
+    target=child, args=('logwriter_test.shared', writer))
+  process.start()
+  process.join()
+  # Records from this process are formatted before being queued as well, so
+  # arguments which cannot be pickled may still be logged.
+  log = logger('logwriter_test.shared', writer)
+  log.info('from parent %r', threading.Lock())
+  writer.stop()
+  lines = open(path).read().splitlines()
+  assert lines[0] == 'from process %d' % process.pid
+  assert lines[1].startswith('from parent <unlocked _thread.lock')
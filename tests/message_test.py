@@ -0,0 +1,21 @@
+import sys
+
+sys.path.append('..')
+
+from slackbot.message import Message
+
+def test_text_needs_no_analysis():
+  m = Message('<@U0BOT> show all matchups')
+  assert str(m) == m.text == '<@U0BOT> show all matchups'
+  assert m and len(m) == 26
+  assert m._blob is None
+  assert not Message('')
+
+def test_blob_is_created_once():
+  m = Message('Tom Brady has deflated balls.')
+  try:
+    blob = m.blob
+  except ImportError:
+    return
+  assert m.blob is blob
+  assert str(blob) == m.text
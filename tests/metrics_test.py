@@ -0,0 +1,57 @@
+import sys
+import json
+import urllib.request
+
+sys.path.append('..')
+
+from slackbot.metrics import Histogram, Metrics, MetricsServer
+from slackbot.actionhandler import SquirtleActionHandler
+
+def test_histogram_percentiles():
+  h = Histogram()
+  for _ in range(99):
+    h.observe(0.001)
+  h.observe(0.5)
+  stats = h.stats()
+  assert stats['count'] == 100
+  assert stats['max'] == 0.5
+  # Within a factor of two of the real value.
+  assert 0.001 <= stats['p50'] < 0.002
+  assert 0.001 <= stats['p99'] < 0.002
+  assert h.percentile(100) == 0.5
+  assert Histogram().percentile(50) == 0.0
+
+def test_metrics_stats():
+  m = Metrics()
+  m.incr('messages_seen')
+  m.incr('messages_seen', 2)
+  m.observe('parse_rtm', 0.0001)
+  stats = m.stats()
+  assert stats['counters'] == {'messages_seen': 3}
+  assert stats['histograms']['parse_rtm']['count'] == 1
+  assert m.counter('messages_posted') == 0
+
+def test_metrics_server():
+  m = Metrics()
+  m.incr('events', 5)
+  server = MetricsServer(m.stats, 0)
+  try:
+    host, port = server.address()
+    with urllib.request.urlopen('http://%s:%s/metrics' % (host, port), timeout=5) as r:
+      assert json.loads(r.read().decode('utf-8'))['counters'] == {'events': 5}
+  finally:
+    server.stop()
+
+def test_stats_action():
+  at = '<@U0BOT>'
+  ah = SquirtleActionHandler('SquirtleBot', at)
+  m = Metrics()
+  m.incr('messages_seen', 4)
+  m.observe('exec_action', 0.002)
+  stats = m.stats()
+  stats['responses'] = {'hits': 3, 'misses': 1, 'size': 1}
+  assert 'stats' in ah.parse_keywords(text=at + ' stats')
+  result = ah.exec_action(action='stats', stats=stats, uptime='1:00:00')[0]
+  assert result.startswith('Uptime: 1:00:00\nMessages seen: 4')
+  assert 'Cached responses: 3 hits, 1 misses' in result
+  assert 'exec_action' in result
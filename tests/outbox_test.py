@@ -0,0 +1,54 @@
+import sys
+import time
+
+sys.path.append('..')
+
+from slackbot.outbox import Outbox
+
+def wait_for(condition, timeout=2.0):
+  deadline = time.monotonic() + timeout
+  while not condition() and time.monotonic() < deadline:
+    time.sleep(0.005)
+  return condition()
+
+def test_drops_when_full():
+  outbox = Outbox(lambda channel, msg: {'ok': True}, max_size=2)
+  assert outbox.put('C1', 'a')
+  assert outbox.put('C1', 'b')
+  assert not outbox.put('C1', 'c')
+  assert outbox.stats()['dropped'] == 1
+  assert outbox.stats()['depth'] == 2
+
+def test_channel_rate_and_order():
+  sent = []
+  outbox = Outbox(lambda channel, msg: sent.append((time.monotonic(), channel, msg)) or {'ok': True},
+                  rate=20, burst=1)
+  for i in range(3):
+    outbox.put('C1', i)
+  outbox.put('C2', 'other')
+  outbox.start()
+  assert wait_for(lambda: len(sent) == 4)
+  outbox.stop()
+
+  c1 = [s for s in sent if s[1] == 'C1']
+  assert [s[2] for s in c1] == [0, 1, 2]
+  assert c1[2][0] - c1[0][0] >= 0.09
+  assert sent[1][1] == 'C2'
+
+def test_retry_after_is_honoured():
+  responses = [{'ok': False, 'error': 'ratelimited', 'headers': {'Retry-After': '1'}}]
+  sent = []
+  def send(channel, msg):
+    sent.append(time.monotonic())
+    if responses:
+      return responses.pop()
+    return {'ok': True}
+
+  outbox = Outbox(send)
+  outbox.put('C1', 'hello')
+  outbox.start()
+  assert wait_for(lambda: len(sent) == 2)
+  outbox.stop()
+  assert sent[1] - sent[0] >= 0.99
+  stats = outbox.stats()
+  assert stats['retried'] == 1 and stats['sent'] == 1
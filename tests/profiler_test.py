@@ -0,0 +1,44 @@
+import sys
+import threading
+import time
+
+sys.path.append('..')
+
+from slackbot.profiler import Profiler
+
+def busy(stop):
+  while not stop.is_set():
+    sum(range(100))
+
+def test_sample_and_dump(tmpdir):
+  path = str(tmpdir.join('logs', 'bot-profile.folded'))
+  stop = threading.Event()
+  t = threading.Thread(target=busy, args=(stop,), name='bot-worker_0')
+  t.start()
+  try:
+    p = Profiler(lambda: {t.ident: 'bot-worker'}, path, interval=0.001)
+    for i in range(20):
+      p.sample({t.ident: 'bot-worker'})
+  finally:
+    stop.set()
+    t.join()
+  p.dump()
+
+  assert p.samples == 20
+  lines = open(path).read().splitlines()
+  assert sum(int(l.rsplit(' ', 1)[1]) for l in lines) == 20
+  for l in lines:
+    stack = l.rsplit(' ', 1)[0].split(';')
+    assert stack[0] == 'bot-worker'
+    assert any(frame.startswith('busy (profiler_test.py:') for frame in stack)
+
+def test_start_stop(tmpdir):
+  path = str(tmpdir.join('profile.folded'))
+  me = threading.get_ident()
+  p = Profiler(lambda: {me: 'main'}, path, interval=0.001).start()
+  assert p.running()
+  time.sleep(0.05)
+  p.stop()
+  assert not p.running()
+  assert p.samples > 0
+  assert open(path).read().startswith('main;')
@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.append('..')
+
+from slackbot.recorder import Recorder
+
+def test_record_and_read(tmpdir):
+  path = str(tmpdir.join('logs', 'rtm.jsonl.gz'))
+  r = Recorder(path, bot={'id': 'UBOT', 'name': 'testbot'})
+  r.record([{'type': 'hello'}], t=1.0)
+  r.record([{'type': 'message', 'text': 'hi'}, {'type': 'message', 'text': 'yo'}], t=2.0)
+  r.close()
+  r.record([{'type': 'message', 'text': 'too late'}], t=3.0)
+
+  bot, events = Recorder.read(path)
+  assert bot == {'id': 'UBOT', 'name': 'testbot'}
+  assert events == [(1.0, {'type': 'hello'}),
+                    (2.0, {'type': 'message', 'text': 'hi'}),
+                    (2.0, {'type': 'message', 'text': 'yo'})]
+  assert r.events == 3
+
+def test_rotation(tmpdir):
+  path = str(tmpdir.join('rtm.jsonl.gz'))
+  r = Recorder(path, max_bytes=100, backups=2)
+  for i in range(10):
+    r.record([{'type': 'message', 'text': 'message %d' % i}], t=float(i))
+  r.close()
+
+  assert r.rotated(1) == str(tmpdir.join('rtm.1.jsonl.gz'))
+  assert sorted(os.listdir(str(tmpdir))) == ['rtm.1.jsonl.gz', 'rtm.2.jsonl.gz', 'rtm.jsonl.gz']
+  times = [t for name in (r.rotated(2), r.rotated(1), path) for t, e in Recorder.read(name)[1]]
+  assert times == sorted(times)
+  assert times[-1] == 9.0
+  assert times[0] > 0.0
+
+def test_existing_file_is_rotated_out(tmpdir):
+  path = str(tmpdir.join('rtm.jsonl.gz'))
+  first = Recorder(path, bot={'id': 'UBOT'}, max_bytes=1000)
+  first.record([{'type': 'message', 'text': 'first run'}], t=1.0)
+  first.close()
+
+  second = Recorder(path, bot={'id': 'UBOT'}, max_bytes=1000)
+  second.record([{'type': 'message', 'text': 'second run'}], t=2.0)
+  second.close()
+
+  assert Recorder.read(second.rotated(1))[1] == [(1.0, {'type': 'message', 'text': 'first run'})]
+  assert Recorder.read(path)[1] == [(2.0, {'type': 'message', 'text': 'second run'})]
+  assert second._size < 1000
+
+def test_redact():
+  event = {'type': 'message', 'text': '<@UBOT> show my matchup, <#C1|general>!'}
+  assert Recorder.redact(event)['text'] == '<@UBOT> xxxx xx xxxxxxxx <#C1|general>x'
+  assert event['text'].startswith('<@UBOT> show')
+  assert Recorder.redact({'type': 'hello'}) == {'type': 'hello'}
@@ -0,0 +1,40 @@
+import sys
+
+sys.path.append('..')
+
+from slackbot.responsecache import ResponseCache
+
+def test_renders_once_per_key():
+  calls = []
+  cache = ResponseCache()
+
+  def render():
+    calls.append(1)
+    return 'response'
+
+  assert cache.get(('matchup', 'albert', 1, 3), render) == 'response'
+  assert cache.get(('matchup', 'albert', 1, 3), render) == 'response'
+  assert len(calls) == 1
+  assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+def test_new_version_misses():
+  cache = ResponseCache()
+  cache.get(('matchups_all', (), 1, 3), lambda: 'old')
+  assert cache.get(('matchups_all', (), 2, 3), lambda: 'new') == 'new'
+
+def test_evicts_least_recently_used():
+  cache = ResponseCache(max_size=2)
+  cache.get('a', lambda: 'a')
+  cache.get('b', lambda: 'b')
+  cache.get('a', lambda: 'x')
+  cache.get('c', lambda: 'c')
+  assert len(cache) == 2
+  assert cache.get('a', lambda: 'x') == 'a'
+  assert cache.get('b', lambda: 'y') == 'y'
+
+def test_clear_as_listener():
+  cache = ResponseCache()
+  cache.get('a', lambda: 'a')
+  cache.clear(2017, object())
+  assert len(cache) == 0
+  assert cache.get('a', lambda: 'b') == 'b'
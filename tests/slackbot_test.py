@@ -0,0 +1,209 @@
+import sys
+import logging
+import threading
+import time
+
+sys.path.append('..')
+
+import slackbot.workspace
+
+from slackbot.actionhandler import Action
+from slackbot.slackbot import SlackBot
+from slackbot.workspace import Workspace
+
+class Client(object):
+  def __init__(self, token):
+    self.calls = []
+
+  def api_call(self, method, **kwargs):
+    self.calls.append(method)
+    if method == 'auth.test':
+      return {'ok': True, 'team_id': 'T1', 'user_id': 'UBOT'}
+    if method == 'users.list':
+      return {'ok': True, 'members': [
+        {'id': 'UBOT', 'name': 'testbot', 'profile': {}},
+        {'id': 'U1', 'name': 'albert', 'profile': {'first_name': 'Albert'}},
+      ]}
+    if method == 'channels.list':
+      return {'ok': True, 'channels': [
+        {'id': 'C1', 'name': 'general'},
+        {'id': 'C2', 'name': 'random'},
+      ]}
+    if method == 'groups.list':
+      return {'ok': True, 'groups': []}
+    return {'ok': False, 'error': 'unknown_method'}
+
+def bot(monkeypatch, name='TestBot'):
+  monkeypatch.setattr(slackbot.workspace, 'SlackClient', Client)
+  config = {
+    'API Token': 'xoxb-test',
+    'Channels': {'general': None},
+    'Logger': logging.getLogger('slackbot_test'),
+  }
+  return SlackBot(name, config)
+
+def setup_function(function):
+  Workspace.clear()
+
+def test_parse_rtm_screens_out_cheaply(monkeypatch):
+  b = bot(monkeypatch)
+  b._client.calls.clear()
+  events = [
+    {'type': 'presence_change', 'user': 'U1'},
+    {'type': 'message', 'text': 'hi', 'user': 'U1', 'channel': 'C2'},
+    {'type': 'message', 'text': 'hi', 'user': 'UBOT', 'channel': 'C1'},
+    {'type': 'message', 'text': 'hi', 'user': 'U9', 'bot_id': 'B1', 'channel': 'C1'},
+    {'type': 'message', 'subtype': 'message_changed', 'channel': 'C1'},
+    {'type': 'message', 'text': 'hello', 'user': 'U1', 'channel': 'C1'},
+  ]
+  results = b.parse_rtm(events)
+  assert len(results) == 1
+  assert results[0]['message'].text == 'hello'
+  assert results[0]['channel'] == {'name': 'general', 'id': 'C1'}
+  assert results[0]['user'] == {'name': None, 'id': 'U1'}
+  assert b._client.calls == []
+
+def test_resolve_user(monkeypatch):
+  b = bot(monkeypatch)
+  user = b._resolve_user({'name': None, 'id': 'U1'})
+  assert user['name'] == 'albert' and user['first_name'] == 'Albert'
+
+def test_user_resolved_only_for_actions_that_need_it(monkeypatch):
+  b = bot(monkeypatch)
+  b.set_actions()
+  seen = []
+  b.actions.update(actions=[
+    Action(name='plain', function=lambda **kwargs: seen.append(dict(kwargs['user']))),
+    Action(name='personal', function=lambda **kwargs: seen.append(dict(kwargs['user'])),
+           needs_user=True),
+  ])
+  b.post_msg = lambda **kwargs: None
+  channel = {'name': 'general', 'id': 'C1'}
+
+  b._run_actions({'plain': None}, {'channel': channel, 'user': {'name': None, 'id': 'U1'}})
+  assert seen.pop() == {'name': None, 'id': 'U1'}
+
+  b._run_actions({'plain': None, 'personal': None},
+                 {'channel': channel, 'user': {'name': None, 'id': 'U1'}})
+  assert seen.pop()['first_name'] == 'Albert'
+
+def test_bots_share_workspace(monkeypatch):
+  one = bot(monkeypatch, 'One')
+  two = bot(monkeypatch, 'Two')
+  assert one._workspace is two._workspace
+  assert one.id() == two.id() == 'UBOT'
+  assert one._channel_id('general') == 'C1'
+  assert one._channel_name('C2') == 'random'
+  # Each bot has its own client; only the first one downloaded anything.
+  assert one._client is not two._client
+  calls = one._workspace.users._client.calls
+  assert calls.count('users.list') == 1 and calls.count('channels.list') == 1
+
+def test_channel_events(monkeypatch):
+  b = bot(monkeypatch)
+  b.set_actions()
+  b.handle_events([{'type': 'channel_created', 'channel': {'id': 'C3', 'name': 'new'}}])
+  assert b._channel_id('new') == 'C3'
+  b.handle_events([{'type': 'channel_rename', 'channel': {'id': 'C3', 'name': 'newer'}}])
+  assert b._channel_id('new') is None
+  assert b._channel_name('C3') == 'newer'
+
+def test_counts_messages(monkeypatch):
+  b = bot(monkeypatch)
+  b.set_actions()
+  b.handle_events([
+    {'type': 'message', 'text': 'hello', 'user': 'U1', 'channel': 'C1'},
+    {'type': 'message', 'text': 'hello', 'user': 'U1', 'channel': 'C2'},
+  ])
+  assert b.metrics().counter('messages_seen') == 1
+  assert b.metrics().counter('messages_matched') == 0
+  assert len(b.metrics().histogram('parse_rtm')) == 1
+
+def test_profile_toggle(monkeypatch, tmpdir):
+  b = bot(monkeypatch)
+  b._config['Root'] = str(tmpdir)
+  b._thread_id = threading.get_ident()
+  profiler = b.profile()
+  assert profiler.running()
+  assert b._profile_threads()[b._thread_id] == 'TestBot'
+  assert b.profile(True) is profiler
+  time.sleep(0.05)
+  assert b.profile() is profiler
+  assert not profiler.running()
+  assert profiler.samples > 0
+  assert tmpdir.join('logs', 'TestBot-profile.folded').check()
+
+def test_reload_channels(monkeypatch):
+  b = bot(monkeypatch)
+  changes = []
+  b.on_config_change(changes.append)
+  b.reload({'API Token': 'xoxb-test', 'Channels': {'general': None, 'random': None}})
+  assert b.channels() == {'general': 'C1', 'random': 'C2'}
+  assert b._watched == {'C1': 'general', 'C2': 'random'}
+  assert len(changes) >= 1 and changes[-1] is b
+
+  b.reload({'API Token': 'xoxb-test', 'Channels': {'random': 'C2'}})
+  assert b.channels() == {'random': 'C2'}
+  assert b._watched == {'C2': 'random'}
+  results = b.parse_rtm([{'type': 'message', 'text': 'hi', 'user': 'U1', 'channel': 'C1'}])
+  assert results == []
+  assert b.config_file()['TestBot']['Channels'] == {'random': 'C2'}
+
+def test_reload_user_refresh_time(monkeypatch):
+  b = bot(monkeypatch)
+  assert b._users._refresh_time is None
+  b.reload({'API Token': 'xoxb-test', 'Channels': {'general': 'C1'}, 'User Refresh Time': 5})
+  assert b._users._refresh_time == 5
+  assert b._config['User Refresh Time'] == 5
+  # Dropping the value goes back to the default, which is not to refresh.
+  b.reload({'API Token': 'xoxb-test', 'Channels': {'general': 'C1'}})
+  assert b._users._refresh_time is None
+  assert 'User Refresh Time' not in b._config
+  assert b._config['Logger'] is not None
+
+def test_startup_phases_run_together(monkeypatch):
+  monkeypatch.setattr(slackbot.workspace, 'SlackClient', Client)
+  barrier = threading.Barrier(3, timeout=5)
+
+  class Bot(SlackBot):
+    def startup_phases(self):
+      phases = super(Bot, self).startup_phases()
+      return [(name, lambda f=f: (f(), barrier.wait())) for name, f in phases] + \
+             [('other', barrier.wait)]
+
+  b = Bot('TestBot', {
+    'API Token': 'xoxb-test',
+    'Channels': {'general': None},
+    'Logger': logging.getLogger('slackbot_test'),
+  })
+  assert b.id() == 'UBOT'
+  assert b._watched == {'C1': 'general'}
+  histograms = b.metrics().stats()['histograms']
+  for name in ('startup', 'startup_directory', 'startup_channels', 'startup_other'):
+    assert histograms[name]['count'] == 1
+
+def test_failed_startup_phase_raises(monkeypatch):
+  monkeypatch.setattr(slackbot.workspace, 'SlackClient', Client)
+  done = []
+
+  class Bot(SlackBot):
+    def startup_phases(self):
+      def fail():
+        raise Exception('ESPN is down')
+      return super(Bot, self).startup_phases() + [('league', fail)]
+
+    def _resolve_channels(self):
+      super(Bot, self)._resolve_channels()
+      done.append('channels')
+
+  try:
+    Bot('TestBot', {
+      'API Token': 'xoxb-test',
+      'Channels': {'general': None},
+      'Logger': logging.getLogger('slackbot_test'),
+    })
+    assert False, 'Startup should have failed.'
+  except Exception as e:
+    assert str(e) == 'ESPN is down'
+  # The other phases still ran to the end.
+  assert done == ['channels']
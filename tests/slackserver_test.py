@@ -0,0 +1,125 @@
+import os
+import asyncio
+import threading
+import sys
+import time
+import logging
+
+sys.path.append('..')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from slackbot.slackbot import SlackBot
+from slackbot.workspace import Workspace
+from slackserver import Connection, SlackServer
+
+def setup_function(function):
+  Workspace.clear()
+
+def test_bot_talks_to_stand_in():
+  server = SlackServer(port=0, users=3, channels=1, rate=0).start()
+  try:
+    config = {
+      'API Token': 'xoxb-test',
+      'API URL': server.url(),
+      'Channels': {'general': None},
+      'Logger': logging.getLogger('slackserver_test'),
+    }
+    b = SlackBot('TestBot', config)
+    assert b._id == 'UBOT0'
+    assert b._channel_id('channel-1') == 'C00001'
+    assert b._client.rtm_connect()
+
+    deadline = time.time() + 5
+    while not server.inject('%(at)s hello') and time.time() < deadline:
+      time.sleep(0.01)
+    events = []
+    while not any(e.get('type') == 'message' for e in events) and time.time() < deadline:
+      events += b._rtm_read()
+    message = [e for e in events if e.get('type') == 'message'][0]
+    assert message['text'] == '<@UBOT0> hello'
+    assert b.parse_rtm([message])[0]['channel']['name'] == 'general'
+
+    assert b._send_msg('C00000', 'hi there').get('ok')
+    assert server.posted[-1][1:] == ('C00000', 'hi there')
+    assert b.config_file()['TestBot']['API URL'] == server.url()
+  finally:
+    server.stop()
+
+def test_ratelimited():
+  server = SlackServer(port=0, rate=0, ratelimit=1.0).start()
+  try:
+    client = Workspace.client('xoxb-test', base_url=server.url())
+    result = client.api_call('auth.test')
+    assert result['error'] == 'ratelimited'
+    assert result['headers']['Retry-After'] == '1'
+    assert server.stats['ratelimited'] == 1
+  finally:
+    server.stop()
+
+def test_frame_lengths():
+  assert Connection.frame(0x1, b'x' * 125)[:2] == b'\x81\x7d'
+  assert Connection.frame(0x1, b'x' * 126)[:4] == b'\x81\x7e\x00\x7e'
+  assert Connection.frame(0xa, b'x' * 65536)[:10] == b'\x8a\x7f' + (65536).to_bytes(8, 'big')
+
+def test_bots_ignore_each_others_replies():
+  server = SlackServer(port=0, users=3, channels=1, rate=0).start()
+  try:
+    bots = []
+    for i in range(2):
+      config = {
+        'API Token': 'xoxb-test%d' % i,
+        'API URL': server.url(),
+        'Channels': {'general': None},
+        'Logger': logging.getLogger('slackserver_test'),
+      }
+      bots.append(SlackBot('TestBot%d' % i, config))
+      assert bots[-1]._client.rtm_connect()
+
+    # Long enough to need the 16 bit length form.
+    text = 'brady ' * 100
+    assert bots[0]._send_msg('C00000', text).get('ok')
+    deadline = time.time() + 5
+    events = []
+    while not any(e.get('type') == 'message' for e in events) and time.time() < deadline:
+      events += bots[1]._rtm_read()
+    message = [e for e in events if e.get('type') == 'message'][0]
+    assert message['text'] == text
+    assert message['bot_id'] == 'BBOT0'
+    assert bots[1].parse_rtm([message]) == []
+  finally:
+    server.stop()
+
+def test_run_all_keeps_other_bots_running():
+  server = SlackServer(port=0, users=3, channels=1, rate=0).start()
+  try:
+    bots = []
+    for i in range(2):
+      config = {
+        'API Token': 'xoxb-test%d' % i,
+        'API URL': server.url(),
+        'Channels': {'general': None},
+        'Logger': logging.getLogger('slackserver_test'),
+      }
+      bots.append(SlackBot('TestBot%d' % i, config))
+    thread = threading.Thread(target=asyncio.run, args=(SlackBot.run_all(bots),), daemon=True)
+    thread.start()
+
+    deadline = time.time() + 5
+    while len(server._connections) < 2 and time.time() < deadline:
+      time.sleep(0.01)
+    assert server.disconnect(bots[1].id()) == 1
+    while not bots[1].stopped() and time.time() < deadline:
+      time.sleep(0.01)
+    assert bots[1].stopped()
+
+    assert server.inject('who is Matthew Sheridan?') == 1
+    while not server.posted and time.time() < deadline:
+      time.sleep(0.01)
+    assert 'author of this bot' in server.posted[0][2]
+    assert not bots[0].stopped()
+
+    bots[0].stop()
+    thread.join(5)
+    assert not thread.is_alive()
+  finally:
+    server.stop()
@@ -0,0 +1,50 @@
+import sys
+import logging
+
+sys.path.append('..')
+
+import slackbot.workspace
+import squirtle
+
+from slackbot.workspace import Workspace
+
+class Client(object):
+  """ Answers as Slack would for any token but 'xoxb-bad', which is refused. """
+  def __init__(self, token):
+    self.token = token
+
+  def api_call(self, method, **kwargs):
+    if self.token == 'xoxb-bad':
+      return {'ok': False, 'error': 'invalid_auth'}
+    if method == 'auth.test':
+      return {'ok': True, 'team_id': 'T1', 'user_id': 'UBOT'}
+    if method == 'users.list':
+      return {'ok': True, 'members': [{'id': 'UBOT', 'name': 'testbot', 'profile': {}}]}
+    if method == 'channels.list':
+      return {'ok': True, 'channels': [{'id': 'C1', 'name': 'general'}]}
+    if method == 'groups.list':
+      return {'ok': True, 'groups': []}
+    return {'ok': False, 'error': 'unknown_method'}
+
+class Logger(logging.Logger):
+  def __init__(self):
+    super(Logger, self).__init__('squirtle_test')
+    self.errors = []
+
+  def error(self, msg, *args, **kwargs):
+    self.errors.append(msg % args)
+
+def setup_function(function):
+  Workspace.clear()
+
+def test_make_bots_leaves_out_bots_that_fail(monkeypatch):
+  monkeypatch.setattr(slackbot.workspace, 'SlackClient', Client)
+  config = {
+    'Good': {'Type': 'SlackBot', 'API Token': 'xoxb-good', 'Channels': {'general': None}},
+    'Bad': {'Type': 'SlackBot', 'API Token': 'xoxb-bad', 'Channels': {'general': None}},
+  }
+  logger = Logger()
+  bots = squirtle._make_bots(config, logger, logging.INFO)
+  assert [b.name() for b in bots] == ['Good']
+  assert bots[0].channels() == {'general': 'C1'}
+  assert len(logger.errors) == 1 and logger.errors[0].startswith('Bad: could not start')
@@ -0,0 +1,58 @@
+import sys
+
+sys.path.append('..')
+
+from slackbot.leagueindex import LeagueIndex
+from slackbot.standings import Standings
+from slackbot.actionhandler import SquirtleActionHandler
+
+from leagueindex_test import league
+
+def test_counts_played_and_current_weeks():
+  l = league()
+  s = Standings(l, 2)
+  # Week 1 is played; week 2 is counted as if the season ended now.
+  assert [r.team.owner for r in s.rows] == ['Dana Dunn', 'Carl Cole', 'Barry Baker', 'Albert Able']
+  dana = s.record(l.teams[3])
+  assert (dana.wins, dana.losses, dana.ties) == (2, 0, 0)
+  assert dana.points_for == 104.0 + 105.0
+
+def test_unplayed_current_week_is_not_counted():
+  l = league()
+  for t in l.teams:
+    t.scores[1] = 0
+  s = Standings(l, 2)
+  assert sum(r.wins + r.losses + r.ties for r in s.rows) == 4
+
+def test_update_reuses_played_weeks():
+  l = league()
+  s = Standings(l, 2)
+  l.teams[0].scores[1] = 500.0
+  updated = s.update(l, 2)
+  assert updated._base is s._base
+  assert updated.record(l.teams[0]).wins == 1
+
+  l.teams[0].scores[0] = 500.0
+  corrected = updated.update(l, 2)
+  assert corrected._base is not s._base
+  assert corrected.record(l.teams[0]).wins == 2
+  assert corrected.rows[0].team.owner == 'Albert Able'
+
+def test_index_carries_standings_forward():
+  l = league()
+  first = LeagueIndex(l, version=1)
+  s = first.standings(2)
+  assert first.standings(2) is s
+  second = LeagueIndex(l, version=2, previous=first)
+  assert second.standings(2)._base is s._base
+
+def test_standings_action():
+  at = '<@U0BOT>'
+  ah = SquirtleActionHandler('SquirtleBot', at)
+  index = LeagueIndex(league(), version=1)
+  text = at + ' show the standings'
+  assert 'standings' in ah.parse_keywords(text=text)
+  result = ah.exec_action(action='standings', text=text, league=index, week=2)
+  assert result[0].startswith('Standings as of week 2:\n```')
+  assert '1  Dunn Deal' in result[0]
+  assert '2-0-0' in result[0]
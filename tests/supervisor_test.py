@@ -0,0 +1,136 @@
+import sys
+import logging
+import os
+import threading
+import time
+
+sys.path.append('..')
+
+from slackbot.supervisor import Supervisor
+
+class Bot(threading.Thread):
+  """
+  Stands in for a SlackBot; "reads" for config['Seconds'] (or until 'Hangs'
+  seconds, after which it stalls) and then stops.
+  """
+  def __init__(self, name, config):
+    super(Bot, self).__init__(daemon=True)
+    self._name    = name
+    self._config  = config
+    self._run     = True
+    self._stopped = False
+    self._listeners = []
+    self._last_read = None
+
+  def run(self):
+    starts = self._config['Starts']
+    with open(starts, 'a') as f:
+      f.write('x')
+    with open(starts) as f:
+      n = len(f.read())
+    if n <= self._config.get('Crashes', 0):
+      raise Exception('Crashed.')
+    # Like SlackBot.run() when rtm_connect() fails.
+    if n <= self._config.get('Connects', 0):
+      self._stopped = True
+      return
+    start = time.time()
+    while self._run and time.time() < start + self._config['Seconds']:
+      if time.time() < start + self._config.get('Hangs', 1e9):
+        self._last_read = time.monotonic()
+      time.sleep(0.01)
+    self._stopped = True
+
+  def stop(self):
+    self._run = False
+
+  def stopped(self):
+    return self._stopped
+
+  def last_read(self):
+    return self._last_read
+
+  def on_config_change(self, listener):
+    self._listeners.append(listener)
+
+  def reload(self, config):
+    self._config.update(config)
+    for listener in self._listeners:
+      listener(self)
+
+  def config_file(self):
+    config = {'Type': 'Bot', 'Stopped': self._stopped}
+    if 'Greeting' in self._config:
+      config['Greeting'] = self._config['Greeting']
+    return {self._name: config}
+
+def make_bot(name, config):
+  return Bot(name, config)
+
+def get_logger():
+  return logging.getLogger('supervisor_test')
+
+def starts(config, name):
+  with open(config[name]['Starts']) as f:
+    return len(f.read())
+
+def run_for(supervisor, seconds):
+  threading.Timer(seconds, supervisor.stop).start()
+  return supervisor.run()
+
+def test_restarts_bots_that_end_by_themselves(tmp_path):
+  config = {
+    'One': {'Seconds': 0.2, 'Starts': str(tmp_path / 'one')},
+    'Two': {'Seconds': 0.2, 'Starts': str(tmp_path / 'two')},
+  }
+  result = run_for(Supervisor(config, make_bot, get_logger, heartbeat=0.1), 3.5)
+  assert result == {
+    'One': {'Type': 'Bot', 'Stopped': True},
+    'Two': {'Type': 'Bot', 'Stopped': True},
+  }
+  assert starts(config, 'One') >= 2 and starts(config, 'Two') >= 2
+
+def test_restarts_crashed_bot(tmp_path):
+  config = {'One': {'Seconds': 60, 'Starts': str(tmp_path / 'one'), 'Crashes': 1}}
+  result = run_for(Supervisor(config, make_bot, get_logger, heartbeat=0.1), 3.5)
+  assert result == {'One': {'Type': 'Bot', 'Stopped': True}}
+  assert starts(config, 'One') == 2
+
+def test_restarts_bot_that_cannot_connect(tmp_path):
+  config = {'One': {'Seconds': 60, 'Starts': str(tmp_path / 'one'), 'Connects': 1}}
+  result = run_for(Supervisor(config, make_bot, get_logger, heartbeat=0.1), 3.5)
+  assert result == {'One': {'Type': 'Bot', 'Stopped': True}}
+  assert starts(config, 'One') == 2
+
+def test_restarts_bot_whose_reads_stall(tmp_path):
+  config = {'One': {'Seconds': 60, 'Starts': str(tmp_path / 'one'), 'Hangs': 0.3}}
+  run_for(Supervisor(config, make_bot, get_logger, heartbeat=0.1), 3.5)
+  assert starts(config, 'One') >= 2
+
+def test_stop_collects_config_of_running_bots(tmp_path):
+  config = {'One': {'Seconds': 60, 'Starts': str(tmp_path / 'one')}}
+  supervisor = Supervisor(config, make_bot, get_logger, heartbeat=0.1)
+  threading.Timer(1.5, supervisor.stop).start()
+  start = time.time()
+  result = supervisor.run()
+  assert time.time() - start < 10
+  assert result == {'One': {'Type': 'Bot', 'Stopped': True}}
+
+def test_reload_sends_new_config_to_running_bots(tmp_path):
+  config = {'One': {'Seconds': 60, 'Starts': str(tmp_path / 'one')}}
+  reported = []
+  supervisor = Supervisor(config, make_bot, get_logger, heartbeat=0.1,
+                          on_config=reported.append,
+                          load_config=lambda: {'One': {'Greeting': 'hi'}})
+  threading.Timer(1.5, supervisor.reload).start()
+  threading.Timer(4, supervisor.stop).start()
+  result = supervisor.run()
+  assert {'One': {'Type': 'Bot', 'Stopped': False, 'Greeting': 'hi'}} in reported
+  assert result == {'One': {'Type': 'Bot', 'Stopped': True, 'Greeting': 'hi'}}
+
+def test_reload_updates_config_of_stopped_bots(tmp_path):
+  config = {'One': {'Seconds': 60, 'Starts': str(tmp_path / 'one')}}
+  supervisor = Supervisor(config, make_bot, get_logger, heartbeat=0.1)
+  assert run_for(supervisor, 1.5) == {'One': {'Type': 'Bot', 'Stopped': True}}
+  supervisor._apply({'One': {'Type': 'Bot', 'Greeting': 'hi'}})
+  assert supervisor.config_file() == {'One': {'Type': 'Bot', 'Greeting': 'hi'}}
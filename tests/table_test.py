@@ -0,0 +1,40 @@
+import sys
+
+sys.path.append('..')
+
+from slackbot.slackbotlib import SlackBotLib
+from slackbot.table import Table
+
+def test_aligns_columns():
+  table = Table(align='llr')
+  table.add_row('Team A', 'Albert Able', 101.5)
+  table.add_row('The Long Team Name', 'Barry', 9.0)
+  assert table.lines() == [
+    'Team A              Albert Able  101.5',
+    'The Long Team Name  Barry          9.0',
+  ]
+
+def test_breaks_and_ragged_rows():
+  table = Table()
+  table.add_row('a', 'bb')
+  table.add_break()
+  table.add_row('ccc')
+  assert table.render() == 'a    bb\n\nccc'
+  assert table.code_block() == '```a    bb\n\nccc```'
+
+def test_display_width():
+  assert Table.display_width('abc') == 3
+  assert Table.display_width('日本') == 4
+  assert Table.display_width('é') == 1
+
+def test_wide_characters_align():
+  table = Table(align='lr')
+  table.add_row('日本', 1)
+  table.add_row('abcd', 10)
+  line1, line2 = table.lines()
+  assert Table.display_width(line1) == Table.display_width(line2)
+
+def test_format_matchup():
+  line1, line2 = SlackBotLib.format_matchup('Team A', 'Team BB', 100, 9)
+  assert line1 == 'Team A  100'
+  assert line2 == 'Team BB   9'
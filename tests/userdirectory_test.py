@@ -0,0 +1,78 @@
+import sys
+import time
+
+from datetime import datetime, timedelta
+
+sys.path.append('..')
+
+from slackbot.userdirectory import UserDirectory
+
+class FakeClient(object):
+  def __init__(self, pages):
+    self.pages = pages
+    self.calls = []
+
+  def api_call(self, method, **kwargs):
+    self.calls.append((method, kwargs))
+    if method == 'users.list':
+      page = int(kwargs.get('cursor') or 0)
+      result = {'ok': True, 'members': self.pages[page]}
+      if page + 1 < len(self.pages):
+        result['response_metadata'] = {'next_cursor': str(page + 1)}
+      return result
+    if method == 'users.info':
+      return {'ok': False, 'error': 'user_not_found'}
+
+class Logger(object):
+  def __init__(self):
+    self.warnings = []
+
+  def warning(self, msg, *args):
+    self.warnings.append(msg % args)
+
+def user(id_str, name, first_name=None):
+  return {'id': id_str, 'name': name, 'profile': {'first_name': first_name}}
+
+def test_load_follows_cursor():
+  client = FakeClient([[user('U1', 'Albert', 'Albert')], [user('U2', 'squirtlebot')]])
+  users = UserDirectory(client)
+  users.load()
+  assert len(client.calls) == 2
+  assert users.id('albert') == 'U1'
+  assert users.id('SquirtleBot') == 'U2'
+  assert users.user('U1')['first_name'] == 'Albert'
+  assert len(client.calls) == 2
+
+def test_events_update_directory():
+  client = FakeClient([[user('U1', 'albert', 'Albert')]])
+  users = UserDirectory(client)
+  users.load()
+  users.handle_events([
+    {'type': 'user_change', 'user': user('U1', 'al', 'Al')},
+    {'type': 'team_join', 'user': user('U3', 'barry', 'Barry')},
+    {'type': 'message', 'text': 'hi', 'user': 'U1'},
+  ])
+  assert users.id('albert') is None
+  assert users.id('al') == 'U1'
+  assert users.user('U3')['first_name'] == 'Barry'
+  assert users.user('U9') == {}
+
+def test_failed_refresh_is_logged_and_throttled():
+  client = FakeClient([[user('U1', 'albert', 'Albert')]])
+  logger = Logger()
+  users = UserDirectory(client, refresh_time=5, logger=logger)
+  users.load()
+  users._fetched = datetime.now() - timedelta(minutes=10)
+  client.api_call = lambda method, **kwargs: {'ok': False, 'error': 'ratelimited'}
+
+  assert users.id('albert') == 'U1'
+  deadline = time.time() + 5
+  while users._loading and time.time() < deadline:
+    time.sleep(0.01)
+  assert not users._loading
+  assert logger.warnings == ["Keeping stale user list: Exception('ratelimited')"]
+  assert datetime.now() - users._fetched < timedelta(minutes=1)
+
+  # Not tried again until refresh_time has passed.
+  assert users.id('albert') == 'U1'
+  assert len(logger.warnings) == 1
@@ -0,0 +1,76 @@
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('..')
+
+from slackbot.workerpool import WorkerPool
+
+def test_same_key_runs_in_order():
+  done = []
+  finished = threading.Event()
+  pool = WorkerPool(workers=4)
+
+  def task(i):
+    time.sleep(0.01 * (5 - i))
+    done.append(i)
+    if len(done) == 5:
+      finished.set()
+
+  for i in range(5):
+    assert pool.submit('C1', task, i)
+  assert finished.wait(2)
+  assert done == [0, 1, 2, 3, 4]
+  pool.shutdown(wait=True)
+
+def test_other_keys_are_not_blocked():
+  release = threading.Event()
+  ran = threading.Event()
+  pool = WorkerPool(workers=2)
+  pool.submit('C1', release.wait, 2)
+  pool.submit('C2', ran.set)
+  assert ran.wait(1)
+  release.set()
+  pool.shutdown(wait=True)
+
+def test_refuses_when_full():
+  release = threading.Event()
+  pool = WorkerPool(workers=1, max_pending=2)
+  assert pool.submit('C1', release.wait, 2)
+  assert pool.submit('C1', release.wait, 2)
+  assert not pool.submit('C2', release.wait, 2)
+  release.set()
+  pool.shutdown(wait=True)
+
+class Logger(object):
+  def __init__(self):
+    self.warnings = []
+
+  def warning(self, msg, *args):
+    self.warnings.append(msg % args)
+
+def test_tasks_queued_during_shutdown_are_discarded():
+  logger = Logger()
+  pool = WorkerPool(workers=1, logger=logger)
+  queued = []
+
+  class Executor(object):
+    """ Has another task queued under the same key just as it refuses one. """
+    def submit(self, function, *args):
+      queued.append(pool.submit('C1', print, 'second'))
+      raise RuntimeError('cannot schedule new futures after shutdown')
+
+  pool._executor = Executor()
+  assert not pool.submit('C1', print, 'first')
+  assert queued == [True]
+  assert len(pool) == 0
+  assert pool._queues == {}
+  assert logger.warnings == ["Discarded 1 task(s) queued for 'C1' after shutdown."]
+
+  # The key is usable again (and refused again, as the pool is shut down).
+  pool._executor = ThreadPoolExecutor()
+  pool._executor.shutdown()
+  assert not pool.submit('C1', print, 'third')
+  assert len(pool) == 0